@@ -0,0 +1,74 @@
+import argparse
+import pathlib
+import sys
+
+from omegaconf import OmegaConf
+
+from ml_pipeline import artifact_store, utils
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Removes the runs outside of the retention policy and "
+        "the stored artifacts no run uses any longer.",
+        allow_abbrev=False,
+    )
+    parser.add_argument(
+        "--config-dir",
+        type=str,
+        default="config",
+        help="path to the config directory (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--root",
+        type=str,
+        default="artifacts",
+        help="directory of the projects' runs (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--keep-last",
+        type=int,
+        help="number of most recent runs kept per project; overrides "
+        "artifacts.retention.keep_last",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="only report what would be removed",
+    )
+    parser.add_argument(
+        "-d", "--debug", action="store_true", help="run in debug mode"
+    )
+    args = parser.parse_args()
+
+    logger = utils.Logger("ml-pipeline", debug=args.debug).get()
+
+    artifacts = OmegaConf.load(
+        pathlib.Path(args.config_dir) / "common.yaml"
+    ).get("artifacts", {})
+    if not artifacts.get("store"):
+        logger.error("No artifact store is configured.")
+        sys.exit(-1)
+    retention = artifacts.get("retention", {})
+
+    store = artifact_store.ArtifactStore(artifacts.store, logger=logger)
+    store_path = store.path.resolve()
+    project_dirs = [
+        str(path)
+        for path in sorted(pathlib.Path(args.root).iterdir())
+        if path.is_dir() and path.resolve() != store_path
+    ]
+    removed = store.collect(
+        project_dirs,
+        keep_last=(
+            args.keep_last
+            if args.keep_last is not None
+            else retention.get("keep_last")
+        ),
+        keep_best=retention.get("keep_best"),
+        dry_run=args.dry_run,
+    )
+    logger.info(
+        f"{'Would remove' if args.dry_run else 'Removed'} {removed['runs']} "
+        f"runs and {removed['objects']} objects, freeing "
+        f"{removed['bytes']} bytes."
+    )
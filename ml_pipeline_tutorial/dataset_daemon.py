@@ -0,0 +1,52 @@
+import argparse
+import sys
+
+from ml_pipeline import dataset_daemon, memory, utils
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Dataset daemon: serves loaded and pre-processed data "
+        "frames to pipeline runs from shared memory.",
+        allow_abbrev=False,
+    )
+    parser.add_argument(
+        "-a",
+        "--address",
+        type=str,
+        help="path of the Unix socket to listen on (default: a socket in a "
+        "private per-user runtime directory)",
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=memory.parse_size,
+        help="shared memory to hold, e.g. 4G; the least recently used data "
+        "frames are evicted beyond it",
+    )
+    parser.add_argument(
+        "--stop", action="store_true", help="stop a running daemon"
+    )
+    parser.add_argument(
+        "-d", "--debug", action="store_true", help="run in debug mode"
+    )
+    args = parser.parse_args()
+
+    logger = utils.Logger("ml-pipeline", debug=args.debug).get()
+    address = args.address or dataset_daemon.default_address()
+
+    if args.stop:
+        client = dataset_daemon.DatasetClient.connect(address)
+        if client is None:
+            logger.error(f"No dataset daemon listens on {address}.")
+            sys.exit(-1)
+        client.stop()
+        sys.exit(0)
+
+    daemon = dataset_daemon.DatasetDaemon(
+        address, max_memory=args.max_memory, logger=logger
+    )
+    logger.info(f"Dataset daemon listening on {address}.")
+    try:
+        daemon.serve()
+    except KeyboardInterrupt:
+        daemon.close()
+    logger.info("Dataset daemon stopped.")
@@ -1,9 +1,10 @@
 import argparse
-import json
 import numpy as np
 import pandas as pd
 
 from ml_pipeline.datasets.iris import IrisDataset
+from ml_pipeline.encoding import CategoricalEncoder
+from ml_pipeline.feature_plan import FeaturePlan
 from ml_pipeline.models.iris_classifier import IrisClassifier
 
 if __name__ == "__main__":
@@ -48,16 +49,14 @@ if __name__ == "__main__":
         std=preprocessing_artifact["std"],
     )
 
-    features = dataset.feature_engineer(
-        ["sepal_length", "sepal_width", "petal_length", "petal_width"]
-    )
+    # derive features with the plan saved during training
+    feature_plan = FeaturePlan.load(f"{args.artifact_dir}/feature_plan.json")
+    dataset.df = feature_plan.apply(dataset.df)
 
     # get target label encoding
-    with open(f"{args.artifact_dir}/encodings.json", "r") as f:
-        encodings = json.loads(f.read())
+    encoder = CategoricalEncoder.load(f"{args.artifact_dir}/encodings.json")
 
     # perform inference
     y = model.predict(dataset.df)
-    for idx, item_pred in enumerate(y):
-        species = [k for k, v in encodings.items() if v == item_pred][0]
+    for idx, species in enumerate(encoder.decode(y)):
         print(f"Row {idx}: {species}")
\ No newline at end of file
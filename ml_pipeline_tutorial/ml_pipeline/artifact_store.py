@@ -0,0 +1,336 @@
+"""Content-addressed store of run artifacts.
+
+Runs sharing data and configuration write byte-identical artifacts, e.g. the
+pre-processed and feature-engineered data. The store keeps every distinct
+artifact once, as a read-only object named by the SHA-256 of its content, and
+run directories hold hard links to the objects plus a manifest of them.
+
+Data frame artifacts can also be looked up by a key of the data frame's
+content (see `frame_key`) before they are written: when an earlier run wrote
+the same data frame, the run directory just gets a link and nothing is
+written.
+
+Layout:
+
+    <store>/<first 2 digest characters>/<remaining characters>   objects
+    <store>/keys/<frame key>                                     object digests
+    <run directory>/<artifact>                                   hard links
+    <run directory>/manifest.json
+
+`collect` removes the runs outside of a retention policy and the objects no
+run links to any longer.
+
+Usage example:
+    store = ArtifactStore("artifacts/objects")
+    if not store.link(key, path):
+        write(path)
+        store.add(path, key=key)
+    store.commit(run_dir, metrics={"accuracy": 0.96})
+"""
+
+import collections
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import time
+
+from typing import TYPE_CHECKING, Dict, List, Mapping
+
+import pandas as pd
+
+from ml_pipeline.utils import atomic_path
+
+if TYPE_CHECKING:
+    import logging
+
+MANIFEST = "manifest.json"
+
+# size of the chunks in which artifacts are hashed
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def frame_key(df: "pd.DataFrame", **params) -> str:
+    """Key of a data frame artifact.
+
+    The key depends on the values, columns and dtypes of the data frame, but
+    not on its index, and on the parameters of the artifact's format. Rows
+    are hashed with pandas' vectorised hashing, which is much cheaper than
+    formatting the artifact.
+
+    Args:
+        df (pd.DataFrame): The data frame.
+        **params: Format parameters, e.g. the compression codec.
+    Returns:
+        str: The key.
+    """
+    hasher = hashlib.sha256()
+    hasher.update(
+        json.dumps(
+            {
+                "columns": [str(column) for column in df.columns],
+                "dtypes": [str(dtype) for dtype in df.dtypes],
+                "params": params,
+            },
+            sort_keys=True,
+            default=str,
+        ).encode()
+    )
+    hasher.update(pd.util.hash_pandas_object(df, index=False).to_numpy())
+    return hasher.hexdigest()
+
+
+def _digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _link(source: "pathlib.Path", path: str) -> None:
+    # replace the file at `path` with a link to `source` atomically
+    with atomic_path(path) as tmp_path:
+        os.link(source, tmp_path)
+
+
+class ArtifactStore:
+    """Stores run artifacts once under their content hash."""
+
+    def __init__(self, path: str, logger: "logging.Logger" = None) -> None:
+        """Opens the store, creating its directory if needed.
+
+        Args:
+            path (str): Directory of the objects. Must be on the file system
+                of the run directories, so that they can link to objects.
+            logger (logging.Logger): Logger.
+        """
+        self.path = pathlib.Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.logger = logger
+        # digests of the artifacts added by this process, by path
+        self.digests = {}
+
+    def object_path(self, digest: str) -> "pathlib.Path":
+        """Path of the object with the given digest."""
+        return self.path / digest[:2] / digest[2:]
+
+    def add(self, path: str, key: str = None) -> str:
+        """Moves an artifact into the store and links it back.
+
+        Args:
+            path (str): Path of the written artifact.
+            key (str): Key to find the artifact by (see `link`). Optional.
+        Returns:
+            str: The artifact's digest.
+        """
+        digest = _digest(path)
+        obj = self.object_path(digest)
+        if not obj.exists():
+            obj.parent.mkdir(exist_ok=True)
+            os.chmod(path, 0o444)
+            try:
+                os.link(path, obj)
+            except FileExistsError:
+                # added concurrently by another run
+                pass
+        if not os.path.samefile(path, obj):
+            _link(obj, path)
+
+        if key is not None:
+            keys = self.path / "keys"
+            keys.mkdir(exist_ok=True)
+            with atomic_path(keys / key) as tmp_path:
+                pathlib.Path(tmp_path).write_text(digest)
+        self.digests[os.path.abspath(path)] = digest
+        return digest
+
+    def link(self, key: str, path: str) -> bool:
+        """Links the artifact stored under a key to `path`, if any.
+
+        Returns:
+            bool: Whether the artifact was linked; when False, it has to be
+                written (and added).
+        """
+        try:
+            digest = (self.path / "keys" / key).read_text()
+        except FileNotFoundError:
+            return False
+        obj = self.object_path(digest)
+        try:
+            _link(obj, path)
+        except FileNotFoundError:
+            # the object was collected
+            return False
+        self.digests[os.path.abspath(path)] = digest
+        return True
+
+    def commit(
+        self,
+        run_dir: str,
+        metrics: Mapping[str, float] = None,
+        exclude: List[str] = (),
+    ) -> Dict:
+        """Adds all artifacts of a run and writes its manifest.
+
+        Args:
+            run_dir (str): Run directory.
+            metrics (Mapping[str, float]): Metrics of the run, used by
+                retention policies.
+            exclude (List[str]): Names of files that are not artifacts, e.g.
+                log files still being written.
+        Returns:
+            Dict: The manifest.
+        """
+        run_dir = pathlib.Path(run_dir)
+        files = {}
+        for directory, _, names in os.walk(run_dir):
+            for name in sorted(names):
+                path = pathlib.Path(directory) / name
+                relative = str(path.relative_to(run_dir))
+                if relative in (MANIFEST, *exclude) or name.startswith("."):
+                    continue
+                digest = self.digests.get(os.path.abspath(path))
+                if digest is None or not os.path.samefile(
+                    path, self.object_path(digest)
+                ):
+                    digest = self.add(str(path))
+                files[relative] = {
+                    "digest": digest,
+                    "size": path.stat().st_size,
+                }
+
+        manifest = {
+            "created": time.time(),
+            "metrics": dict(metrics or {}),
+            "files": files,
+        }
+        with atomic_path(run_dir / MANIFEST) as tmp_path, open(
+            tmp_path, "w"
+        ) as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+    def runs(self, project_dir: str) -> List[Dict]:
+        """Manifests of a project's runs, oldest first.
+
+        Runs without a manifest (unfinished, or written before the store) are
+        not listed, so they are never collected.
+        """
+        runs = []
+        for run_dir in pathlib.Path(project_dir).iterdir():
+            try:
+                with open(run_dir / MANIFEST, "r") as f:
+                    manifest = json.load(f)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            manifest["path"] = str(run_dir)
+            runs.append(manifest)
+        return sorted(runs, key=lambda run: run["created"])
+
+    def collect(
+        self,
+        project_dirs: List[str],
+        keep_last: int = None,
+        keep_best: Mapping[str, str] = None,
+        dry_run: bool = False,
+    ) -> Dict[str, int]:
+        """Removes runs outside of a retention policy and unused objects.
+
+        Args:
+            project_dirs (List[str]): Directories of the projects' runs.
+            keep_last (int): Number of most recent runs kept per project. All
+                runs are kept by default.
+            keep_best (Mapping[str, str]): Metric name to "max" or "min": the
+                run with the best value of each metric is kept too.
+            dry_run (bool): Only report what would be removed.
+        Returns:
+            Dict[str, int]: Numbers of removed runs and objects, and bytes
+                freed.
+        """
+        removed_runs = []
+        for project_dir in project_dirs:
+            runs = self.runs(project_dir)
+            kept = set()
+            if keep_last is None:
+                kept.update(run["path"] for run in runs)
+            elif keep_last > 0:
+                kept.update(run["path"] for run in runs[-keep_last:])
+            for metric, mode in (keep_best or {}).items():
+                if mode not in ("max", "min"):
+                    raise ValueError(
+                        f"Retention mode of '{metric}' must be max or min"
+                    )
+                scored = [
+                    run
+                    for run in runs
+                    if run["metrics"].get(metric) is not None
+                ]
+                if scored:
+                    best = (max if mode == "max" else min)(
+                        scored, key=lambda run: run["metrics"][metric]
+                    )
+                    kept.add(best["path"])
+            removed_runs += [run for run in runs if run["path"] not in kept]
+
+        removed_paths = {run["path"] for run in removed_runs}
+        for run in removed_runs:
+            if self.logger:
+                self.logger.info(
+                    f"{'Would remove' if dry_run else 'Removing'} run "
+                    f"{run['path']}."
+                )
+            if not dry_run:
+                shutil.rmtree(run["path"])
+
+        # objects referenced by the manifests of the remaining runs
+        referenced = {
+            entry["digest"]
+            for project_dir in project_dirs
+            for run in self.runs(project_dir)
+            if run["path"] not in removed_paths
+            for entry in run["files"].values()
+        }
+        # links of the removed runs, still present in a dry run
+        removed_links = collections.Counter(
+            entry["digest"]
+            for run in removed_runs
+            for entry in run["files"].values()
+            if dry_run
+        )
+
+        removed_objects, freed = set(), 0
+        for obj in self._objects():
+            digest = obj.parent.name + obj.name
+            stat = obj.stat()
+            # objects still linked from a run directory are kept, even
+            # without a manifest referencing them (e.g. a run in progress)
+            if (
+                stat.st_nlink - removed_links[digest] <= 1
+                and digest not in referenced
+            ):
+                removed_objects.add(digest)
+                freed += stat.st_size
+                if not dry_run:
+                    obj.unlink()
+
+        if not dry_run and (self.path / "keys").is_dir():
+            for key in (self.path / "keys").iterdir():
+                if key.read_text() in removed_objects:
+                    key.unlink()
+
+        return {
+            "runs": len(removed_runs),
+            "objects": len(removed_objects),
+            "bytes": freed,
+        }
+
+    def _objects(self) -> List["pathlib.Path"]:
+        return [
+            obj
+            for prefix in self.path.iterdir()
+            if prefix.is_dir() and len(prefix.name) == 2
+            for obj in prefix.iterdir()
+            if not obj.name.startswith(".")
+        ]
@@ -0,0 +1,193 @@
+"""Destinations of the artifacts written by pipeline runs.
+
+Tasks and models write artifacts through a sink instead of to paths, so the
+same pipeline code can write them to a run directory, keep them in memory or
+skip them altogether:
+
+- DirectorySink writes files to a run directory (optionally block-compressed
+  and deduplicated by an artifact store);
+- MemorySink keeps the bytes of the artifacts in a dictionary, e.g. for
+  services or tests that embed the pipeline;
+- NullSink drops them without serialising them, for tight sweep loops.
+
+Artifacts are written by a function of a binary file object, which sinks
+only call when the artifact is actually kept; `text` adapts functions
+writing text.
+
+Usage example:
+    sink = open_sink("memory")
+    sink.write("metrics.json", lambda f: f.write(json.dumps(m).encode()))
+    sink.artifacts["metrics.json"]
+"""
+
+import io
+import os
+
+from abc import ABC, abstractmethod
+from typing import (
+    TYPE_CHECKING,
+    BinaryIO,
+    Callable,
+    Dict,
+    Optional,
+    TextIO,
+    Union,
+)
+
+from ml_pipeline import block_compression, tracing
+from ml_pipeline.utils import atomic_path
+
+if TYPE_CHECKING:
+    from ml_pipeline.artifact_store import ArtifactStore
+
+
+class ArtifactSink(ABC):
+    """Destination of a run's artifacts."""
+
+    # whether written artifacts are kept; callers may skip preparing them
+    enabled = True
+
+    @abstractmethod
+    def write(
+        self,
+        name: str,
+        write: Callable[[BinaryIO], None],
+        compression: str = None,
+        key: Callable[[], str] = None,
+    ) -> Optional[str]:
+        """Writes an artifact.
+
+        Args:
+            name (str): Name of the artifact, e.g. "model.joblib".
+            write (Callable[[BinaryIO], None]): Writes the artifact to a
+                binary file object.
+            compression (str): Block-compression codec (see
+                ml_pipeline.block_compression), or None.
+            key (Callable[[], str]): Returns a key of the artifact's content
+                without writing it (see ml_pipeline.artifact_store.frame_key).
+                Only called by sinks that deduplicate artifacts.
+        Returns:
+            str: Where the artifact was written, or None if it was dropped.
+        """
+
+
+class DirectorySink(ArtifactSink):
+    """Writes artifacts to files in a directory."""
+
+    def __init__(self, directory: str, store: "ArtifactStore" = None) -> None:
+        """Instantiates the sink.
+
+        Args:
+            directory (str): Directory of the artifacts. Must exist.
+            store (ArtifactStore): Artifact store to deduplicate keyed
+                artifacts in: when a run already wrote an artifact with the
+                same key, the file is linked from the store instead.
+        """
+        self.directory = directory
+        self.store = store
+
+    def write(
+        self,
+        name: str,
+        write: Callable[[BinaryIO], None],
+        compression: str = None,
+        key: Callable[[], str] = None,
+    ) -> Optional[str]:
+        path = block_compression.artifact_path(
+            os.path.join(self.directory, name), compression
+        )
+        if self.store is not None and key is not None:
+            key = key()
+            if self.store.link(key, path):
+                return path
+
+        with atomic_path(path) as tmp_path, block_compression.open_writer(
+            tmp_path, compression
+        ) as f:
+            write(f)
+        if self.store is not None and key is not None:
+            self.store.add(path, key=key)
+        return path
+
+
+class MemorySink(ArtifactSink):
+    """Keeps the bytes of artifacts in memory, uncompressed."""
+
+    def __init__(self) -> None:
+        # artifact name to content
+        self.artifacts: Dict[str, bytes] = {}
+
+    def write(
+        self,
+        name: str,
+        write: Callable[[BinaryIO], None],
+        compression: str = None,
+        key: Callable[[], str] = None,
+    ) -> Optional[str]:
+        with tracing.span(f"write {name}", cat="artifact"):
+            f = io.BytesIO()
+            write(f)
+            self.artifacts[name] = f.getvalue()
+        return name
+
+    def open(self, name: str) -> BinaryIO:
+        """Opens an artifact for reading, e.g. with joblib.load or np.load.
+
+        Raises:
+            KeyError: No artifact was written with this name.
+        """
+        return io.BytesIO(self.artifacts[name])
+
+
+class NullSink(ArtifactSink):
+    """Drops artifacts without writing them."""
+
+    enabled = False
+
+    def write(
+        self,
+        name: str,
+        write: Callable[[BinaryIO], None],
+        compression: str = None,
+        key: Callable[[], str] = None,
+    ) -> Optional[str]:
+        return None
+
+
+def text(write: Callable[[TextIO], None]) -> Callable[[BinaryIO], None]:
+    """Adapts a function writing UTF-8 text to a binary file object."""
+
+    def write_binary(f: BinaryIO) -> None:
+        wrapper = io.TextIOWrapper(f, encoding="utf-8", newline="")
+        write(wrapper)
+        # flush, but leave the file object open for the sink
+        wrapper.detach()
+
+    return write_binary
+
+
+def open_sink(
+    sink: Union[str, "ArtifactSink", None],
+    directory: str = None,
+    store: "ArtifactStore" = None,
+) -> "ArtifactSink":
+    """Sink of a sink specification.
+
+    Args:
+        sink (Union[str, ArtifactSink, None]): "directory", "memory",
+            "none" (or None), or a sink, which is returned as it is. A string
+            other than these names is the path of a directory.
+        directory (str): Directory of the "directory" sink.
+        store (ArtifactStore): Artifact store of the "directory" sink.
+    Returns:
+        ArtifactSink: The sink.
+    """
+    if isinstance(sink, ArtifactSink):
+        return sink
+    if sink in (None, "none"):
+        return NullSink()
+    if sink == "memory":
+        return MemorySink()
+    if sink == "directory":
+        return DirectorySink(directory, store=store)
+    return DirectorySink(sink, store=store)
@@ -0,0 +1,296 @@
+"""Block-compressed artifact files.
+
+Artifacts are split into fixed-size blocks which are compressed independently
+on a thread pool (the stdlib codecs release the GIL while compressing), so the
+codec doesn't become the bottleneck when writing large artifacts. The file
+ends with an index of the blocks, so readers can seek and decompress only the
+blocks they actually read.
+
+File layout:
+
+    magic | codec name length (1 byte) | codec name | block size (uint32)
+    compressed block 0 | compressed block 1 | ...
+    index: (offset uint64, compressed size uint32, size uint32) per block
+    index offset (uint64) | number of blocks (uint64) | magic
+
+Usage example:
+    with open_writer("model.joblib.blk", "zlib") as f:
+        joblib.dump(model, f)
+    with open_reader("model.joblib.blk") as f:
+        model = joblib.load(f)
+"""
+
+import bisect
+import bz2
+import io
+import lzma
+import os
+import struct
+import zlib
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, Tuple
+
+MAGIC = b"MLPBLK\x00\x01"
+SUFFIX = ".blk"
+BLOCK_SIZE = 4 << 20
+
+_HEADER = struct.Struct("<I")
+_INDEX_ENTRY = struct.Struct("<QII")
+_FOOTER = struct.Struct("<QQ")
+
+# codec name -> (compress, decompress)
+CODECS: Dict[str, Tuple[Callable, Callable]] = {
+    "zlib": (zlib.compress, zlib.decompress),
+    "lzma": (lzma.compress, lzma.decompress),
+    "bz2": (bz2.compress, bz2.decompress),
+}
+
+try:
+    import zstandard
+
+    CODECS["zstd"] = (
+        lambda data: zstandard.ZstdCompressor().compress(data),
+        lambda data: zstandard.ZstdDecompressor().decompress(data),
+    )
+except ImportError:  # pragma: no cover - optional dependency
+    pass
+
+try:
+    import lz4.frame
+
+    CODECS["lz4"] = (lz4.frame.compress, lz4.frame.decompress)
+except ImportError:  # pragma: no cover - optional dependency
+    pass
+
+
+def artifact_path(path: str, codec: str = None) -> str:
+    """Path of an artifact written with the given codec.
+
+    Args:
+        path (str): Uncompressed artifact path.
+        codec (str): Codec name, or None (or "none") for no compression.
+    Returns:
+        str: Path with the block-compression suffix if compressed.
+    """
+    if codec in (None, "none"):
+        return path
+    return f"{path}{SUFFIX}"
+
+
+def resolve(path: str) -> str:
+    """Finds an artifact whether or not it was written compressed.
+
+    Args:
+        path (str): Uncompressed artifact path.
+    Returns:
+        str: `path` if it exists, otherwise the compressed variant if that
+            exists, otherwise `path`.
+    """
+    if not os.path.exists(path) and os.path.exists(f"{path}{SUFFIX}"):
+        return f"{path}{SUFFIX}"
+    return path
+
+
+def open_writer(
+    path: str,
+    codec: str = None,
+    block_size: int = BLOCK_SIZE,
+    max_workers: int = None,
+) -> BinaryIO:
+    """Opens an artifact for writing.
+
+    Args:
+        path (str): Output path.
+        codec (str): Codec name, or None (or "none") for no compression.
+        block_size (int): Uncompressed bytes per block.
+        max_workers (int): Number of compression threads.
+    Returns:
+        BinaryIO: Writable binary file object.
+    Raises:
+        ValueError: Unknown (or not installed) codec.
+    """
+    if codec in (None, "none"):
+        return open(path, "wb")
+    return BlockWriter(path, codec, block_size, max_workers)
+
+
+def open_reader(path: str) -> BinaryIO:
+    """Opens an artifact for reading, compressed or not.
+
+    Args:
+        path (str): Artifact path.
+    Returns:
+        BinaryIO: Readable, seekable binary file object.
+    """
+    with open(path, "rb") as f:
+        is_compressed = f.read(len(MAGIC)) == MAGIC
+    if not is_compressed:
+        return open(path, "rb")
+    return io.BufferedReader(BlockReader(path))
+
+
+def _codec(name: str) -> Tuple[Callable, Callable]:
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown or unavailable codec '{name}'; "
+            f"available codecs: {', '.join(sorted(CODECS))}"
+        )
+
+
+class BlockWriter(io.RawIOBase):
+    """Writes a block-compressed file, compressing blocks in parallel."""
+
+    def __init__(
+        self,
+        path: str,
+        codec: str,
+        block_size: int = BLOCK_SIZE,
+        max_workers: int = None,
+    ) -> None:
+        self._compress = _codec(codec)[0]
+        self.block_size = block_size
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._file.write(bytes([len(codec)]) + codec.encode())
+        self._file.write(_HEADER.pack(block_size))
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._buffer = bytearray()
+        self._pending = []
+        self._index = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            self._submit(bytes(self._buffer[: self.block_size]))
+            del self._buffer[: self.block_size]
+        return len(data)
+
+    def _submit(self, block: bytes) -> None:
+        self._pending.append(
+            (len(block), self._executor.submit(self._compress, block))
+        )
+        # bound the memory held by blocks waiting to be written
+        while len(self._pending) > 2 * self.max_workers:
+            self._write_next()
+
+    def _write_next(self) -> None:
+        size, future = self._pending.pop(0)
+        compressed = future.result()
+        self._index.append((self._file.tell(), len(compressed), size))
+        self._file.write(compressed)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            if self._buffer:
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            while self._pending:
+                self._write_next()
+
+            index_offset = self._file.tell()
+            for entry in self._index:
+                self._file.write(_INDEX_ENTRY.pack(*entry))
+            self._file.write(_FOOTER.pack(index_offset, len(self._index)))
+            self._file.write(MAGIC)
+        finally:
+            self._executor.shutdown()
+            self._file.close()
+            super().close()
+
+
+class BlockReader(io.RawIOBase):
+    """Reads a block-compressed file, decompressing blocks on demand."""
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "rb")
+        if self._file.read(len(MAGIC)) != MAGIC:
+            self._file.close()
+            raise ValueError(f"'{path}' is not a block-compressed file")
+        codec = self._file.read(self._file.read(1)[0]).decode()
+        self._decompress = _codec(codec)[1]
+        self.codec = codec
+
+        self._file.seek(-(_FOOTER.size + len(MAGIC)), io.SEEK_END)
+        index_offset, num_blocks = _FOOTER.unpack(
+            self._file.read(_FOOTER.size)
+        )
+        if self._file.read(len(MAGIC)) != MAGIC:
+            self._file.close()
+            raise ValueError(f"'{path}' is truncated")
+        self._file.seek(index_offset)
+        self._index = [
+            _INDEX_ENTRY.unpack(self._file.read(_INDEX_ENTRY.size))
+            for _ in range(num_blocks)
+        ]
+
+        # uncompressed offset at which each block starts
+        self._starts = []
+        self.size = 0
+        for _, _, size in self._index:
+            self._starts.append(self.size)
+            self.size += size
+
+        self._position = 0
+        self._block = -1
+        self._data = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        self._position = max(offset, 0)
+        return self._position
+
+    def _load(self, block: int) -> None:
+        if block != self._block:
+            offset, compressed_size, _ = self._index[block]
+            self._file.seek(offset)
+            self._data = self._decompress(self._file.read(compressed_size))
+            self._block = block
+
+    def readinto(self, buffer) -> int:
+        if self._position >= self.size:
+            return 0
+
+        # find the block containing the current position
+        block = self._block
+        if not (
+            0 <= block < len(self._starts)
+            and self._starts[block]
+            <= self._position
+            < self._starts[block] + self._index[block][2]
+        ):
+            block = bisect.bisect_right(self._starts, self._position) - 1
+        self._load(block)
+
+        start = self._position - self._starts[block]
+        count = min(len(buffer), len(self._data) - start)
+        buffer[:count] = self._data[start : start + count]
+        self._position += count
+        return count
+
+    def close(self) -> None:
+        if not self.closed:
+            self._file.close()
+            super().close()
@@ -5,8 +5,13 @@ This module loads configuration information from files in the config directory.
 
 import pathlib
 
+from typing import TYPE_CHECKING
+
 from omegaconf import OmegaConf
 
+if TYPE_CHECKING:
+    from omegaconf import DictConfig
+
 
 class Config:
     """Pipeline configuration."""
@@ -18,9 +23,21 @@ class Config:
             config_dir (str): Path to config directory.
             project (str): Project name. Must correspond to a YAML file.
         """
-        self.config_dir = pathlib.Path(config_dir)
+        self.config_dir = pathlib.Path(config_dir) if config_dir else None
         self.project = project
 
+    @classmethod
+    def from_items(cls, items: "DictConfig") -> "Config":
+        """Wraps configuration built in memory, e.g. by a service.
+
+        Args:
+            items (DictConfig): The merged common, datasets and project
+                configuration.
+        """
+        project_config = cls(None, items.project.name)
+        project_config.items = items
+        return project_config
+
     def load(self) -> None:
         """Loads configuration into the config object.
 
@@ -38,4 +55,4 @@ class Config:
 
     def __repr__(self):
         """Printable representation of an object of this type."""
-        return OmegaConf.to_yaml(self.items)
\ No newline at end of file
+        return OmegaConf.to_yaml(self.items)
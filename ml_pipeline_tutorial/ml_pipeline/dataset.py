@@ -1,12 +1,29 @@
 from abc import ABC, abstractmethod
 
+from typing import TYPE_CHECKING
+
 import pandas as pd
 
+if TYPE_CHECKING:
+    from ml_pipeline.statistics import RunningStats
+
 
 class Dataset(ABC):
     _name: str
     _df: pd.DataFrame
 
+    # parameters fitted by preprocess(), saved to apply the same
+    # pre-processing at inference time via preprocess(inference=True, ...)
+    preprocessing_params: dict = {}
+
+    # statistics of the numeric columns maintained while loading, if any
+    # (see ml_pipeline.incremental); preprocess() uses them when present
+    statistics: "RunningStats" = None
+
+    # column dtypes to parse the data with, e.g. {"species": "category"} to
+    # parse labels as categoricals whose codes encode them
+    dtypes: dict = None
+
     @property
     def name(self) -> str:
         return self._name
@@ -29,7 +46,7 @@ class Dataset(ABC):
         pass
 
     @abstractmethod
-    def preprocess(self) -> None:
+    def preprocess(self, inference: bool = False, **params) -> None:
         pass
 
     @abstractmethod
@@ -0,0 +1,413 @@
+"""Local daemon serving data frames from shared memory.
+
+Repeated local runs parse and pre-process the same data over and over. The
+daemon keeps loaded and pre-processed data frames in
+`multiprocessing.shared_memory` blocks, keyed by the dataset, its
+configuration and the state of its files. A run attaches to the blocks of a
+known key and wraps them in a data frame without copying; on a miss it loads
+the data as usual and hands the frame to the daemon for the next run.
+
+Numeric columns are shared as they are and categorical columns as their
+codes; other columns (e.g. strings) are pickled with the frame's metadata.
+
+Since clients unpickle the daemon's replies, only the user's own daemon may
+be trusted: the socket is in a private per-user runtime directory by default
+and must be owned by the user, and both ends authenticate with a random key
+in a file only the user can read.
+
+Usage example:
+    # in a terminal
+    python dataset_daemon.py --max-memory 4G
+
+    # in a run
+    client = DatasetClient.connect()
+    if client is not None:
+        df, metadata = client.get(key) or (None, None)
+"""
+
+import collections
+import hashlib
+import json
+import os
+import secrets
+import stat
+import tempfile
+import threading
+
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.connection import Client, Listener
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    import logging
+
+    from ml_pipeline.dataset import Dataset
+
+# name of the Unix socket of the daemon in the runtime directory, unless
+# configured otherwise
+SOCKET_NAME = "datasets.sock"
+
+# name of the file of the key authenticating the daemon and its clients
+AUTHKEY_NAME = "authkey"
+
+
+def runtime_dir() -> str:
+    """Private directory of the user's daemon, created if needed.
+
+    The directory is in $XDG_RUNTIME_DIR, or else in the temporary
+    directory.
+
+    Raises:
+        PermissionError: The directory exists, but is a symbolic link, owned
+            by another user or accessible to other users.
+    """
+    directory = os.path.join(
+        os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(),
+        f"ml_pipeline-{os.getuid()}",
+    )
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    _check_owned(directory, stat.S_ISDIR, private=True)
+    return directory
+
+
+def default_address() -> str:
+    """Unix socket of the daemon in the user's runtime directory."""
+    return os.path.join(runtime_dir(), SOCKET_NAME)
+
+
+def authkey(create: bool = False) -> Optional[bytes]:
+    """Key authenticating the daemon and its clients.
+
+    Args:
+        create (bool): Generate the key if there is none yet.
+    Returns:
+        bytes: The key, or None if there is none and `create` is not set.
+    Raises:
+        PermissionError: The key file is owned by another user or readable
+            by other users.
+    """
+    path = os.path.join(runtime_dir(), AUTHKEY_NAME)
+    if create:
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(fd, "wb") as f:
+                f.write(secrets.token_bytes(32))
+    try:
+        _check_owned(path, stat.S_ISREG, private=True)
+    except FileNotFoundError:
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _check_owned(
+    path: str, is_type: Callable[[int], bool], private: bool = False
+) -> None:
+    # the file must be of the right type (not a symbolic link) and owned by
+    # the user; private files must not be accessible to other users
+    info = os.lstat(path)
+    if not is_type(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(f"'{path}' is not owned by the user.")
+    if private and info.st_mode & 0o077:
+        raise PermissionError(f"'{path}' is accessible to other users.")
+
+
+def dataset_key(dataset: "Dataset", stage: str, **config) -> str:
+    """Key of a dataset's data frame at a pipeline stage.
+
+    The key changes with the dataset's configuration and with the path,
+    size and modification time of its files, so appended or rewritten data
+    is never served from a stale block.
+
+    Args:
+        dataset (Dataset): The dataset, with `data_files()`.
+        stage (str): Pipeline stage of the data frame, e.g. "loaded".
+        **config: Configuration the data frame depends on.
+    Returns:
+        str: The key.
+    """
+    files = []
+    for path in dataset.data_files():
+        stat = os.stat(path)
+        files.append([os.path.abspath(path), stat.st_size, stat.st_mtime_ns])
+    items = {
+        "dataset": dataset.name,
+        "stage": stage,
+        "config": config,
+        "files": files,
+    }
+    return hashlib.sha256(
+        json.dumps(items, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def _is_shared(values: "np.ndarray") -> bool:
+    return values.dtype.kind in "biufc"
+
+
+class DatasetDaemon:
+    """Holds data frames in shared memory and serves them to clients."""
+
+    def __init__(
+        self,
+        address: str = None,
+        max_memory: int = None,
+        logger: "logging.Logger" = None,
+    ) -> None:
+        """Instantiates the daemon.
+
+        Args:
+            address (str): Path of the Unix socket to listen on. Defaults to
+                `default_address()`.
+            max_memory (int): Bytes of shared memory to hold; the least
+                recently used frames are evicted beyond it. Unlimited by
+                default.
+            logger (logging.Logger): Logger.
+        """
+        self.address = address or default_address()
+        self.max_memory = max_memory
+        self.logger = logger
+        # key to (metadata, shared memory blocks), least recently used first
+        self.frames = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of shared memory held."""
+        return sum(
+            block.size
+            for _, blocks in self.frames.values()
+            for block in blocks
+        )
+
+    def serve(self) -> None:
+        """Serves clients until a client sends "stop"."""
+        self.authkey = authkey(create=True)
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        with Listener(
+            self.address, "AF_UNIX", authkey=self.authkey
+        ) as listener:
+            # only the user may connect
+            os.chmod(self.address, 0o600)
+            while not self.stopped.is_set():
+                conn = listener.accept()
+                threading.Thread(
+                    target=self._handle, args=(conn,), daemon=True
+                ).start()
+        self.close()
+
+    def close(self) -> None:
+        """Releases all shared memory."""
+        with self.lock:
+            while self.frames:
+                self._evict(next(iter(self.frames)))
+
+    def _handle(self, conn) -> None:
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except EOFError:
+                    return
+
+                command, *args = request
+                if command == "get":
+                    conn.send(self.get(*args))
+                elif command == "put":
+                    conn.send(self.put(*args))
+                elif command == "stats":
+                    with self.lock:
+                        conn.send(
+                            {"frames": len(self.frames), "bytes": self.nbytes}
+                        )
+                elif command == "stop":
+                    self.stopped.set()
+                    conn.send(True)
+                    # wake up the listener so that it sees the stop
+                    Client(
+                        self.address, "AF_UNIX", authkey=self.authkey
+                    ).close()
+                    return
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Metadata of a held data frame, or None."""
+        with self.lock:
+            if key not in self.frames:
+                return None
+            self.frames.move_to_end(key)
+            return self.frames[key][0]
+
+    def put(self, key: str, df: "pd.DataFrame", metadata: Dict) -> bool:
+        """Copies a data frame into shared memory.
+
+        Args:
+            key (str): Key of the data frame.
+            df (pd.DataFrame): The data frame.
+            metadata (Dict): Additional metadata returned with the frame.
+        Returns:
+            bool: Whether the data frame is held.
+        """
+        columns, blocks = [], []
+        for name in df.columns:
+            column = df[name]
+            entry = {"name": name}
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                entry["categories"] = column.cat.categories
+                entry["ordered"] = column.cat.ordered
+                values = column.cat.codes.to_numpy()
+            else:
+                values = column.to_numpy()
+            if _is_shared(values):
+                block = shared_memory.SharedMemory(
+                    create=True, size=max(values.nbytes, 1)
+                )
+                np.ndarray(values.shape, values.dtype, block.buf)[:] = values
+                blocks.append(block)
+                entry.update(
+                    block=block.name, dtype=values.dtype.str, rows=len(values)
+                )
+            else:
+                entry["values"] = values
+            columns.append(entry)
+
+        frame_metadata = {
+            "columns": columns,
+            "index": df.index,
+            "metadata": metadata,
+        }
+        with self.lock:
+            if key in self.frames:
+                self._evict(key)
+            self.frames[key] = (frame_metadata, blocks)
+            while (
+                self.max_memory is not None
+                and self.nbytes > self.max_memory
+                and len(self.frames) > 1
+            ):
+                self._evict(next(iter(self.frames)))
+            held = key in self.frames
+        if self.logger:
+            self.logger.info(
+                f"Holding {len(self.frames)} data frames in "
+                f"{self.nbytes} bytes of shared memory."
+            )
+        return held
+
+    def _evict(self, key: str) -> None:
+        _, blocks = self.frames.pop(key)
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+class DatasetClient:
+    """Connection to a running DatasetDaemon."""
+
+    def __init__(self, conn) -> None:
+        self.conn = conn
+        # attached blocks, kept open while their data frames are in use
+        self.blocks = []
+
+    @classmethod
+    def connect(cls, address: str = None) -> Optional["DatasetClient"]:
+        """Connects to the daemon, or returns None if it isn't running.
+
+        Args:
+            address (str): Path of the daemon's Unix socket. Defaults to
+                `default_address()`.
+        Raises:
+            PermissionError: The socket is owned by another user.
+            multiprocessing.AuthenticationError: The daemon doesn't have the
+                user's key.
+        """
+        address = address or default_address()
+        key = authkey()
+        try:
+            _check_owned(address, stat.S_ISSOCK)
+            if key is None:
+                return None
+            return cls(Client(address, "AF_UNIX", authkey=key))
+        except (FileNotFoundError, ConnectionRefusedError):
+            return None
+
+    def _request(self, *request):
+        self.conn.send(request)
+        return self.conn.recv()
+
+    def get(self, key: str) -> Optional[Tuple["pd.DataFrame", Dict]]:
+        """Attaches to a held data frame without copying it.
+
+        The columns shared by the daemon are read-only views of its shared
+        memory; writing to the data frame replaces them with copies.
+
+        Returns:
+            Tuple[pd.DataFrame, Dict]: The data frame and its metadata, or
+                None if the daemon doesn't hold the key.
+        """
+        frame_metadata = self._request("get", key)
+        if frame_metadata is None:
+            return None
+
+        columns = {}
+        for entry in frame_metadata["columns"]:
+            if "block" in entry:
+                block = self._attach(entry["block"])
+                values = np.ndarray(
+                    (entry["rows"],), np.dtype(entry["dtype"]), block.buf
+                )
+                values.flags.writeable = False
+            else:
+                values = entry["values"]
+            if "categories" in entry:
+                values = pd.Categorical.from_codes(
+                    values,
+                    categories=entry["categories"],
+                    ordered=entry["ordered"],
+                )
+            columns[entry["name"]] = values
+
+        df = pd.DataFrame(columns, index=frame_metadata["index"], copy=False)
+        return df, frame_metadata["metadata"]
+
+    def put(self, key: str, df: "pd.DataFrame", metadata: Dict = None) -> bool:
+        """Hands a data frame to the daemon.
+
+        Returns:
+            bool: Whether the daemon holds the data frame.
+        """
+        return self._request("put", key, df, metadata or {})
+
+    def stats(self) -> Dict:
+        """Number of data frames and bytes held by the daemon."""
+        return self._request("stats")
+
+    def stop(self) -> None:
+        """Stops the daemon."""
+        self._request("stop")
+
+    def close(self) -> None:
+        """Closes the connection.
+
+        Attached blocks stay mapped while data frames returned by `get` are
+        in use; the daemon keeps them alive until it evicts them.
+        """
+        self.conn.close()
+
+    def _attach(self, name: str) -> "shared_memory.SharedMemory":
+        block = shared_memory.SharedMemory(name=name)
+        # the daemon owns the block; don't let this process's resource
+        # tracker unlink it when the process exits
+        resource_tracker.unregister(block._name, "shared_memory")
+        self.blocks.append(block)
+        return block
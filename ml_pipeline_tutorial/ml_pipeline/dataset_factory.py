@@ -1,3 +1,5 @@
+import os
+
 from ml_pipeline.datasets import iris, autompg
 
 
@@ -13,6 +15,8 @@ class DatasetFactory:
                 self.datasets[dataset]["path"] = config.path
 
     def get(self, name: str):
+        # paths may be files, directories or glob patterns; absolute paths are
+        # used as they are
         return self.datasets[name]["class"](
-            "data/" + self.datasets[name]["path"]
+            os.path.join("data", self.datasets[name]["path"])
         )
\ No newline at end of file
@@ -1,10 +1,9 @@
-from typing import List
-
 from ml_pipeline.dataset import Dataset
 from ml_pipeline.mixins.csv_mixin import CSVMixin
+from ml_pipeline.mixins.feature_plan_mixin import FeaturePlanMixin
 
 
-class AutoMPGDataset(CSVMixin, Dataset):
+class AutoMPGDataset(CSVMixin, FeaturePlanMixin, Dataset):
     """The AutoMPG dataset.
 
     Source:
@@ -22,11 +21,12 @@ class AutoMPGDataset(CSVMixin, Dataset):
         9. Car name
     """
 
-    def __init__(self, data_path: str) -> None:
+    def __init__(self, data_path: str = None) -> None:
         """Instantiates the dataset object.
 
         Args:
-            data_path (str): Path to the CSV data file.
+            data_path (str): Path to the CSV data file. Not needed when the
+                data frame is set directly, e.g. for inference.
         """
         self.name = "autompg"
         self.data_path = data_path
@@ -42,20 +42,13 @@ class AutoMPGDataset(CSVMixin, Dataset):
             "name",
         ]
 
-    def preprocess(self) -> None:
-        """Pre-processes data."""
-        # drop rows for which the value of horsepower is unknown
-        self.df = self.df[self.df["horsepower"] != "?"]
-
-    def feature_engineer(self, features: List[str]) -> List[str]:
-        """Feature-engineer data.
+    def preprocess(self, inference: bool = False) -> None:
+        """Pre-processes data.
 
         Args:
-            features (List[str]): List of features to be used in training. Some
-                of these features may be removed during the feature-engineering
-                process.
-        Returns:
-            List[str]: Updated list of features to be used in training.
+            inference (bool): Pre-process for inference. This dataset's
+                pre-processing has no fitted parameters, so it is the same.
         """
-        # we won't do any feature engineering, so nothing to add here
-        pass
\ No newline at end of file
+        # drop rows for which the value of horsepower is unknown
+        self.df = self.df[self.df["horsepower"] != "?"]
+        self.preprocessing_params = {}
@@ -1,10 +1,11 @@
-from typing import List
+import numpy as np
 
 from ml_pipeline.dataset import Dataset
 from ml_pipeline.mixins.csv_mixin import CSVMixin
+from ml_pipeline.mixins.feature_plan_mixin import FeaturePlanMixin
 
 
-class IrisDataset(CSVMixin, Dataset):
+class IrisDataset(CSVMixin, FeaturePlanMixin, Dataset):
     """The Iris dataset.
 
     Source:
@@ -18,11 +19,12 @@ class IrisDataset(CSVMixin, Dataset):
         5. Class: {Iris setosa, Iris versicolour, Iris virginica}
     """
 
-    def __init__(self, data_path: str) -> None:
+    def __init__(self, data_path: str = None) -> None:
         """Instantiates the dataset object.
 
         Args:
-            data_path (str): Path to the CSV data file.
+            data_path (str): Path to the CSV data file. Not needed when the
+                data frame is set directly, e.g. for inference.
         """
         self.name = "iris"
         self.data_path = data_path
@@ -33,36 +35,52 @@ class IrisDataset(CSVMixin, Dataset):
             "petal_width",
             "species",
         ]
-
-    def preprocess(self) -> None:
-        """Preprocesses data."""
-        # columns to preprocess
-        columns = [
+        self.numeric_columns = [
             "sepal_length",
             "sepal_width",
             "petal_length",
             "petal_width",
         ]
-        self.df[columns] = (
-            self.df[columns] - self.df[columns].mean()
-        ) / self.df[columns].std()
+        self.dtypes = {"species": "category"}
 
-    def feature_engineer(self, features: List[str]) -> List[str]:
-        """Feature-engineer data.
+    def preprocess(
+        self,
+        inference: bool = False,
+        mean: "np.ndarray" = None,
+        std: "np.ndarray" = None,
+        columns: "np.ndarray" = None,
+    ) -> None:
+        """Preprocesses data.
 
         Args:
-            features (List[str]): List of features to be used in training. Some
-                of these features may be removed during the feature-engineering
-                process.
-        Returns:
-            List[str]: Updated list of features to be used in training.
+            inference (bool): Standardise with the given `mean` and `std`
+                (saved during training) instead of computing them.
+            mean (np.ndarray): Mean of each preprocessed column.
+            std (np.ndarray): Standard deviation of each preprocessed column.
+            columns (np.ndarray): Names of the preprocessed columns. Defaults
+                to the four measurements.
         """
-        self.df["sepal_area"] = (
-            self.df["sepal_length"].abs() * self.df["sepal_width"].abs()
-        )
-        self.df["petal_area"] = (
-            self.df["petal_length"].abs() * self.df["petal_width"].abs()
-        )
+        # columns to preprocess
+        if columns is None:
+            columns = self.numeric_columns
+        columns = [str(column) for column in columns]
+        if not inference:
+            if (
+                self.statistics is not None
+                and self.statistics.columns == columns
+            ):
+                # statistics maintained incrementally while loading
+                mean = self.statistics.mean
+                std = self.statistics.std()
+            else:
+                mean = self.df[columns].mean().to_numpy()
+                std = self.df[columns].std().to_numpy()
+
+        # keep the parameters so they can be saved for inference
+        self.preprocessing_params = {
+            "mean": mean,
+            "std": std,
+            "columns": np.array(columns),
+        }
 
-        # we would like to use all original features + newly-added features
-        return features + ["sepal_area", "petal_area"]
\ No newline at end of file
+        self.df[columns] = (self.df[columns] - mean) / std
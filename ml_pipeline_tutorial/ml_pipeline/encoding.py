@@ -0,0 +1,99 @@
+"""Label encoding through pandas categoricals.
+
+Targets are parsed as categoricals (see `Dataset.dtypes`), so their integer
+codes already exist: encoding is a view of the `.codes` of a column whose
+categories match the encoder's fixed order, and decoding is an array take.
+The category order is persisted with the training artifacts, in the
+`{label: code}` format of encodings.json, so inference decodes exactly like
+training encoded.
+
+Usage example:
+    encoder = CategoricalEncoder.fit(df["species"])
+    codes = encoder.encode(df["species"])
+    labels = encoder.decode(codes)
+"""
+
+import json
+
+from typing import BinaryIO, Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+from ml_pipeline.utils import atomic_path
+
+
+class CategoricalEncoder:
+    """Encodes labels as the codes of a fixed, ordered set of categories."""
+
+    def __init__(self, categories: Iterable) -> None:
+        """Instantiates the encoder.
+
+        Args:
+            categories (Iterable): The labels, in code order.
+        """
+        self.dtype = pd.CategoricalDtype(list(categories))
+        self.categories = self.dtype.categories.to_numpy()
+
+    @classmethod
+    def fit(cls, y: "pd.Series") -> "CategoricalEncoder":
+        """Builds an encoder of the labels of `y`.
+
+        Categorical series keep their categories, without a pass over the
+        values; other series get their sorted unique values.
+        """
+        if isinstance(y.dtype, pd.CategoricalDtype):
+            return cls(y.cat.categories)
+        return cls(np.sort(pd.unique(y.dropna())))
+
+    def matches(self, y: "pd.Series") -> bool:
+        """Whether `y` is categorical with the encoder's categories.
+
+        The categories must also be in the encoder's order, which unordered
+        categorical dtypes don't compare.
+        """
+        return (
+            isinstance(y.dtype, pd.CategoricalDtype)
+            and not y.cat.ordered
+            and y.cat.categories.equals(self.dtype.categories)
+        )
+
+    def encode(self, y: "pd.Series") -> "np.ndarray":
+        """Codes of the labels; unknown labels get the code -1."""
+        if self.matches(y):
+            return y.cat.codes.to_numpy()
+        if isinstance(y.dtype, pd.CategoricalDtype):
+            # recode the categories rather than every value; missing values
+            # (code -1) pick the appended -1
+            recode = np.append(
+                self.dtype.categories.get_indexer(y.cat.categories), -1
+            )
+            return recode[y.cat.codes.to_numpy()]
+        return self.dtype.categories.get_indexer(y)
+
+    def decode(self, codes: "np.ndarray") -> "np.ndarray":
+        """Labels of the codes."""
+        return self.categories.take(np.asarray(codes, dtype=np.int64))
+
+    @property
+    def encodings(self) -> Dict[str, int]:
+        """Label to code dictionary."""
+        return {
+            label: code for code, label in enumerate(self.categories.tolist())
+        }
+
+    def write(self, f: BinaryIO) -> None:
+        """Writes the category order as `{label: code}` JSON."""
+        f.write(json.dumps(self.encodings).encode())
+
+    def save(self, path: str) -> None:
+        """Saves the category order as a `{label: code}` JSON file."""
+        with atomic_path(path) as tmp_path, open(tmp_path, "wb") as f:
+            self.write(f)
+
+    @classmethod
+    def load(cls, path: str) -> "CategoricalEncoder":
+        """Loads an encoder saved by `save`."""
+        with open(path, "r") as f:
+            encodings = json.load(f)
+        return cls(sorted(encodings, key=encodings.get))
@@ -0,0 +1,433 @@
+"""Declarative feature expressions.
+
+This module compiles derived-feature definitions declared in the project
+configuration, for example:
+
+    derived_features:
+      sepal_area: abs(sepal_length) * abs(sepal_width)
+      log_weight: log(weight)
+      power_to_weight: horsepower / weight
+      weight_bucket: bucket(weight, [2000, 3000, 4000])
+
+into a single evaluation plan. All derived features are evaluated in one pass
+over the base columns: with numexpr when it is installed, and with a blocked
+NumPy program otherwise. Common sub-expressions are evaluated once per block,
+so wide feature sets don't pay for repeated temporaries.
+
+The plan only depends on NumPy (and optionally numexpr), so the same plan can
+be saved with the training artifacts and reused verbatim at inference time,
+e.g. by ml_pipeline.predictor without importing the rest of the pipeline.
+"""
+
+import ast
+import hashlib
+import json
+
+from typing import TYPE_CHECKING, BinaryIO, Dict, List, Mapping, Tuple
+
+import numpy as np
+
+try:
+    import numexpr
+except ImportError:  # pragma: no cover - optional dependency
+    numexpr = None
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# number of rows evaluated at a time by the NumPy fallback; small enough for
+# the per-block temporaries to stay in cache
+BLOCK_SIZE = 16384
+
+PLAN_VERSION = 1
+
+_BINARY_OPS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.true_divide,
+    ast.Pow: np.power,
+}
+_UNARY_OPS = {
+    ast.USub: np.negative,
+    ast.UAdd: np.positive,
+}
+_FUNCTIONS = {
+    "abs": np.abs,
+    "exp": np.exp,
+    "log": np.log,
+    "log1p": np.log1p,
+    "sqrt": np.sqrt,
+}
+
+
+class FeaturePlan:
+    """A compiled set of derived-feature definitions.
+
+    Usage example:
+        plan = FeaturePlan({"sepal_area": "abs(sepal_length) * sepal_width"})
+        df = plan.apply(df)
+    """
+
+    def __init__(self, definitions: Mapping[str, str]) -> None:
+        """Compiles the feature definitions.
+
+        Args:
+            definitions (Mapping[str, str]): Derived feature name to
+                expression. Expressions may reference base columns and other
+                derived features.
+
+        Raises:
+            ValueError: Invalid expression or circular reference.
+        """
+        self.definitions = {
+            str(name): str(expression)
+            for name, expression in definitions.items()
+        }
+        self.names = list(self.definitions)
+
+        # parse and inline references to other derived features
+        self._trees = {}
+        for name in self.names:
+            self._resolve(name, ())
+
+        # base columns are the names that are not function names
+        functions = {
+            id(node.func)
+            for tree in self._trees.values()
+            for node in ast.walk(tree)
+            if isinstance(node, ast.Call)
+        }
+        self.inputs = sorted(
+            {
+                node.id
+                for tree in self._trees.values()
+                for node in ast.walk(tree)
+                if isinstance(node, ast.Name) and id(node) not in functions
+            }
+        )
+
+        # numexpr evaluates everything except bucketing
+        self._numexpr = {}
+        if numexpr is not None:
+            for name, tree in self._trees.items():
+                if not any(
+                    isinstance(node, ast.Call) and node.func.id == "bucket"
+                    for node in ast.walk(tree)
+                ):
+                    self._numexpr[name] = ast.unparse(tree)
+
+        # compile the remaining features into a single program in which
+        # common sub-expressions share a register
+        self._program = []
+        self._registers = {}
+        self._outputs = {
+            name: self._emit(tree)
+            for name, tree in self._trees.items()
+            if name not in self._numexpr
+        }
+
+    def _resolve(self, name: str, stack: Tuple[str, ...]) -> "ast.expr":
+        if name in self._trees:
+            return self._trees[name]
+        if name in stack:
+            cycle = " -> ".join(stack + (name,))
+            raise ValueError(f"Circular feature definition: {cycle}")
+
+        try:
+            tree = ast.parse(self.definitions[name], mode="eval").body
+        except SyntaxError as error:
+            raise ValueError(
+                f"Invalid expression for feature '{name}': {error.msg}"
+            )
+
+        tree = _Inliner(self, name, stack + (name,)).visit(tree)
+        self._validate(name, tree)
+        self._trees[name] = tree
+        return tree
+
+    def _validate(self, name: str, tree: "ast.expr") -> None:
+        # lists are only allowed as the bin edges of bucket()
+        edges = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.List) and id(node) not in edges:
+                raise ValueError(
+                    f"Feature '{name}': unexpected list '{ast.unparse(node)}'"
+                )
+            if isinstance(node, ast.Call):
+                func = getattr(node.func, "id", None)
+                if func == "bucket":
+                    if len(node.args) != 2 or not _is_edges(node.args[1]):
+                        raise ValueError(
+                            f"Feature '{name}': bucket() expects a column "
+                            "and a list of numeric bin edges"
+                        )
+                    edges.add(id(node.args[1]))
+                elif func not in _FUNCTIONS or len(node.args) != 1:
+                    raise ValueError(
+                        f"Feature '{name}': unsupported function "
+                        f"'{ast.unparse(node.func)}'"
+                    )
+                if node.keywords:
+                    raise ValueError(
+                        f"Feature '{name}': keyword arguments are not "
+                        "supported"
+                    )
+            elif isinstance(node, ast.BinOp):
+                if type(node.op) not in _BINARY_OPS:
+                    raise ValueError(
+                        f"Feature '{name}': unsupported operator "
+                        f"'{type(node.op).__name__}'"
+                    )
+            elif isinstance(node, ast.UnaryOp):
+                if type(node.op) not in _UNARY_OPS:
+                    raise ValueError(
+                        f"Feature '{name}': unsupported operator "
+                        f"'{type(node.op).__name__}'"
+                    )
+            elif isinstance(node, ast.Constant):
+                if isinstance(node.value, bool) or not isinstance(
+                    node.value, (int, float)
+                ):
+                    raise ValueError(
+                        f"Feature '{name}': unsupported constant "
+                        f"{node.value!r}"
+                    )
+            elif not isinstance(
+                node,
+                (ast.Name, ast.List, ast.Load, ast.operator, ast.unaryop),
+            ):
+                raise ValueError(
+                    f"Feature '{name}': unsupported syntax "
+                    f"'{ast.unparse(node)}'"
+                )
+
+    def _emit(self, node: "ast.expr") -> int:
+        key = ast.dump(node)
+        if key in self._registers:
+            return self._registers[key]
+
+        if isinstance(node, ast.Name):
+            instruction = ("load", node.id)
+        elif isinstance(node, ast.Constant):
+            instruction = ("const", float(node.value))
+        elif isinstance(node, ast.UnaryOp):
+            instruction = (
+                "call",
+                _UNARY_OPS[type(node.op)],
+                self._emit(node.operand),
+            )
+        elif isinstance(node, ast.BinOp):
+            instruction = (
+                "call",
+                _BINARY_OPS[type(node.op)],
+                self._emit(node.left),
+                self._emit(node.right),
+            )
+        elif node.func.id == "bucket":
+            edges = np.array(
+                [element.value for element in node.args[1].elts], dtype=float
+            )
+            instruction = ("bucket", self._emit(node.args[0]), edges)
+        else:
+            instruction = (
+                "call",
+                _FUNCTIONS[node.func.id],
+                self._emit(node.args[0]),
+            )
+
+        self._program.append(instruction)
+        self._registers[key] = len(self._program) - 1
+        return self._registers[key]
+
+    def evaluate(
+        self,
+        columns: Mapping[str, "np.ndarray"],
+        block_size: int = BLOCK_SIZE,
+    ) -> "np.ndarray":
+        """Evaluates all derived features.
+
+        Args:
+            columns (Mapping[str, np.ndarray]): Base columns by name. Every
+                column in `inputs` must be present.
+            block_size (int): Rows per block for the NumPy fallback.
+        Returns:
+            np.ndarray: Array of shape (len(names), num_rows), one row per
+                derived feature in the order of `names`.
+        Raises:
+            KeyError: A base column is missing.
+        """
+        inputs = {
+            name: np.ascontiguousarray(columns[name], dtype=np.float64)
+            for name in self.inputs
+        }
+        num_rows = len(next(iter(inputs.values()))) if inputs else 0
+        out = np.empty((len(self.names), num_rows), dtype=np.float64)
+
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            for j, name in enumerate(self.names):
+                if name in self._numexpr:
+                    numexpr.evaluate(
+                        self._numexpr[name], local_dict=inputs, out=out[j]
+                    )
+
+            if self._outputs:
+                rows = [
+                    (j, self._outputs[name])
+                    for j, name in enumerate(self.names)
+                    if name in self._outputs
+                ]
+                for start in range(0, num_rows, block_size):
+                    stop = min(start + block_size, num_rows)
+                    registers = self._run_block(inputs, start, stop)
+                    for j, register in rows:
+                        out[j, start:stop] = registers[register]
+
+        return out
+
+    def _run_block(
+        self, inputs: Dict[str, "np.ndarray"], start: int, stop: int
+    ) -> List:
+        registers = []
+        for instruction in self._program:
+            op = instruction[0]
+            if op == "load":
+                registers.append(inputs[instruction[1]][start:stop])
+            elif op == "const":
+                registers.append(instruction[1])
+            elif op == "bucket":
+                registers.append(
+                    np.digitize(registers[instruction[1]], instruction[2])
+                )
+            else:
+                args = [registers[i] for i in instruction[2:]]
+                registers.append(instruction[1](*args))
+        return registers
+
+    def apply(self, df: "pd.DataFrame") -> "pd.DataFrame":
+        """Adds the derived features to a data frame.
+
+        Args:
+            df (pd.DataFrame): Data frame containing the base columns.
+        Returns:
+            pd.DataFrame: Data frame with derived feature columns appended
+                (existing columns of the same name are replaced).
+        """
+        import pandas as pd
+
+        if not self.names:
+            return df
+
+        values = self.evaluate(
+            {name: df[name].to_numpy(dtype=np.float64) for name in self.inputs}
+        )
+        # the transposed evaluation buffer becomes the frame's single block,
+        # so the derived columns are not copied again
+        derived = pd.DataFrame(values.T, columns=self.names, index=df.index)
+        return pd.concat(
+            [df.drop(columns=self.names, errors="ignore"), derived], axis=1
+        )
+
+    def fingerprint(self, name: str) -> str:
+        """Hash of a derived feature's fully-inlined expression.
+
+        Two features computed the same way have the same fingerprint, even if
+        their names or the names of the features they reference differ.
+
+        Args:
+            name (str): Derived feature name.
+        Returns:
+            str: Hex digest.
+        """
+        expression = ast.unparse(self._trees[name])
+        return hashlib.sha256(expression.encode()).hexdigest()[:32]
+
+    def subset(self, names: List[str]) -> "FeaturePlan":
+        """Plan that computes only some of the derived features.
+
+        Args:
+            names (List[str]): Derived feature names to keep.
+        Returns:
+            FeaturePlan: Plan whose expressions only reference base columns.
+        """
+        return FeaturePlan(
+            {name: ast.unparse(self._trees[name]) for name in names}
+        )
+
+    def to_dict(self) -> Dict:
+        """Serialisable representation of the plan."""
+        return {"version": PLAN_VERSION, "features": dict(self.definitions)}
+
+    def write(self, f: BinaryIO) -> None:
+        """Writes the feature definitions as JSON to a binary file object."""
+        f.write(json.dumps(self.to_dict(), indent=2).encode())
+
+    def save(self, path: str) -> None:
+        """Saves the feature definitions to a JSON file.
+
+        Args:
+            path (str): Output file path.
+        """
+        # imported here so that the predictor doesn't import utils
+        from ml_pipeline.utils import atomic_path
+
+        with atomic_path(path) as tmp_path, open(tmp_path, "wb") as f:
+            self.write(f)
+
+    @classmethod
+    def load(cls, path: str) -> "FeaturePlan":
+        """Loads a plan saved with `save`.
+
+        Args:
+            path (str): Path to the JSON file.
+        Returns:
+            FeaturePlan: The compiled plan.
+        Raises:
+            ValueError: Unsupported plan version.
+        """
+        with open(path, "r") as f:
+            items = json.load(f)
+        if items.get("version") != PLAN_VERSION:
+            raise ValueError(
+                f"Unsupported feature plan version: {items.get('version')}"
+            )
+        return cls(items["features"])
+
+
+class _Inliner(ast.NodeTransformer):
+    """Replaces references to derived features with their expressions."""
+
+    def __init__(
+        self, plan: "FeaturePlan", name: str, stack: Tuple[str, ...]
+    ) -> None:
+        self.plan = plan
+        self.name = name
+        self.stack = stack
+
+    def visit_Name(self, node: "ast.Name") -> "ast.expr":
+        if node.id in self.plan.definitions:
+            return self.plan._resolve(node.id, self.stack)
+        return node
+
+    def visit_Call(self, node: "ast.Call") -> "ast.expr":
+        # leave function names alone, only visit the arguments
+        if not isinstance(node.func, ast.Name):
+            raise ValueError(
+                f"Feature '{self.name}': unsupported function "
+                f"'{ast.unparse(node.func)}'"
+            )
+        node.args = [self.visit(arg) for arg in node.args]
+        return node
+
+
+def _is_edges(node: "ast.expr") -> bool:
+    return (
+        isinstance(node, ast.List)
+        and len(node.elts) > 0
+        and all(
+            isinstance(element, ast.Constant)
+            and isinstance(element.value, (int, float))
+            and not isinstance(element.value, bool)
+            for element in node.elts
+        )
+    )
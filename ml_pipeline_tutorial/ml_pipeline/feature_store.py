@@ -0,0 +1,229 @@
+"""Local feature store.
+
+This module persists derived feature columns so that projects and runs sharing
+a dataset don't recompute them. Columns are stored as individual ``.npy`` files
+and read back memory-mapped. They are keyed by:
+
+    <root>/<source data hash>-<dataset hash>/<feature hash>.npy
+
+where the dataset hash covers the code and configuration that parse and
+pre-process the data, and the feature hash is the fingerprint of the feature's
+expression in the FeaturePlan, so a column is shared by every project defining
+the same feature.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import pathlib
+import tempfile
+
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from ml_pipeline.feature_plan import FeaturePlan
+
+# size of the chunks in which source files are hashed
+HASH_CHUNK_SIZE = 1 << 20
+
+
+class FeatureStore:
+    """Feature columns persisted by data, preprocessing and feature hash.
+
+    Usage example:
+        store = FeatureStore("feature_store")
+        namespace = store.namespace(
+            dataset.data_files(), type(dataset), columns=dataset.columns
+        )
+        df = store.apply(plan, df, namespace)
+    """
+
+    def __init__(self, root: str) -> None:
+        """Instantiates the feature store.
+
+        Args:
+            root (str): Path to the store directory. Created if missing.
+        """
+        self.root = pathlib.Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.hits = []
+        self.misses = []
+
+    def namespace(
+        self, data_files: List[str], dataset_class: type, **config: Any
+    ) -> str:
+        """Store namespace for a data source and the dataset loading it.
+
+        Args:
+            data_files (List[str]): Paths to the source data files.
+            dataset_class (type): The dataset's class. The source code of the
+                class and of its bases, which parse and pre-process the data,
+                is part of the key, so editing it invalidates the stored
+                features.
+            **config: Configuration the loaded data depends on, e.g. the
+                dataset's columns and dtypes.
+        Returns:
+            str: Namespace (a directory name below the store root).
+        """
+        sources = []
+        for cls in inspect.getmro(dataset_class):
+            try:
+                sources.append(inspect.getsource(cls))
+            except (OSError, TypeError):
+                sources.append(cls.__qualname__)
+        dataset_hash = hashlib.sha256(
+            json.dumps(
+                {"sources": sources, "config": config},
+                sort_keys=True,
+                default=str,
+            ).encode()
+        ).hexdigest()
+
+        source_hash = hashlib.sha256(
+            "".join(self.source_hash(path) for path in data_files).encode()
+        ).hexdigest()
+
+        return f"{source_hash[:16]}-{dataset_hash[:16]}"
+
+    def source_hash(self, data_path: str) -> str:
+        """Content hash of a source data file.
+
+        Hashes are cached in the store by file size and modification time, so
+        unchanged files are only read once.
+
+        Args:
+            data_path (str): Path to the source data file.
+        Returns:
+            str: Hex digest.
+        """
+        path = pathlib.Path(data_path).resolve()
+        stat = path.stat()
+        cache_path = self.root / "sources.json"
+
+        cache = {}
+        if cache_path.exists():
+            with open(cache_path, "r") as f:
+                cache = json.load(f)
+
+        entry = cache.get(str(path))
+        if entry and entry["size"] == stat.st_size:
+            if entry["mtime_ns"] == stat.st_mtime_ns:
+                return entry["hash"]
+
+        digest = hashlib.blake2b()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+
+        cache[str(path)] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "hash": digest.hexdigest(),
+        }
+        self._replace(
+            cache_path, lambda f: f.write(json.dumps(cache).encode())
+        )
+
+        return cache[str(path)]["hash"]
+
+    def get(
+        self, namespace: str, key: str, num_rows: int
+    ) -> Optional["np.ndarray"]:
+        """Memory-maps a stored feature column.
+
+        Args:
+            namespace (str): Store namespace.
+            key (str): Feature fingerprint.
+            num_rows (int): Expected number of rows.
+        Returns:
+            Optional[np.ndarray]: Read-only column, or None if the column is
+                not stored (or was stored for a different number of rows).
+        """
+        path = self.root / namespace / f"{key}.npy"
+        if not path.exists():
+            return None
+
+        values = np.load(path, mmap_mode="r")
+        if values.shape != (num_rows,):
+            return None
+        return values
+
+    def put(self, namespace: str, key: str, values: "np.ndarray") -> None:
+        """Stores a feature column.
+
+        Args:
+            namespace (str): Store namespace.
+            key (str): Feature fingerprint.
+            values (np.ndarray): One-dimensional column.
+        """
+        directory = self.root / namespace
+        directory.mkdir(exist_ok=True)
+        self._replace(directory / f"{key}.npy", lambda f: np.save(f, values))
+
+    def apply(
+        self, plan: "FeaturePlan", df: "pd.DataFrame", namespace: str
+    ) -> "pd.DataFrame":
+        """Adds derived features, computing only the ones not yet stored.
+
+        Args:
+            plan (FeaturePlan): Derived feature definitions.
+            df (pd.DataFrame): Preprocessed data frame.
+            namespace (str): Store namespace of the data frame.
+        Returns:
+            pd.DataFrame: Data frame with derived feature columns appended.
+        """
+        import pandas as pd
+
+        if not plan.names:
+            return df
+
+        columns = {}
+        missing = []
+        for name in plan.names:
+            values = self.get(namespace, plan.fingerprint(name), len(df))
+            if values is None:
+                missing.append(name)
+            else:
+                columns[name] = values
+                self.hits.append(name)
+
+        if missing:
+            subset = plan.subset(missing)
+            computed = subset.evaluate(
+                {
+                    name: df[name].to_numpy(dtype=np.float64)
+                    for name in subset.inputs
+                }
+            )
+            for j, name in enumerate(missing):
+                self.put(namespace, plan.fingerprint(name), computed[j])
+                columns[name] = computed[j]
+                self.misses.append(name)
+
+        derived = pd.DataFrame(
+            {name: columns[name] for name in plan.names}, index=df.index
+        )
+        return pd.concat(
+            [df.drop(columns=plan.names, errors="ignore"), derived], axis=1
+        )
+
+    def stats(self) -> Dict[str, int]:
+        """Number of feature columns read from and written to the store."""
+        return {"hits": len(self.hits), "misses": len(self.misses)}
+
+    def _replace(self, path: "pathlib.Path", write: Callable) -> None:
+        # write to a temporary file first so that concurrent runs never read
+        # a partially-written column
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
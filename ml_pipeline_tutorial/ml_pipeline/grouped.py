@@ -0,0 +1,298 @@
+"""One model per group of rows.
+
+A GroupedEstimator wraps a scikit-learn estimator and fits one copy of it per
+group of rows, e.g. per `origin` or per customer id, from one partition of
+the data. All groups are held by the one estimator and saved as one
+artifact, with the group keys as the index of the models:
+
+- plain linear regressions are solved together by a vectorised batched
+  solver (see ml_pipeline.linear) and kept as stacked `coefs_` and
+  `intercepts_` arrays, one row per group;
+- other estimators are fitted in a process pool in which every worker
+  fits a whole batch of groups, so that the per-task overhead is paid once
+  per worker rather than once per group, and are kept as a list.
+
+A fallback model fitted on all rows predicts the rows of groups that were
+not trained (or failed to fit, e.g. classifier groups with a single class).
+
+Usage example:
+    model = GroupedEstimator(LinearRegression(), ["origin"])
+    model.fit(df[["weight", "origin"]], df["mpg"])
+    y_pred = model.predict(df[["weight", "origin"]])
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, List, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from sklearn.base import clone, is_classifier
+from sklearn.linear_model import LinearRegression
+
+from ml_pipeline import linear, resources, tracing
+
+if TYPE_CHECKING:
+    from sklearn.base import BaseEstimator
+
+
+def group_columns(group_by: "Union[str, Sequence[str]]") -> List[str]:
+    """Columns of a `project.group_by` setting: a column or a list of them."""
+    if not group_by:
+        return []
+    if isinstance(group_by, str):
+        return [group_by]
+    return [str(column) for column in group_by]
+
+
+def _is_batched(estimator: "BaseEstimator") -> bool:
+    # estimators the batched least-squares solver is equivalent to
+    return type(estimator) is LinearRegression and not estimator.positive
+
+
+class GroupedEstimator:
+    """Fits and predicts with one estimator per group of rows."""
+
+    def __init__(
+        self,
+        estimator: "BaseEstimator",
+        group_by: Sequence[str],
+        n_jobs: int = None,
+    ) -> None:
+        """Instantiates the grouped estimator.
+
+        Args:
+            estimator (BaseEstimator): Unfitted estimator; groups get clones.
+            group_by (Sequence[str]): Columns whose values identify a group.
+                They are not features of the groups' estimators.
+            n_jobs (int): Cores of the process pool of non-batched
+                estimators. Defaults to all cores.
+        """
+        self.estimator = estimator
+        self.group_by = [str(column) for column in group_by]
+        self.n_jobs = n_jobs
+
+    def _keys(self, X: "pd.DataFrame") -> "pd.Index":
+        if len(self.group_by) == 1:
+            return pd.Index(X[self.group_by[0]])
+        return pd.MultiIndex.from_frame(X[self.group_by])
+
+    def _features(self, X: "pd.DataFrame") -> "pd.DataFrame":
+        return X.drop(columns=self.group_by)
+
+    def fit(self, X: "pd.DataFrame", y: "np.ndarray") -> "GroupedEstimator":
+        """Fits one estimator per group, and the fallback estimator.
+
+        Args:
+            X (pd.DataFrame): Features and group columns.
+            y (np.ndarray): Targets.
+        Returns:
+            GroupedEstimator: The fitted estimator.
+        """
+        codes, self.groups_ = self._keys(X).factorize()
+        features = self._features(X)
+        self.feature_names_in_ = features.columns.to_numpy()
+        y = np.asarray(y)
+
+        if _is_batched(self.estimator):
+            values = features.to_numpy(dtype=np.float64)
+            with tracing.span(
+                "fit groups", cat="fit", groups=len(self.groups_)
+            ):
+                coef, intercept = linear.grouped_least_squares(
+                    values,
+                    y,
+                    codes,
+                    len(self.groups_),
+                    fit_intercept=self.estimator.fit_intercept,
+                )
+            with tracing.span("fit fallback", cat="fit"):
+                fallback_coef, fallback_intercept = (
+                    linear.grouped_least_squares(
+                        values,
+                        y,
+                        np.zeros(len(y), dtype=np.int64),
+                        1,
+                        fit_intercept=self.estimator.fit_intercept,
+                    )
+                )
+            # the fallback is the last row
+            self.coefs_ = np.concatenate([coef, fallback_coef])
+            self.intercepts_ = np.concatenate([intercept, fallback_intercept])
+            self.estimators_ = None
+            self.failed_groups_ = []
+        else:
+            self._fit_estimators(features, y, codes)
+        return self
+
+    def _fit_estimators(
+        self, features: "pd.DataFrame", y: "np.ndarray", codes: "np.ndarray"
+    ) -> None:
+        # partition the rows once: each group is a contiguous slice of the
+        # rows sorted by group
+        order = np.argsort(codes, kind="stable")
+        order = order[codes[order] >= 0]
+        bounds = np.searchsorted(
+            codes[order], np.arange(len(self.groups_) + 1)
+        )
+
+        budget = resources.CoreBudget(self.n_jobs)
+        workers = budget.workers(tasks=len(self.groups_))
+        estimator = self.estimator
+        if "n_jobs" in estimator.get_params():
+            estimator = clone(estimator).set_params(
+                n_jobs=budget.threads(workers)
+            )
+        # batches of consecutive groups with similar numbers of rows
+        cuts = np.searchsorted(
+            bounds, np.linspace(0, len(order), workers + 1)[1:-1]
+        )
+        batches = np.split(np.arange(len(self.groups_)), cuts)
+
+        jobs = []
+        for batch in batches:
+            if len(batch) == 0:
+                continue
+            start, stop = bounds[batch[0]], bounds[batch[-1] + 1]
+            jobs.append(
+                (
+                    estimator,
+                    features.iloc[order[start:stop]],
+                    y[order[start:stop]],
+                    [
+                        (
+                            group,
+                            bounds[group] - start,
+                            bounds[group + 1] - start,
+                        )
+                        for group in batch
+                    ],
+                )
+            )
+
+        if workers == 1:
+            with tracing.span("fit fallback", cat="fit"):
+                fallback = clone(self.estimator).fit(features, y)
+            results = [_fit_batch(*job) for job in jobs]
+        else:
+            initializer, initargs = resources.worker_initializer(
+                budget.threads(workers)
+            )
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=initializer,
+                initargs=initargs,
+            ) as executor:
+                futures = [executor.submit(_fit_batch, *job) for job in jobs]
+                # fit the fallback while the workers fit the groups
+                with tracing.span("fit fallback", cat="fit"):
+                    fallback = clone(self.estimator).fit(features, y)
+                results = [future.result() for future in futures]
+
+        # the fallback is the last estimator
+        self.estimators_ = [None] * len(self.groups_) + [fallback]
+        self.failed_groups_ = []
+        for group, estimator in (item for batch in results for item in batch):
+            if estimator is None:
+                self.failed_groups_.append(self.groups_[group])
+                estimator = fallback
+            self.estimators_[group] = estimator
+
+    def _group_indices(self, X: "pd.DataFrame") -> "np.ndarray":
+        # index of each row's model; unknown groups get -1, the fallback
+        return self.groups_.get_indexer(self._keys(X))
+
+    def predict(self, X: "pd.DataFrame") -> "np.ndarray":
+        """Predicts each row with the estimator of its group.
+
+        Args:
+            X (pd.DataFrame): Features and group columns.
+        Returns:
+            np.ndarray: One prediction per row.
+        """
+        indices = self._group_indices(X)
+        features = self._features(X)
+        if self.estimators_ is None:
+            return (
+                np.einsum(
+                    "ij,ij->i",
+                    features.to_numpy(dtype=np.float64),
+                    self.coefs_[indices],
+                )
+                + self.intercepts_[indices]
+            )
+
+        y_pred = None
+        for index in np.unique(indices):
+            rows = np.flatnonzero(indices == index)
+            values = self.estimators_[index].predict(features.iloc[rows])
+            if y_pred is None:
+                y_pred = np.empty(len(X), dtype=values.dtype)
+            y_pred[rows] = values
+        return y_pred if y_pred is not None else np.empty(0)
+
+    def score_groups(
+        self, X: "pd.DataFrame", y: "np.ndarray"
+    ) -> "pd.DataFrame":
+        """Scores of the groups' estimators on their rows.
+
+        Scores are the estimator's own `score`: accuracy for classifiers and
+        R^2 for regressors.
+
+        Args:
+            X (pd.DataFrame): Features and group columns.
+            y (np.ndarray): Targets.
+        Returns:
+            pd.DataFrame: The number of rows and the score of each group with
+                rows in `X`, indexed by the group keys.
+        """
+        y = np.asarray(y)
+        y_pred = self.predict(X)
+        codes, keys = self._keys(X).factorize()
+        rows = np.bincount(codes[codes >= 0], minlength=len(keys))
+        present = codes >= 0
+        codes, y, y_pred = codes[present], y[present], y_pred[present]
+
+        if is_classifier(self.estimator):
+            score = np.bincount(
+                codes, weights=y == y_pred, minlength=len(keys)
+            ) / np.maximum(rows, 1)
+        else:
+            y_mean = np.bincount(codes, weights=y, minlength=len(keys))
+            y_mean /= np.maximum(rows, 1)
+            residual = np.bincount(
+                codes, weights=(y - y_pred) ** 2, minlength=len(keys)
+            )
+            total = np.bincount(
+                codes, weights=(y - y_mean[codes]) ** 2, minlength=len(keys)
+            )
+            with np.errstate(divide="ignore", invalid="ignore"):
+                # undefined for groups with constant targets
+                score = np.where(total > 0, 1 - residual / total, np.nan)
+        keys.names = self.group_by
+        return pd.DataFrame({"rows": rows, "score": score}, index=keys)
+
+
+def _fit_batch(
+    estimator: "BaseEstimator",
+    features: "pd.DataFrame",
+    y: "np.ndarray",
+    groups: List[Tuple[int, int, int]],
+) -> List[Tuple[int, "BaseEstimator"]]:
+    # fits the groups of a batch, given as (group, start row, stop row);
+    # groups that fail to fit get None
+    fitted = []
+    with tracing.span("fit groups", cat="fit", groups=len(groups)):
+        for group, start, stop in groups:
+            try:
+                fitted.append(
+                    (
+                        group,
+                        clone(estimator).fit(
+                            features.iloc[start:stop], y[start:stop]
+                        ),
+                    )
+                )
+            except ValueError:
+                fitted.append((group, None))
+    return fitted
@@ -0,0 +1,155 @@
+"""Sparse hashed features of high-cardinality columns.
+
+String or categorical columns with many distinct values (e.g. car names, user
+or product ids) can't be one-hot encoded into dense data frames. The hashing
+trick maps every `column=value` pair to one of a fixed number of feature
+columns instead, so the width of the design matrix doesn't depend on the
+number of categories, unseen categories need no vocabulary and nothing has to
+be fitted. Collisions get opposite signs half of the time, so they cancel out
+on average rather than adding up.
+
+Every distinct value is hashed once, with pandas' vectorised (and
+deterministic) hashing, into a scipy.sparse CSR matrix with one signed entry
+per value (or per token of the value) of each hashed column. `design_matrix`
+appends the hashed columns to the dense numeric features, which
+scikit-learn's linear models fit and predict on directly.
+
+Usage example:
+    hasher = FeatureHasher(["name"], n_features=1024)
+    X = hasher.design_matrix(df[["weight", "horsepower", "name"]])
+"""
+
+import json
+
+from typing import BinaryIO, Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+from scipy import sparse
+
+from ml_pipeline.utils import atomic_path
+
+HASHER_VERSION = 1
+
+
+class FeatureHasher:
+    """Hashes columns into a fixed number of sparse feature columns."""
+
+    def __init__(
+        self,
+        columns: Iterable[str],
+        n_features: int = 1024,
+        tokenize: bool = False,
+    ) -> None:
+        """Instantiates the hasher.
+
+        Args:
+            columns (Iterable[str]): Columns to hash.
+            n_features (int): Number of hashed feature columns.
+            tokenize (bool): Hash the whitespace-separated tokens of the
+                values (e.g. the make and model words of car names) instead
+                of the whole values, so that values sharing tokens share
+                features.
+
+        Raises:
+            ValueError: No columns, or fewer than one feature column.
+        """
+        self.columns = [str(column) for column in columns]
+        self.n_features = int(n_features)
+        self.tokenize = bool(tokenize)
+        if not self.columns:
+            raise ValueError("No columns to hash")
+        if self.n_features < 1:
+            raise ValueError("The number of hashed features must be positive")
+
+    def transform(self, df: "pd.DataFrame") -> "sparse.csr_matrix":
+        """Hashes the columns of a data frame.
+
+        Missing values get no entries.
+
+        Args:
+            df (pd.DataFrame): Data frame containing the hashed columns.
+        Returns:
+            sparse.csr_matrix: Matrix of shape (len(df), n_features).
+        Raises:
+            KeyError: A hashed column is missing.
+        """
+        hashed = sparse.csr_matrix((len(df), self.n_features))
+        for column in self.columns:
+            codes, uniques = pd.factorize(df[column])
+            # hash the distinct values only, then pick their rows; missing
+            # values (code -1) pick the appended empty row
+            hashed = hashed + self._hash_values(column, uniques)[codes]
+        return hashed
+
+    def _hash_values(
+        self, column: str, values: Iterable
+    ) -> "sparse.csr_matrix":
+        keys, owners = [], []
+        for i, value in enumerate(values):
+            for token in str(value).split() if self.tokenize else [value]:
+                # prefixing the column name keeps equal values of different
+                # columns apart
+                keys.append(f"{column}={token}")
+                owners.append(i)
+        hashes = pd.util.hash_array(np.array(keys, dtype=object))
+        indices = (hashes % np.uint64(self.n_features)).astype(np.int64)
+        signs = np.where(hashes >> np.uint64(63), -1.0, 1.0)
+        # duplicate entries (collisions within a value) are summed
+        return sparse.csr_matrix(
+            (signs, (np.array(owners, dtype=np.int64), indices)),
+            shape=(len(values) + 1, self.n_features),
+        )
+
+    def design_matrix(self, X: "pd.DataFrame") -> "sparse.csr_matrix":
+        """Sparse design matrix of dense and hashed features.
+
+        Args:
+            X (pd.DataFrame): Features. Columns that are not hashed must be
+                numeric.
+        Returns:
+            sparse.csr_matrix: The other columns, in order, followed by the
+                `n_features` hashed columns.
+        """
+        dense = [column for column in X.columns if column not in self.columns]
+        return sparse.hstack(
+            [
+                sparse.csr_matrix(X[dense].to_numpy(dtype=np.float64)),
+                self.transform(X),
+            ],
+            format="csr",
+        )
+
+    def to_dict(self) -> Dict:
+        """Serialisable representation of the hasher."""
+        return {
+            "version": HASHER_VERSION,
+            "columns": self.columns,
+            "n_features": self.n_features,
+            "tokenize": self.tokenize,
+        }
+
+    def write(self, f: BinaryIO) -> None:
+        """Writes the hasher's parameters as JSON to a binary file object."""
+        f.write(json.dumps(self.to_dict(), indent=2).encode())
+
+    def save(self, path: str) -> None:
+        """Saves the hasher's parameters to a JSON file."""
+        with atomic_path(path) as tmp_path, open(tmp_path, "wb") as f:
+            self.write(f)
+
+    @classmethod
+    def load(cls, path: str) -> "FeatureHasher":
+        """Loads a hasher saved with `save`.
+
+        Raises:
+            ValueError: Unsupported hasher version.
+        """
+        with open(path, "r") as f:
+            items = json.load(f)
+        if items.get("version") != HASHER_VERSION:
+            raise ValueError(
+                f"Unsupported feature hasher version: {items.get('version')}"
+            )
+        return cls(items["columns"], items["n_features"], items["tokenize"])
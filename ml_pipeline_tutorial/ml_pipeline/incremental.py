@@ -0,0 +1,197 @@
+"""Incremental loading of append-only data files.
+
+This module remembers, for each source file of a dataset, the byte offset and
+row count it has consumed, and caches the rows parsed so far together with
+mergeable statistics of the dataset's numeric columns. A refresh only parses
+the bytes appended since the last load and merges their statistics, so the
+cost of a daily refresh scales with the size of the delta rather than with
+the full history.
+
+If a file was rewritten rather than appended to (it shrank, or the bytes
+around the consumed offset changed), its rows are parsed again from scratch.
+"""
+
+import hashlib
+import io
+import json
+import os
+import pathlib
+import tempfile
+
+from typing import TYPE_CHECKING, Dict
+
+import pandas as pd
+
+from ml_pipeline.statistics import RunningStats
+
+if TYPE_CHECKING:
+    from ml_pipeline.dataset import Dataset
+
+# bytes hashed at the start of a file and before the consumed offset to check
+# that the consumed part of the file is unchanged
+FINGERPRINT_SIZE = 4096
+
+# cached row parts are compacted into one once there are more than this many
+MAX_PARTS = 32
+
+
+class IncrementalCache:
+    """Cache of the rows and statistics consumed from a dataset's files.
+
+    Usage example:
+        cache = IncrementalCache("cache")
+        df, statistics = cache.refresh(dataset)
+    """
+
+    def __init__(self, root: str) -> None:
+        """Instantiates the cache.
+
+        Args:
+            root (str): Path to the cache directory. Created if missing.
+        """
+        self.root = pathlib.Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _directory(self, dataset: "Dataset") -> "pathlib.Path":
+        # one directory per dataset and data path
+        key = hashlib.sha256(
+            os.path.abspath(dataset.data_path).encode()
+        ).hexdigest()[:16]
+        directory = self.root / f"{dataset.name}-{key}"
+        directory.mkdir(exist_ok=True)
+        return directory
+
+    def refresh(self, dataset: "Dataset") -> tuple:
+        """Loads a dataset, parsing only data appended since the last load.
+
+        Args:
+            dataset (Dataset): Dataset with `data_path`, `columns` and
+                `data_files()`. If it has `numeric_columns`, statistics of
+                these columns are maintained.
+        Returns:
+            tuple: The data frame and the RunningStats of the numeric columns
+                (or None).
+        """
+        directory = self._directory(dataset)
+        state_path = directory / "state.json"
+        state = {"files": {}, "parts": [], "statistics": None}
+        if state_path.exists():
+            with open(state_path, "r") as f:
+                state = json.load(f)
+
+        numeric_columns = list(getattr(dataset, "numeric_columns", []))
+        statistics = None
+        if state["statistics"] is not None:
+            statistics = RunningStats.from_dict(state["statistics"])
+        elif numeric_columns:
+            statistics = RunningStats(numeric_columns)
+
+        files = [os.path.abspath(path) for path in dataset.data_files()]
+        rewritten = set(state["files"]) - set(files)
+        for path in files:
+            if path in state["files"] and not _is_appended(
+                path, state["files"][path]
+            ):
+                rewritten.add(path)
+
+        if rewritten:
+            # start over; rows of rewritten files are interleaved with the
+            # rows of other files in the cached parts
+            for part in state["parts"]:
+                (directory / part).unlink(missing_ok=True)
+            state = {"files": {}, "parts": [], "statistics": None}
+            if numeric_columns:
+                statistics = RunningStats(numeric_columns)
+
+        # parse the appended bytes of each file
+        deltas = []
+        for path in files:
+            file_state = state["files"].get(path, {"offset": 0, "rows": 0})
+            with open(path, "rb") as f:
+                f.seek(file_state["offset"])
+                data = f.read()
+            if not data:
+                continue
+
+            delta = pd.read_csv(
+                io.BytesIO(data), names=dataset.columns, dtype=dataset.dtypes
+            )
+            deltas.append(delta)
+            state["files"][path] = {
+                "offset": file_state["offset"] + len(data),
+                "rows": file_state["rows"] + len(delta),
+                "ends_with_newline": data.endswith(b"\n"),
+                **_fingerprint(path, file_state["offset"] + len(data)),
+            }
+
+        if deltas:
+            delta = pd.concat(deltas, ignore_index=True)
+            if statistics is not None:
+                statistics.update(
+                    delta[statistics.columns].to_numpy(dtype="float64")
+                )
+            state["parts"].append(self._write_part(directory, delta))
+            state["statistics"] = (
+                statistics.to_dict() if statistics is not None else None
+            )
+
+        parts = [pd.read_pickle(directory / part) for part in state["parts"]]
+        if not parts:
+            df = pd.DataFrame(columns=dataset.columns)
+        elif len(parts) == 1:
+            df = parts[0]
+        else:
+            df = pd.concat(parts, ignore_index=True)
+
+        if len(state["parts"]) > MAX_PARTS:
+            old_parts = state["parts"]
+            state["parts"] = [self._write_part(directory, df)]
+            for part in old_parts:
+                (directory / part).unlink(missing_ok=True)
+
+        if deltas or rewritten:
+            _write_json(state_path, state)
+
+        return df, statistics
+
+    def _write_part(
+        self, directory: "pathlib.Path", df: "pd.DataFrame"
+    ) -> str:
+        fd, path = tempfile.mkstemp(
+            dir=directory, prefix="part-", suffix=".pkl"
+        )
+        os.close(fd)
+        df.to_pickle(path)
+        return os.path.basename(path)
+
+
+def _fingerprint(path: str, offset: int) -> Dict[str, str]:
+    with open(path, "rb") as f:
+        head = f.read(min(offset, FINGERPRINT_SIZE))
+        f.seek(max(offset - FINGERPRINT_SIZE, 0))
+        tail = f.read(min(offset, FINGERPRINT_SIZE))
+    return {
+        "head": hashlib.sha256(head).hexdigest(),
+        "tail": hashlib.sha256(tail).hexdigest(),
+    }
+
+
+def _is_appended(path: str, file_state: Dict) -> bool:
+    size = os.path.getsize(path)
+    if size < file_state["offset"]:
+        return False
+    if size > file_state["offset"] and not file_state["ends_with_newline"]:
+        # the last consumed row may have been continued
+        return False
+    fingerprint = _fingerprint(path, file_state["offset"])
+    return (
+        fingerprint["head"] == file_state["head"]
+        and fingerprint["tail"] == file_state["tail"]
+    )
+
+
+def _write_json(path: "pathlib.Path", items: Dict) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(items, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,344 @@
+"""Vectorised least-squares solvers.
+
+Linear regressions of many groups (see ml_pipeline.grouped) are solved
+together rather than one estimator at a time: per-group sums, cross-products
+and Gram matrices are accumulated with a sparse group-indicator matrix, in
+blocks of rows, and all groups' normal equations are solved by one batched
+pseudo-inverse. Features are centred on their group means first, as
+scikit-learn's LinearRegression does, which keeps the Gram matrices
+well-conditioned; groups with fewer rows than features get the minimum-norm
+solution.
+
+Linear regressions of data too large to hold twice in memory are solved from
+their sufficient statistics instead: NormalEquations accumulates the means and
+the centred cross-products X'X and X'y of chunks of rows, and merges those of
+other chunks exactly (the matrix form of Chan et al.'s parallel algorithm, see
+ml_pipeline.statistics). StreamingLinearRegression reads its training rows
+once, chunk by chunk, in a pool of threads, and solves the small (features,
+features) system at the end; the fitted estimator has the `coef_` and
+`intercept_` of scikit-learn's LinearRegression (or Ridge, with `alpha`).
+
+Usage example:
+    codes, groups = pd.factorize(df["origin"])
+    coef, intercept = grouped_least_squares(X, y, codes, len(groups))
+    y_pred = np.einsum("ij,ij->i", X, coef[codes]) + intercept[codes]
+
+    model = StreamingLinearRegression(chunk_size=100000).fit(df[features], y)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Tuple, Union
+
+import numpy as np
+
+from scipy import sparse
+from sklearn.base import BaseEstimator, RegressorMixin
+
+from ml_pipeline import resources
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# rows whose outer products are summed at a time; bounds the temporary
+# (rows, features, features) array
+BLOCK_SIZE = 16384
+
+
+def _indicator(codes: "np.ndarray", n_groups: int) -> "sparse.csr_matrix":
+    # (groups, rows) matrix summing the rows of each group; rows without a
+    # group (code -1) are left out
+    rows = np.flatnonzero(codes >= 0)
+    return sparse.csr_matrix(
+        (np.ones(len(rows)), (codes[rows], rows)),
+        shape=(n_groups, len(codes)),
+    )
+
+
+def grouped_least_squares(
+    X: "np.ndarray",
+    y: "np.ndarray",
+    codes: "np.ndarray",
+    n_groups: int,
+    fit_intercept: bool = True,
+    block_size: int = BLOCK_SIZE,
+) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Solves the ordinary least-squares problems of many groups at once.
+
+    Args:
+        X (np.ndarray): Features, of shape (rows, features).
+        y (np.ndarray): Targets, of shape (rows,).
+        codes (np.ndarray): Group of each row, from 0 to `n_groups - 1`, or
+            -1 for rows that belong to no group.
+        n_groups (int): Number of groups.
+        fit_intercept (bool): Fit an intercept per group.
+        block_size (int): Rows whose outer products are summed at a time.
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The coefficients, of shape (groups,
+            features), and the intercepts, of shape (groups,). Groups
+            without rows get zeros.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    codes = np.asarray(codes, dtype=np.int64)
+    n_features = X.shape[1]
+    indicator = _indicator(codes, n_groups)
+
+    x_mean = np.zeros((n_groups, n_features))
+    y_mean = np.zeros(n_groups)
+    if fit_intercept:
+        counts = np.maximum(np.asarray(indicator.sum(axis=1)).ravel(), 1)
+        x_mean = (indicator @ X) / counts[:, None]
+        y_mean = (indicator @ y) / counts
+
+    gram = np.zeros((n_groups, n_features * n_features))
+    moments = np.zeros((n_groups, n_features))
+    for start in range(0, len(X), block_size):
+        stop = min(start + block_size, len(X))
+        block_codes = np.maximum(codes[start:stop], 0)
+        centred = X[start:stop] - x_mean[block_codes]
+        residual = y[start:stop] - y_mean[block_codes]
+        block = indicator[:, start:stop]
+        gram += block @ np.einsum("ni,nj->nij", centred, centred).reshape(
+            stop - start, -1
+        )
+        moments += block @ (centred * residual[:, None])
+
+    gram = gram.reshape(n_groups, n_features, n_features)
+    coef = np.einsum(
+        "gij,gj->gi", np.linalg.pinv(gram, hermitian=True), moments
+    )
+    intercept = y_mean - np.einsum("gi,gi->g", x_mean, coef)
+    return coef, intercept
+
+
+class NormalEquations:
+    """Mergeable sufficient statistics of a linear least-squares problem.
+
+    Usage example:
+        equations = NormalEquations(X.shape[1]).update(X[:1000], y[:1000])
+        other = NormalEquations(X.shape[1]).update(X[1000:], y[1000:])
+        coef, intercept = equations.merge(other).solve()
+    """
+
+    def __init__(self, n_features: int) -> None:
+        """Instantiates the statistics of no rows.
+
+        Args:
+            n_features (int): Number of features.
+        """
+        self.n_features = n_features
+        self.count = 0
+        self.x_mean = np.zeros(n_features)
+        self.y_mean = 0.0
+        # cross-products of the features and targets centred on their means
+        self.xx = np.zeros((n_features, n_features))
+        self.xy = np.zeros(n_features)
+
+    def update(self, X: "np.ndarray", y: "np.ndarray") -> "NormalEquations":
+        """Adds rows.
+
+        Args:
+            X (np.ndarray): Features, of shape (rows, features).
+            y (np.ndarray): Targets, of shape (rows,).
+        Returns:
+            NormalEquations: self.
+        """
+        X = np.asarray(X, dtype=np.float64).reshape(-1, self.n_features)
+        y = np.asarray(y, dtype=np.float64).ravel()
+        if len(X) == 0:
+            return self
+
+        batch = NormalEquations(self.n_features)
+        batch.count = len(X)
+        batch.x_mean = X.mean(axis=0)
+        batch.y_mean = y.mean()
+        centred = X - batch.x_mean
+        batch.xx = centred.T @ centred
+        batch.xy = centred.T @ (y - batch.y_mean)
+        return self.merge(batch)
+
+    def merge(self, other: "NormalEquations") -> "NormalEquations":
+        """Merges the statistics of other rows into these.
+
+        Args:
+            other (NormalEquations): Statistics of the same features.
+        Returns:
+            NormalEquations: self.
+        Raises:
+            ValueError: The statistics are of different numbers of features.
+        """
+        if other.n_features != self.n_features:
+            raise ValueError(
+                "Cannot merge statistics of different numbers of features"
+            )
+        if other.count == 0:
+            return self
+
+        count = self.count + other.count
+        weight = other.count / count
+        dx = other.x_mean - self.x_mean
+        dy = other.y_mean - self.y_mean
+        self.xx = self.xx + other.xx + np.outer(dx, dx) * self.count * weight
+        self.xy = self.xy + other.xy + dx * dy * self.count * weight
+        self.x_mean = self.x_mean + dx * weight
+        self.y_mean = self.y_mean + dy * weight
+        self.count = count
+        return self
+
+    def solve(
+        self, alpha: float = 0.0, fit_intercept: bool = True
+    ) -> Tuple["np.ndarray", float]:
+        """Solves the normal equations.
+
+        Args:
+            alpha (float): L2 penalty of the coefficients (not of the
+                intercept), as in scikit-learn's Ridge.
+            fit_intercept (bool): Fit an intercept.
+        Returns:
+            Tuple[np.ndarray, float]: The coefficients and the intercept.
+                Rank-deficient problems get the minimum-norm solution.
+        Raises:
+            ValueError: No rows were added.
+        """
+        if self.count == 0:
+            raise ValueError("Cannot solve the normal equations of no rows")
+
+        gram, moments = self.xx, self.xy
+        if not fit_intercept:
+            # uncentre the cross-products
+            gram = gram + self.count * np.outer(self.x_mean, self.x_mean)
+            moments = moments + self.count * self.x_mean * self.y_mean
+        if alpha:
+            gram = gram + alpha * np.eye(self.n_features)
+        coef = np.linalg.lstsq(gram, moments, rcond=None)[0]
+        intercept = self.y_mean - self.x_mean @ coef if fit_intercept else 0.0
+        return coef, float(intercept)
+
+
+class StreamingLinearRegression(RegressorMixin, BaseEstimator):
+    """Least-squares linear regression solved in one pass over the rows."""
+
+    def __init__(
+        self,
+        fit_intercept: bool = True,
+        alpha: float = 0.0,
+        chunk_size: int = BLOCK_SIZE,
+        n_jobs: int = None,
+    ) -> None:
+        """Instantiates the estimator.
+
+        Args:
+            fit_intercept (bool): Fit an intercept.
+            alpha (float): L2 penalty of the coefficients; 0 is ordinary
+                least squares, as LinearRegression, otherwise as Ridge.
+            chunk_size (int): Rows read and accumulated at a time, which
+                bounds the memory used besides the data itself.
+            n_jobs (int): Threads accumulating chunks concurrently. Defaults
+                to all cores.
+        """
+        self.fit_intercept = fit_intercept
+        self.alpha = alpha
+        self.chunk_size = chunk_size
+        self.n_jobs = n_jobs
+
+    def fit(
+        self,
+        X: "Union[pd.DataFrame, np.ndarray, sparse.spmatrix]",
+        y: "np.ndarray",
+        rows: "np.ndarray" = None,
+    ) -> "StreamingLinearRegression":
+        """Fits the estimator.
+
+        Args:
+            X (Union[pd.DataFrame, np.ndarray, sparse.spmatrix]): Features,
+                e.g. a data frame spilled to memory-mapped files (see
+                ml_pipeline.memory); only one chunk of it is copied at a time.
+            y (np.ndarray): Targets, one per row of `X`, or one per row of
+                `rows`.
+            rows (np.ndarray): Positions of the rows of `X` to fit on, e.g.
+                of a training split, so that the split need not be copied.
+                Defaults to all rows.
+        Returns:
+            StreamingLinearRegression: The fitted estimator.
+        """
+        if hasattr(X, "columns"):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        if sparse.issparse(X):
+            X = X.tocsr()
+        self.n_features_in_ = X.shape[1]
+        y = np.asarray(y, dtype=np.float64).ravel()
+        if rows is not None:
+            # read the rows in storage order; the sums don't depend on it
+            order = np.argsort(rows, kind="stable")
+            rows, y = np.asarray(rows)[order], y[order]
+
+        n_rows = len(y)
+        starts = list(range(0, n_rows, self.chunk_size))
+        budget = resources.CoreBudget(self.n_jobs)
+        workers = budget.workers(tasks=len(starts))
+        # every worker accumulates a contiguous range of chunks
+        ranges = np.array_split(np.array(starts, dtype=np.int64), workers)
+
+        def accumulate(chunk_starts: "np.ndarray") -> "NormalEquations":
+            equations = NormalEquations(self.n_features_in_)
+            for start in chunk_starts:
+                stop = min(start + self.chunk_size, n_rows)
+                positions = (
+                    slice(start, stop) if rows is None else rows[start:stop]
+                )
+                equations.update(_chunk(X, positions), y[start:stop])
+            return equations
+
+        if workers == 1:
+            results = [accumulate(chunk_starts) for chunk_starts in ranges]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(accumulate, ranges))
+
+        self.statistics_ = NormalEquations(self.n_features_in_)
+        for equations in results:
+            self.statistics_.merge(equations)
+        self._solve()
+        return self
+
+    def partial_fit(
+        self,
+        X: "Union[pd.DataFrame, np.ndarray, sparse.spmatrix]",
+        y: "np.ndarray",
+    ) -> "StreamingLinearRegression":
+        """Adds rows to the fitted estimator, e.g. new data or the next chunk.
+
+        The coefficients are those of a fit on all rows added so far.
+        """
+        if not hasattr(self, "statistics_"):
+            return self.fit(X, y)
+        if sparse.issparse(X):
+            X = X.tocsr()
+        self.statistics_.update(_chunk(X, slice(None)), y)
+        self._solve()
+        return self
+
+    def _solve(self) -> None:
+        self.coef_, self.intercept_ = self.statistics_.solve(
+            self.alpha, self.fit_intercept
+        )
+
+    def predict(
+        self, X: "Union[pd.DataFrame, np.ndarray, sparse.spmatrix]"
+    ) -> "np.ndarray":
+        """Predicts the targets of rows."""
+        if sparse.issparse(X):
+            return np.asarray(X @ self.coef_).ravel() + self.intercept_
+        return _chunk(X, slice(None)) @ self.coef_ + self.intercept_
+
+
+def _chunk(
+    X: "Union[pd.DataFrame, np.ndarray, sparse.spmatrix]",
+    positions: "Union[slice, np.ndarray]",
+) -> "np.ndarray":
+    # dense float64 copy of some rows of X; sparse X is in CSR format
+    if hasattr(X, "iloc"):
+        return X.iloc[positions].to_numpy(dtype=np.float64)
+    if sparse.issparse(X):
+        return X[positions].toarray()
+    return np.asarray(X[positions], dtype=np.float64)
@@ -0,0 +1,209 @@
+"""Memory-budgeted execution.
+
+This module tracks the size of the data held between pipeline tasks and spills
+large data frames to memory-mapped files when a memory budget would be
+exceeded. Spilled columns are paged in by the operating system on access, and
+can be evicted again under memory pressure, so a run only needs the working set
+of the current task in RAM.
+"""
+
+import mmap
+import os
+import re
+import shutil
+import tempfile
+
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import logging
+
+    import pandas as pd
+
+_UNITS = {"": 1, "k": 1 << 10, "m": 1 << 20, "g": 1 << 30, "t": 1 << 40}
+
+
+def parse_size(size: str) -> int:
+    """Parses a human-readable size such as "512M" or "2GB".
+
+    Args:
+        size (str): Size in bytes, optionally with a K, M, G or T suffix.
+    Returns:
+        int: Size in bytes.
+    Raises:
+        ValueError: Invalid size.
+    """
+    match = re.fullmatch(
+        r"\s*(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?\s*", str(size), re.IGNORECASE
+    )
+    if match is None:
+        raise ValueError(f"Invalid size: '{size}'")
+    return int(float(match.group(1)) * _UNITS[match.group(2).lower()])
+
+
+def nbytes(value) -> int:
+    """In-memory size of a data frame, series, index or array.
+
+    Columns that are already memory-mapped count as zero, since the operating
+    system can drop their pages at any time.
+    """
+    if value is None:
+        return 0
+    if hasattr(value, "columns"):
+        return sum(nbytes(value[column]) for column in value.columns)
+
+    array = value.to_numpy() if hasattr(value, "to_numpy") else value
+    if _is_mapped(array):
+        return 0
+    if hasattr(value, "memory_usage"):
+        try:
+            return int(value.memory_usage(index=False, deep=True))
+        except TypeError:
+            return int(value.memory_usage(deep=True))
+    return int(np.asarray(array).nbytes)
+
+
+def _is_mapped(array) -> bool:
+    # whether the array is memory-mapped
+    while array is not None:
+        if isinstance(array, (mmap.mmap, np.memmap)):
+            return True
+        array = getattr(array, "base", None)
+    return False
+
+
+def _mapped_file(array) -> Optional[str]:
+    # absolute path of the file the array is memory-mapped from, if any
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return os.path.abspath(array.filename) if array.filename else None
+        array = getattr(array, "base", None)
+    return None
+
+
+class MemoryBudget:
+    """Keeps the data held between tasks within a memory budget.
+
+    Usage example:
+        budget = MemoryBudget(parse_size("2G"), logger=logger)
+        df = budget.fit("feature_engineer_data", df, other_bytes=0)
+        ...
+        budget.cleanup()
+    """
+
+    def __init__(
+        self,
+        budget: int,
+        spill_dir: str = None,
+        logger: "logging.Logger" = None,
+    ) -> None:
+        """Instantiates the memory budget.
+
+        Args:
+            budget (int): Budget in bytes.
+            spill_dir (str): Directory for spilled data. Defaults to a new
+                temporary directory, removed by `cleanup`.
+            logger (logging.Logger): Logger. Optional.
+        """
+        self.budget = budget
+        self.logger = logger
+        self._own_spill_dir = spill_dir is None
+        self.spill_dir = spill_dir or tempfile.mkdtemp(prefix="ml_pipeline_")
+        # spill directories of each data frame
+        self.spilled: Dict[str, List[str]] = {}
+
+    def fit(
+        self, name: str, df: "pd.DataFrame", other_bytes: int = 0
+    ) -> "pd.DataFrame":
+        """Spills a data frame if holding it would exceed the budget.
+
+        Args:
+            name (str): Name of the data, used for the spill directory.
+            df (pd.DataFrame): Data frame held until the next task.
+            other_bytes (int): Size of the other data held until the next
+                task.
+        Returns:
+            pd.DataFrame: The data frame, or an equivalent one whose numeric
+                columns are memory-mapped.
+        """
+        size = nbytes(df)
+        if size + other_bytes <= self.budget:
+            return df
+
+        if self.logger:
+            self.logger.info(
+                f"Holding {size + other_bytes} bytes exceeds the memory "
+                f"budget of {self.budget} bytes; spilling '{name}'."
+            )
+        return self.spill(name, df)
+
+    def spill(self, name: str, df: "pd.DataFrame") -> "pd.DataFrame":
+        """Moves the numeric columns of a data frame to memory-mapped files.
+
+        Columns that are already memory-mapped, e.g. by an earlier spill of
+        the data, are kept as they are, so spilling only writes the columns
+        added since. The earlier spill files of columns no longer in the data
+        frame are deleted.
+
+        Args:
+            name (str): Name of the data, used for the spill directory.
+            df (pd.DataFrame): Data frame to spill.
+        Returns:
+            pd.DataFrame: Data frame with the same index and columns, whose
+                numeric columns are memory-mapped.
+        """
+        import pandas as pd
+
+        directory = None
+        columns = {}
+        for i, column in enumerate(df.columns):
+            values = df[column].to_numpy()
+            if values.dtype.kind in "biuf" and not _is_mapped(values):
+                if directory is None:
+                    directory = tempfile.mkdtemp(
+                        prefix=f"{name}_", dir=self.spill_dir
+                    )
+                mapped = np.lib.format.open_memmap(
+                    os.path.join(directory, f"{i}.npy"),
+                    mode="w+",
+                    dtype=values.dtype,
+                    shape=values.shape,
+                )
+                mapped[:] = values
+                mapped.flush()
+                values = mapped
+            columns[column] = values
+
+        # copy=False keeps each memory-mapped column as its own block
+        df = pd.DataFrame(columns, index=df.index, copy=False)
+
+        # delete the earlier spill files of the columns dropped since
+        mapped_files = {_mapped_file(values) for values in columns.values()}
+        directories = []
+        for previous in self.spilled.pop(name, []):
+            for entry in os.scandir(previous):
+                if os.path.abspath(entry.path) not in mapped_files:
+                    os.remove(entry.path)
+            if os.listdir(previous):
+                directories.append(previous)
+            else:
+                os.rmdir(previous)
+        if directory is not None:
+            directories.append(directory)
+        if directories:
+            self.spilled[name] = directories
+        return df
+
+    def release(self, name: str) -> None:
+        """Deletes the spill files of a data frame that is no longer needed."""
+        for directory in self.spilled.pop(name, []):
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def cleanup(self) -> None:
+        """Deletes all spill files."""
+        for name in list(self.spilled):
+            self.release(name)
+        if self._own_spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
@@ -0,0 +1,216 @@
+"""Streaming, mergeable evaluation metrics.
+
+Metric accumulators are updated batch by batch and can be merged across
+workers, so evaluating a large holdout set never needs all of its rows in
+memory at once. Results are exactly equal to computing the metrics on the
+concatenated batches.
+
+Usage example:
+    metrics = ClassificationMetrics(num_classes=3)
+    for y_true, y_pred in batches:
+        metrics.update(y_true, y_pred)
+    metrics.merge(metrics_of_another_worker)
+    metrics.result()  # {"accuracy": ..., "cm": ...}
+
+`bootstrap_intervals` computes percentile bootstrap confidence intervals of
+the scalar metrics. Resamples are drawn as index matrices and evaluated in
+batches with vectorised NumPy code, so a thousand resamples cost about as
+much as a few metric calls.
+"""
+
+import collections
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+from ml_pipeline.statistics import RunningStats
+
+
+class ClassificationMetrics:
+    """Confusion matrix and accuracy of integer-coded class predictions."""
+
+    def __init__(self, num_classes: int) -> None:
+        """Instantiates an empty accumulator.
+
+        Args:
+            num_classes (int): Number of classes; class codes are
+                0 ... num_classes - 1.
+        """
+        self.num_classes = num_classes
+        self.cm = np.zeros((num_classes, num_classes), dtype=np.int64)
+
+    def update(
+        self, y_true: "np.ndarray", y_pred: "np.ndarray"
+    ) -> "ClassificationMetrics":
+        """Adds a batch of true and predicted class codes."""
+        y_true = np.asarray(y_true, dtype=np.int64)
+        y_pred = np.asarray(y_pred, dtype=np.int64)
+        self.cm += np.bincount(
+            y_true * self.num_classes + y_pred,
+            minlength=self.num_classes**2,
+        ).reshape(self.num_classes, self.num_classes)
+        return self
+
+    def merge(self, other: "ClassificationMetrics") -> "ClassificationMetrics":
+        """Adds the batches of another accumulator.
+
+        Raises:
+            ValueError: The accumulators have different numbers of classes.
+        """
+        if other.num_classes != self.num_classes:
+            raise ValueError("Cannot merge metrics of different classes")
+        self.cm += other.cm
+        return self
+
+    def resampled(
+        self, y_true: "np.ndarray", y_pred: "np.ndarray"
+    ) -> Dict[str, "np.ndarray"]:
+        """Scalar metrics of a batch of resamples.
+
+        Args:
+            y_true (np.ndarray): True class codes, one resample per row.
+            y_pred (np.ndarray): Predicted class codes, same shape.
+        Returns:
+            Dict[str, np.ndarray]: The accuracy of each resample.
+        """
+        y_true = np.asarray(y_true, dtype=np.int64)
+        y_pred = np.asarray(y_pred, dtype=np.int64)
+        num_resamples, num_rows = y_true.shape
+        cells = self.num_classes**2
+        # one confusion matrix per resample, from a single bincount
+        codes = y_true * self.num_classes + y_pred
+        codes += np.arange(num_resamples)[:, None] * cells
+        cm = np.bincount(
+            codes.reshape(-1), minlength=num_resamples * cells
+        ).reshape(num_resamples, self.num_classes, self.num_classes)
+        return {"accuracy": np.trace(cm, axis1=1, axis2=2) / num_rows}
+
+    def result(self) -> Dict:
+        """Accuracy ("accuracy") and confusion matrix ("cm")."""
+        total = self.cm.sum()
+        return {
+            "accuracy": float(np.trace(self.cm) / total) if total else np.nan,
+            "cm": self.cm.copy(),
+        }
+
+
+class RegressionMetrics:
+    """Mean squared error and R^2 of predicted values.
+
+    The total sum of squares needed by R^2 is accumulated with mergeable
+    running statistics of the true values rather than with raw sums of
+    squares, which lose precision on large holdout sets.
+    """
+
+    def __init__(self) -> None:
+        """Instantiates an empty accumulator."""
+        self.targets = RunningStats(["y"])
+        self.sse = 0.0
+
+    def update(
+        self, y_true: "np.ndarray", y_pred: "np.ndarray"
+    ) -> "RegressionMetrics":
+        """Adds a batch of true and predicted values."""
+        y_true = np.asarray(y_true, dtype=np.float64).reshape(-1)
+        y_pred = np.asarray(y_pred, dtype=np.float64).reshape(-1)
+        self.targets.update(y_true)
+        self.sse += float(np.sum((y_true - y_pred) ** 2))
+        return self
+
+    def merge(self, other: "RegressionMetrics") -> "RegressionMetrics":
+        """Adds the batches of another accumulator."""
+        self.targets.merge(other.targets)
+        self.sse += other.sse
+        return self
+
+    def resampled(
+        self, y_true: "np.ndarray", y_pred: "np.ndarray"
+    ) -> Dict[str, "np.ndarray"]:
+        """Scalar metrics of a batch of resamples.
+
+        Args:
+            y_true (np.ndarray): True values, one resample per row.
+            y_pred (np.ndarray): Predicted values, same shape.
+        Returns:
+            Dict[str, np.ndarray]: The mean squared error and R^2 of each
+                resample.
+        """
+        y_true = np.asarray(y_true, dtype=np.float64)
+        y_pred = np.asarray(y_pred, dtype=np.float64)
+        sse = np.sum((y_true - y_pred) ** 2, axis=1)
+        deviations = y_true - y_true.mean(axis=1, keepdims=True)
+        sst = np.sum(deviations**2, axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            r2 = 1.0 - sse / sst
+        return {
+            "mean_squared_error": sse / y_true.shape[1],
+            "r2_score": r2,
+        }
+
+    def result(self) -> Dict:
+        """Mean squared error ("mean_squared_error") and R^2 ("r2_score")."""
+        count = int(self.targets.count[0])
+        if not count:
+            return {"mean_squared_error": np.nan, "r2_score": np.nan}
+
+        sst = float(self.targets.m2[0])
+        if sst > 0:
+            r2 = 1.0 - self.sse / sst
+        else:
+            # constant targets, following scikit-learn's convention
+            r2 = 1.0 if self.sse == 0 else 0.0
+        return {"mean_squared_error": self.sse / count, "r2_score": r2}
+
+
+def bootstrap_intervals(
+    accumulator,
+    y_true: "np.ndarray",
+    y_pred: "np.ndarray",
+    num_resamples: int = 1000,
+    confidence: float = 0.95,
+    batch_size: int = None,
+    seed: int = None,
+) -> Dict[str, Tuple[float, float]]:
+    """Percentile bootstrap confidence intervals of the scalar metrics.
+
+    Args:
+        accumulator: Metric accumulator whose `resampled` method computes
+            the metrics, e.g. ClassificationMetrics.
+        y_true (np.ndarray): True values (or class codes).
+        y_pred (np.ndarray): Predicted values (or class codes).
+        num_resamples (int): Number of bootstrap resamples.
+        confidence (float): Confidence level of the intervals.
+        batch_size (int): Resamples evaluated at once. Defaults to a batch
+            size that bounds the index matrix to about 4M entries.
+        seed (int): Seed of the resampling.
+    Returns:
+        Dict[str, Tuple[float, float]]: Lower and upper bound of each metric.
+    """
+    y_true = np.asarray(y_true).reshape(-1)
+    y_pred = np.asarray(y_pred).reshape(-1)
+    num_rows = len(y_true)
+    if not num_rows:
+        return {}
+
+    batch_size = batch_size or max(2**22 // num_rows, 1)
+    rng = np.random.default_rng(seed)
+    samples = collections.defaultdict(list)
+    for start in range(0, num_resamples, batch_size):
+        size = min(batch_size, num_resamples - start)
+        idx = rng.integers(0, num_rows, size=(size, num_rows))
+        for name, values in accumulator.resampled(
+            y_true[idx], y_pred[idx]
+        ).items():
+            samples[name].append(values)
+
+    alpha = (1.0 - confidence) / 2
+    return {
+        name: tuple(
+            float(bound)
+            for bound in np.nanquantile(
+                np.concatenate(values), [alpha, 1.0 - alpha]
+            )
+        )
+        for name, values in samples.items()
+    }
@@ -1,34 +1,195 @@
+import functools
+import glob
+import os
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Iterator, List, Union
+
 import pandas as pd
 
+from ml_pipeline import (
+    artifact_store,
+    artifacts,
+    incremental,
+    resources,
+    tracing,
+)
+
+if TYPE_CHECKING:
+    from ml_pipeline.artifacts import ArtifactSink
+
 
 class CSVMixin:
     """Mixin for loading and saving CSV files in a Dataset."""
 
-    def load(self) -> None:
+    def data_files(self) -> List[str]:
+        """Resolves the data path to a list of part files.
+
+        The data path may be a single file, a directory (all of its
+        non-hidden files are parts) or a glob pattern. Parts are sorted by
+        path so that rows keep a stable order.
+
+        Raises:
+            FileNotFoundError: No file matches the data path.
+        """
+        if os.path.isdir(self.data_path):
+            files = [
+                os.path.join(self.data_path, name)
+                for name in os.listdir(self.data_path)
+                if not name.startswith(".")
+                and os.path.isfile(os.path.join(self.data_path, name))
+            ]
+        elif glob.has_magic(self.data_path):
+            files = [
+                path
+                for path in glob.glob(self.data_path)
+                if os.path.isfile(path)
+            ]
+        else:
+            files = [self.data_path]
+
+        if not files:
+            raise FileNotFoundError(f"No data files match '{self.data_path}'")
+        return sorted(files)
+
+    def iter_parts(
+        self,
+        max_workers: int = None,
+        use_processes: bool = False,
+        cores: int = None,
+    ) -> Iterator["pd.DataFrame"]:
+        """Parses the part files concurrently, yielding them in order.
+
+        At most `max_workers` parts beyond the one being consumed are parsed
+        ahead, so streaming the parts needs bounded memory.
+
+        Args:
+            max_workers (int): Number of parts parsed concurrently. Defaults
+                to the number of cores.
+            use_processes (bool): Parse in a process pool instead of a thread
+                pool. Worth it when parsing is dominated by Python-level work
+                that holds the GIL.
+            cores (int): Number of cores divided between the worker
+                processes' BLAS and OpenMP threads (see
+                ml_pipeline.resources). Defaults to all cores.
+
+        Raises:
+            FileNotFoundError: File not found.
+            PermissionError: Insufficient permissions to read file.
+        """
+        files = self.data_files()
+        read = functools.partial(
+            _read_part, names=self.columns, dtype=self.dtypes
+        )
+
+        if len(files) == 1:
+            yield read(files[0])
+            return
+
+        budget = resources.CoreBudget(cores)
+        max_workers = min(max_workers or budget.cores, len(files))
+        if use_processes:
+            # workers log through this process' loggers
+            initializer, initargs = resources.worker_initializer(
+                budget.threads(max_workers)
+            )
+            executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=initializer,
+                initargs=initargs,
+            )
+        else:
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+        with executor:
+            pending = [
+                executor.submit(read, path) for path in files[:max_workers]
+            ]
+            for path in files[max_workers:]:
+                yield pending.pop(0).result()
+                pending.append(executor.submit(read, path))
+            for future in pending:
+                yield future.result()
+
+    def load(
+        self,
+        max_workers: int = None,
+        use_processes: bool = False,
+        cache_dir: str = None,
+        cores: int = None,
+    ) -> None:
         """Loads data into a data frame.
 
+        Multi-part data paths (directories or glob patterns) are parsed
+        concurrently and concatenated once.
+
+        Args:
+            max_workers (int): Number of parts parsed concurrently. Defaults
+                to the number of cores.
+            use_processes (bool): Parse in a process pool instead of a thread
+                pool.
+            cache_dir (str): Treat the data files as append-only and only
+                parse what was appended since the last load, using this
+                cache directory (see ml_pipeline.incremental).
+            cores (int): Number of cores of the run, divided between the
+                worker processes. Defaults to all cores.
+
         Raises:
             FileNotFoundError: File not found.
             PermissionError: Insufficient permissions to read file.
             IsADirectoryError: Project config path points to a directory.
         """
-        self.df = pd.read_csv(self.data_path, names=self.columns)
+        if cache_dir is not None:
+            self.df, self.statistics = incremental.IncrementalCache(
+                cache_dir
+            ).refresh(self)
+        else:
+            parts = list(self.iter_parts(max_workers, use_processes, cores))
+            if len(parts) == 1:
+                self.df = parts[0]
+            else:
+                with tracing.span("concat", cat="load", parts=len(parts)):
+                    self.df = pd.concat(parts, ignore_index=True)
 
-    def save(self, artefact_dir: str, suffix: str = "") -> None:
+        if self.dtypes:
+            # parts with different categories are concatenated as objects
+            self.df = self.df.astype(self.dtypes)
+
+    def save(
+        self,
+        artefact_dir: "Union[str, ArtifactSink]",
+        suffix: str = "",
+        compression: str = None,
+    ) -> None:
         """Saves data to a CSV file.
 
         Args:
-            artefact_dir (str): Output directory.
+            artefact_dir (Union[str, ArtifactSink]): Output directory, or
+                the sink of the run's artifacts. A sink with an artifact
+                store links data written by an earlier run instead of
+                writing it again.
             suffix (str): File name suffix.
+            compression (str): Block-compression codec (see
+                ml_pipeline.block_compression), or None to write plain CSV.
 
         Raises:
             PermissionError: Insufficient permissions to write file to path.
+            ValueError: Unknown compression codec.
         """
         if suffix:
             suffix = f"_{suffix}"
 
-        self.df.to_csv(
-            f"{artefact_dir}/{self.name}{suffix}.csv",
-            float_format="%.6f",
-            index=False,
-        )
\ No newline at end of file
+        artifacts.open_sink(artefact_dir).write(
+            f"{self.name}{suffix}.csv",
+            artifacts.text(
+                lambda f: self.df.to_csv(f, float_format="%.6f", index=False)
+            ),
+            compression,
+            key=lambda: artifact_store.frame_key(
+                self.df, format="csv", compression=compression or "none"
+            ),
+        )
+
+
+def _read_part(path: str, **kwargs) -> "pd.DataFrame":
+    with tracing.span("parse", cat="load", path=path):
+        return pd.read_csv(path, **kwargs)
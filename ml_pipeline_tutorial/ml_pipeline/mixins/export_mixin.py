@@ -0,0 +1,69 @@
+import json
+
+from typing import TYPE_CHECKING, Dict
+
+import numpy as np
+
+from ml_pipeline.predictor import FORMAT_VERSION
+
+if TYPE_CHECKING:
+    from ml_pipeline.feature_plan import FeaturePlan
+
+
+class ExportMixin:
+    """Mixin for exporting linear models to a NumPy-only artifact."""
+
+    def export_predictor(
+        self,
+        preprocessing: Dict[str, "np.ndarray"] = None,
+        feature_plan: "FeaturePlan" = None,
+    ) -> None:
+        """Saves the model for ml_pipeline.predictor.LinearPredictor.
+
+        Args:
+            preprocessing (Dict[str, np.ndarray]): The dataset's fitted
+                pre-processing parameters. Standardisation ("columns",
+                "mean", "std") is exported.
+            feature_plan (FeaturePlan): Plan of the derived features.
+        """
+        if not hasattr(self.model, "coef_") or not self.artifacts.enabled:
+            # only linear models can be exported
+            return
+        if self.hasher is not None:
+            # the predictor doesn't hash features
+            return
+
+        preprocessing = preprocessing or {}
+        columns = preprocessing.get("columns", [])
+        items = {
+            "format_version": np.array(FORMAT_VERSION),
+            "kind": np.array(self.kind),
+            "features": np.array(
+                [str(name) for name in self.model.feature_names_in_]
+            ),
+            "coef": self.model.coef_,
+            "intercept": np.asarray(self.model.intercept_),
+            "classes": np.array([]),
+            "preprocessing_columns": np.array(columns, dtype=str),
+            "preprocessing_mean": np.asarray(
+                preprocessing.get("mean", []), dtype=np.float64
+            ),
+            "preprocessing_std": np.asarray(
+                preprocessing.get("std", []), dtype=np.float64
+            ),
+            "feature_plan": np.array(
+                json.dumps(feature_plan.definitions if feature_plan else {})
+            ),
+        }
+        if self.kind == "classifier":
+            # decode the class codes the model was trained with
+            labels = {code: label for label, code in self.encodings.items()}
+            items["classes"] = np.array(
+                [labels[code] for code in self.model.classes_]
+            )
+
+        filename = self.artifacts.write(
+            "predictor.npz", lambda f: np.savez(f, **items)
+        )
+        if self.logger:
+            self.logger.debug(f"Saved {filename}.")
@@ -0,0 +1,49 @@
+from typing import TYPE_CHECKING, List, Mapping
+
+from ml_pipeline.feature_plan import FeaturePlan
+
+if TYPE_CHECKING:
+    from ml_pipeline.feature_store import FeatureStore
+
+
+class FeaturePlanMixin:
+    """Mixin for feature-engineering a Dataset from declarative definitions."""
+
+    def feature_engineer(
+        self,
+        features: List[str],
+        definitions: Mapping[str, str] = None,
+        store: "FeatureStore" = None,
+    ) -> List[str]:
+        """Feature-engineer data.
+
+        All derived features are computed by a single compiled FeaturePlan,
+        which is kept in `feature_plan` so it can be saved with the training
+        artifacts and reused at inference time.
+
+        Args:
+            features (List[str]): List of features to be used in training.
+            definitions (Mapping[str, str]): Derived feature name to
+                expression, usually `project.derived_features` from the
+                project configuration.
+            store (FeatureStore): Feature store to read previously computed
+                features from and write new ones to. Optional.
+        Returns:
+            List[str]: Updated list of features to be used in training.
+        """
+        self.feature_plan = FeaturePlan(definitions or {})
+        if store is None:
+            self.df = self.feature_plan.apply(self.df)
+        else:
+            namespace = store.namespace(
+                self.data_files(),
+                type(self),
+                columns=self.columns,
+                dtypes=self.dtypes,
+            )
+            self.df = store.apply(self.feature_plan, self.df, namespace)
+
+        # we would like to use all original features + newly-added features
+        return features + [
+            name for name in self.feature_plan.names if name not in features
+        ]
@@ -1,26 +1,36 @@
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from ml_pipeline import artifacts
+
 
 class ReportingMixin:
     def save_metrics(self) -> None:
-        with open(f"{self.artifact_dir}/metrics", "w") as f:
+        def write(f) -> None:
             for key, value in self.metrics.items():
                 f.write(f"{key}: {value}\n")
 
+        self.artifacts.write("metrics", artifacts.text(write))
+
     def plot_confusion_matrix(
         self, annot=True, fmt=".2g", xticklabels="auto", yticklabels="auto"
     ) -> None:
-        fig = plt.figure(figsize=(8, 8))
-        sns.heatmap(
-            self.metrics["cm"],
-            square=True,
-            annot=annot,
-            fmt=fmt,
-            xticklabels=xticklabels,
-            yticklabels=yticklabels,
-        )
-        plt.xlabel("Predicted Class")
-        plt.ylabel("True Class")
+        def write(f) -> None:
+            fig = plt.figure(figsize=(8, 8))
+            sns.heatmap(
+                self.metrics["cm"],
+                square=True,
+                annot=annot,
+                fmt=fmt,
+                xticklabels=xticklabels,
+                yticklabels=yticklabels,
+            )
+            plt.xlabel("Predicted Class")
+            plt.ylabel("True Class")
+
+            fig.savefig(f, format="png")
+            # don't accumulate figures over repeated runs in one process
+            plt.close(fig)
 
-        fig.savefig(f"{self.artifact_dir}/confusion_matrix.png")
\ No newline at end of file
+        # the figure is only drawn when the sink keeps it
+        self.artifacts.write("confusion_matrix.png", write)
@@ -1,10 +1,29 @@
-from typing import TYPE_CHECKING
+import json
+
+from typing import TYPE_CHECKING, List, Union
+
+import numpy as np
 
 from sklearn.model_selection import train_test_split
 
+from ml_pipeline import (
+    artifacts,
+    grouped,
+    linear,
+    metrics,
+    resources,
+    search,
+    tracing,
+)
+
 if TYPE_CHECKING:
     import pandas as pd
 
+    from omegaconf import DictConfig
+    from scipy import sparse
+
+    from ml_pipeline.hashing import FeatureHasher
+
 
 class TrainingMixin:
     def _train_test_split(self, idx) -> "pd.Series":
@@ -13,14 +32,235 @@ class TrainingMixin:
         )
         return idx_train, idx_test
 
-    def train(self, X: "pd.DataFrame", y: "pd.Series") -> None:
+    def train(
+        self,
+        X: "pd.DataFrame",
+        y: "pd.Series",
+        search_params: "DictConfig" = None,
+        seed: int = None,
+        hasher: "FeatureHasher" = None,
+        group_by: List[str] = None,
+    ) -> None:
+        """Trains the model on a random training split.
+
+        Args:
+            X (pd.DataFrame): Features.
+            y (pd.Series): Targets.
+            search_params (DictConfig): Parameter search (see `search`).
+            seed (int): Seed of the parameter search.
+            hasher (FeatureHasher): Hasher of the high-cardinality columns
+                of `X`; the model is then trained on a sparse design matrix
+                (see `design_matrix`). The hasher is saved to
+                feature_hasher.json for inference.
+            group_by (List[str]): Columns of `X` whose values identify
+                groups: one model is then trained per group (see
+                ml_pipeline.grouped).
+        Returns:
+            Tuple: The indexes of the training and test rows.
+        Raises:
+            ValueError: Grouped models with a parameter search or hashed
+                features.
+        """
+        if group_by:
+            if search_params or hasher is not None:
+                raise ValueError(
+                    "Grouped models support neither parameter searches nor "
+                    "hashed features"
+                )
+            self.model = grouped.GroupedEstimator(
+                self.model, group_by, n_jobs=self.n_jobs
+            )
+
+        self.hasher = hasher
+        if hasher is not None:
+            filename = self.artifacts.write(
+                "feature_hasher.json", hasher.write
+            )
+            if filename:
+                self.logger.debug(f"Saved {filename}.")
+
         idx_train, idx_test = self._train_test_split(X.index)
         _, y_train = self._encode_train_data(None, y.loc[idx_train])
-        self.model.fit(X.loc[idx_train], y_train)
+        if self._streams_rows(search_params):
+            # read the training rows out of X chunk by chunk rather than
+            # copying them
+            with tracing.span("fit", cat="fit", rows=len(idx_train)):
+                self.model.fit(X, y_train, rows=X.index.get_indexer(idx_train))
+            return idx_train, idx_test
+
+        X_train = self.design_matrix(X.loc[idx_train])
+        if search_params:
+            with tracing.span("search", cat="fit"):
+                self.search(X_train, y_train, search_params, seed)
+        with tracing.span("fit", cat="fit", rows=len(idx_train)):
+            self.model.fit(X_train, y_train)
+        if group_by:
+            self.logger.info(
+                f"Trained models of {len(self.model.groups_)} groups, "
+                f"{len(self.model.failed_groups_)} of which failed and use "
+                "the model of all groups."
+            )
         return idx_train, idx_test
 
-    def evaluate(self, X: "pd.DataFrame", y_true: "pd.Series") -> None:
-        _, y_true = self._encode_test_data(None, y_true)
-        y_pred = self.model.predict(X)
-        metrics = self._compute_metrics(y_true, y_pred)
-        return metrics
\ No newline at end of file
+    def _streams_rows(self, search_params: "DictConfig" = None) -> bool:
+        # streaming estimators fit on rows of the unsplit features, unless
+        # they are searched (on copies) or trained on hashed features
+        return (
+            isinstance(self.model, linear.StreamingLinearRegression)
+            and not search_params
+            and self.hasher is None
+        )
+
+    def design_matrix(
+        self, X: "pd.DataFrame"
+    ) -> "Union[pd.DataFrame, sparse.csr_matrix]":
+        """Features as the model takes them.
+
+        Returns:
+            Union[pd.DataFrame, sparse.csr_matrix]: `X` itself, or its
+                sparse design matrix when the model was trained with a
+                feature hasher.
+        """
+        if self.hasher is None:
+            return X
+        return self.hasher.design_matrix(X)
+
+    def search(
+        self,
+        X: "Union[pd.DataFrame, sparse.csr_matrix]",
+        y: "pd.Series",
+        search_params: "DictConfig",
+        seed: int = None,
+    ) -> None:
+        """Sets the model's parameters by successive-halving search.
+
+        Every rung of the search is saved to search.json.
+
+        Args:
+            X (Union[pd.DataFrame, sparse.csr_matrix]): Training features,
+                or their design matrix.
+            y (pd.Series): Encoded training targets.
+            search_params (DictConfig): The `params` grid to search, and
+                optionally `n_candidates`, `factor`, `min_rows`,
+                `validation_split` and `workers`.
+            seed (int): Seed of the candidate sampling and row shuffling.
+        """
+        params = search.candidates(
+            search_params.params, search_params.get("n_candidates"), seed
+        )
+        # divide the model's cores between the concurrent candidates
+        budget = resources.CoreBudget(self.n_jobs)
+        workers = budget.workers(search_params.get("workers"), len(params))
+        best_params, rungs = search.successive_halving(
+            self.model,
+            params,
+            X,
+            y,
+            factor=search_params.get("factor", 3),
+            min_rows=search_params.get("min_rows", 20),
+            validation_split=search_params.get("validation_split", 0.2),
+            max_workers=workers,
+            seed=seed,
+            threads=budget.threads(workers),
+        )
+        self.model.set_params(**best_params)
+        self.logger.info(
+            f"Searched {len(params)} candidates in {len(rungs)} rungs, "
+            f"best parameters: {best_params}"
+        )
+
+        filename = self.artifacts.write(
+            "search.json",
+            lambda f: f.write(
+                json.dumps(
+                    {"best_params": best_params, "rungs": rungs}
+                ).encode()
+            ),
+        )
+        if filename:
+            self.logger.debug(f"Saved {filename}.")
+
+    def evaluate(
+        self,
+        X: "pd.DataFrame",
+        y_true: "pd.Series",
+        chunk_size: int = None,
+        bootstrap_params: "DictConfig" = None,
+        seed: int = None,
+    ) -> None:
+        """Computes the metrics of the model on a holdout set.
+
+        Args:
+            X (pd.DataFrame): Holdout features.
+            y_true (pd.Series): Holdout targets.
+            chunk_size (int): Predict and accumulate the metrics chunk by
+                chunk, which bounds the memory used by the predictions.
+                Defaults to the whole holdout set at once.
+            bootstrap_params (DictConfig): If set, add bootstrap confidence
+                intervals of the scalar metrics, e.g. "accuracy_ci95" next
+                to "accuracy". Optional `resamples` (default 1000) and
+                `confidence` (default 0.95).
+            seed (int): Seed of the bootstrap resampling.
+        Returns:
+            Dict: The metrics, also kept in `metrics`.
+        """
+        accumulator = self._metric_accumulator()
+        chunk_size = chunk_size or max(len(X), 1)
+        y_trues, y_preds = [], []
+        for start in range(0, len(X), chunk_size):
+            _, y_chunk = self._encode_test_data(
+                None, y_true.iloc[start : start + chunk_size]
+            )
+            with tracing.span("predict", cat="predict", start=start):
+                y_pred = self.predict(X.iloc[start : start + chunk_size])
+            accumulator.update(y_chunk, y_pred)
+            if bootstrap_params:
+                # resampling needs all (compact) targets and predictions
+                y_trues.append(np.asarray(y_chunk))
+                y_preds.append(np.asarray(y_pred))
+        self.metrics = accumulator.result()
+
+        if bootstrap_params and y_trues:
+            confidence = bootstrap_params.get("confidence", 0.95)
+            with tracing.span("bootstrap", cat="predict"):
+                intervals = metrics.bootstrap_intervals(
+                    accumulator,
+                    np.concatenate(y_trues),
+                    np.concatenate(y_preds),
+                    num_resamples=bootstrap_params.get("resamples", 1000),
+                    confidence=confidence,
+                    seed=seed,
+                )
+            # write each interval next to its point estimate
+            suffix = f"_ci{round(confidence * 100):g}"
+            point_estimates, self.metrics = self.metrics, {}
+            for name, value in point_estimates.items():
+                self.metrics[name] = value
+                if name in intervals:
+                    self.metrics[name + suffix] = intervals[name]
+
+        if hasattr(self.model, "score_groups"):
+            self.save_group_scores(X, y_true)
+        return self.metrics
+
+    def save_group_scores(
+        self, X: "pd.DataFrame", y_true: "pd.Series"
+    ) -> None:
+        """Saves the holdout score of every group's model.
+
+        Scores are saved to group_scores.csv, with the number of holdout
+        rows of each group.
+        """
+        _, y_encoded = self._encode_test_data(None, y_true)
+        with tracing.span("score groups", cat="predict"):
+            scores = self.model.score_groups(X, y_encoded)
+        self.logger.info(
+            f"Scored {len(scores)} groups, median score "
+            f"{scores['score'].median():.4f}."
+        )
+
+        filename = self.artifacts.write(
+            "group_scores.csv", artifacts.text(scores.to_csv)
+        )
+        if filename:
+            self.logger.debug(f"Saved {filename}.")
@@ -1,8 +1,13 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, List
 
 if TYPE_CHECKING:
     import pandas as pd
 
+    from omegaconf import DictConfig
+
+    from ml_pipeline.feature_plan import FeaturePlan
+    from ml_pipeline.hashing import FeatureHasher
+
 from abc import ABC, abstractmethod
 
 
@@ -22,7 +27,15 @@ class Model(ABC):
         pass
 
     @abstractmethod
-    def train(self, X: "pd.DataFrame", y: "pd.Series") -> None:
+    def train(
+        self,
+        X: "pd.DataFrame",
+        y: "pd.Series",
+        search_params: "DictConfig" = None,
+        seed: int = None,
+        hasher: "FeatureHasher" = None,
+        group_by: List[str] = None,
+    ) -> None:
         pass
 
     @abstractmethod
@@ -34,5 +47,10 @@ class Model(ABC):
         pass
 
     @abstractmethod
-    def save(self) -> None:
-        pass
\ No newline at end of file
+    def save(
+        self,
+        compression: str = None,
+        preprocessing: dict = None,
+        feature_plan: "FeaturePlan" = None,
+    ) -> None:
+        pass
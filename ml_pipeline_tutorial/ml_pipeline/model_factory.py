@@ -1,9 +1,10 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Union
 
 if TYPE_CHECKING:
     import logging
     from omegaconf import DictConfig
 
+    from ml_pipeline.artifacts import ArtifactSink
     from ml_pipeline.model import Model
 
 from ml_pipeline.models.iris_classifier import IrisClassifier
@@ -16,16 +17,36 @@ class ModelFactory:
             "iris_classifier": IrisClassifier,
             "autompg_regressor": AutoMPGRegressor,
         }
-        
 
     def get(
         self,
         name: str,
         model_params: "DictConfig",
         training_params: "DictConfig",
-        artifact_dir: str,
+        artifact_dir: "Union[str, ArtifactSink]",
         logger: "logging.Logger",
+        n_jobs: int = None,
     ) -> "Model":
+        """Instantiates a model.
+
+        Args:
+            name (str): Name of the model.
+            model_params (DictConfig): Parameters of the estimator.
+            training_params (DictConfig): Training parameters.
+            artifact_dir (Union[str, ArtifactSink]): Artifact directory or
+                sink.
+            logger (logging.Logger): Logger.
+            n_jobs (int): Cores of the model, passed to the estimator as
+                `n_jobs` unless configured in `model_params`, and divided
+                between the workers of parameter searches. Defaults to all
+                cores.
+        Returns:
+            Model: The model.
+        """
         return self.models[name](
-            model_params, training_params, artifact_dir, logger=logger
-        )
\ No newline at end of file
+            model_params,
+            training_params,
+            artifact_dir,
+            logger=logger,
+            n_jobs=n_jobs,
+        )
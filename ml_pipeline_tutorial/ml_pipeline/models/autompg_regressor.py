@@ -1,7 +1,6 @@
-from typing import TYPE_CHECKING, Dict, Tuple
+from typing import TYPE_CHECKING, Dict, Tuple, Union
 
 from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_squared_error, r2_score
 from joblib import load, dump
 
 if TYPE_CHECKING:
@@ -10,26 +9,55 @@ if TYPE_CHECKING:
 
     from omegaconf import DictConfig
 
+    from ml_pipeline.artifacts import ArtifactSink
+    from ml_pipeline.feature_plan import FeaturePlan
+
+from ml_pipeline import artifacts, block_compression, linear
+from ml_pipeline.metrics import RegressionMetrics
+from ml_pipeline.mixins.export_mixin import ExportMixin
 from ml_pipeline.mixins.reporting_mixin import ReportingMixin
 from ml_pipeline.mixins.training_mixin import TrainingMixin
 from ml_pipeline.model import Model
 
 
-class AutoMPGRegressor(TrainingMixin, Model, ReportingMixin):
+class AutoMPGRegressor(TrainingMixin, Model, ReportingMixin, ExportMixin):
+    kind = "regressor"
+
     def __init__(
         self,
-        model_params: "DictConfig",
-        training_params: "DictConfig",
-        artifact_dir: str,
+        model_params: "DictConfig" = None,
+        training_params: "DictConfig" = None,
+        artifact_dir: "Union[str, ArtifactSink]" = None,
         logger: "logging.Logger" = None,
+        n_jobs: int = None,
     ) -> None:
-        self.model = LinearRegression(**model_params)
+        # cores of the model, also its estimator's n_jobs unless configured
+        self.n_jobs = n_jobs
+        streaming = (training_params or {}).get("streaming")
+        if streaming:
+            # exact least squares from statistics accumulated in one pass
+            # over the training rows
+            self.model = linear.StreamingLinearRegression(
+                **{"n_jobs": n_jobs, **(model_params or {}), **streaming}
+            )
+        else:
+            self.model = LinearRegression(
+                **{"n_jobs": n_jobs, **(model_params or {})}
+            )
         self.training_params = training_params
-        self.artifact_dir = artifact_dir
+        # artifacts are written to the directory, or to a given sink
+        self.artifacts = artifacts.open_sink(artifact_dir)
         self.logger = logger
 
+        # hasher of high-cardinality feature columns, set by `train`
+        self.hasher = None
+
     def load(self, model_path: str) -> None:
-        self.model = load(model_path)
+        # the model may have been saved block-compressed
+        with block_compression.open_reader(
+            block_compression.resolve(model_path)
+        ) as f:
+            self.model = load(f)
 
     def _encode_train_data(
         self, X: "pd.DataFrame" = None, y: "pd.Series" = None
@@ -43,20 +71,33 @@ class AutoMPGRegressor(TrainingMixin, Model, ReportingMixin):
         # in this example, we don't do any encoding
         return X, y
 
+    def _metric_accumulator(self) -> "RegressionMetrics":
+        return RegressionMetrics()
+
     def _compute_metrics(
         self, y_true: "pd.Series", y_pred: "pd.Series"
     ) -> Dict:
-        self.metrics = {}
-        self.metrics["mean_squared_error"] = mean_squared_error(y_true, y_pred)
-        self.metrics["r2_score"] = r2_score(y_true, y_pred)
+        self.metrics = (
+            self._metric_accumulator().update(y_true, y_pred).result()
+        )
 
     def create_report(self) -> None:
         self.save_metrics()
 
-    def save(self) -> None:
-        filename = f"{self.artifact_dir}/model.joblib"
-        dump(self.model, filename)
-        self.logger.debug(f"Saved {filename}.")
+    def save(
+        self,
+        compression: str = None,
+        preprocessing: Dict = None,
+        feature_plan: "FeaturePlan" = None,
+    ) -> None:
+        filename = self.artifacts.write(
+            "model.joblib", lambda f: dump(self.model, f), compression
+        )
+        if filename:
+            self.logger.debug(f"Saved {filename}.")
+
+        # NumPy-only copy of the model for fast cold starts
+        self.export_predictor(preprocessing, feature_plan)
 
     def predict(self, X: "pd.DataFrame") -> int:
-        return self.model.predict(X)
\ No newline at end of file
+        return self.model.predict(self.design_matrix(X))
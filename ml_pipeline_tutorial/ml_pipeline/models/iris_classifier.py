@@ -1,10 +1,6 @@
-import json
-
-from typing import TYPE_CHECKING, Dict, Tuple
+from typing import TYPE_CHECKING, Dict, Tuple, Union
 
 from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import accuracy_score, confusion_matrix
-from sklearn.preprocessing import LabelEncoder
 from joblib import load, dump
 
 if TYPE_CHECKING:
@@ -13,61 +9,86 @@ if TYPE_CHECKING:
 
     from omegaconf import DictConfig
 
+    from ml_pipeline.artifacts import ArtifactSink
+    from ml_pipeline.feature_plan import FeaturePlan
+
+from ml_pipeline import artifacts, block_compression
+from ml_pipeline.encoding import CategoricalEncoder
+from ml_pipeline.metrics import ClassificationMetrics
+from ml_pipeline.mixins.export_mixin import ExportMixin
 from ml_pipeline.mixins.reporting_mixin import ReportingMixin
 from ml_pipeline.mixins.training_mixin import TrainingMixin
 from ml_pipeline.model import Model
 
 
-class IrisClassifier(TrainingMixin, Model, ReportingMixin):
+class IrisClassifier(TrainingMixin, Model, ReportingMixin, ExportMixin):
+    kind = "classifier"
+
     def __init__(
         self,
-        model_params: "DictConfig",
-        training_params: "DictConfig",
-        artifact_dir: str,
+        model_params: "DictConfig" = None,
+        training_params: "DictConfig" = None,
+        artifact_dir: "Union[str, ArtifactSink]" = None,
         logger: "logging.Logger" = None,
+        n_jobs: int = None,
     ) -> None:
-        self.model = LogisticRegression(**model_params)
+        # cores of the model, also its estimator's n_jobs unless configured
+        self.n_jobs = n_jobs
+        self.model = LogisticRegression(
+            **{"n_jobs": n_jobs, **(model_params or {})}
+        )
         self.training_params = training_params
-        self.artifact_dir = artifact_dir
+        # artifacts are written to the directory, or to a given sink
+        self.artifacts = artifacts.open_sink(artifact_dir)
         self.logger = logger
 
+        # hasher of high-cardinality feature columns, set by `train`
+        self.hasher = None
+
+        # label encoder, reused while the target's categories are unchanged
+        self.encoder = None
+
     def load(self, model_path: str) -> None:
-        self.model = load(model_path)
+        # the model may have been saved block-compressed
+        with block_compression.open_reader(
+            block_compression.resolve(model_path)
+        ) as f:
+            self.model = load(f)
 
     def _encode_train_data(
         self, X: "pd.DataFrame" = None, y: "pd.Series" = None
     ) -> Tuple["pd.DataFrame", "pd.Series"]:
         # we are not encoding X because it is not needed for our dataset
 
-        le = LabelEncoder()
-        y = le.fit_transform(y)
-
-        # build the encoding dictionary, converting numpy.int64 values to
-        # python ints
-        self.encodings = dict(
-            zip(le.classes_, [int(i) for i in le.transform(le.classes_)])
-        )
-        self.logger.debug(self.encodings)
+        # targets are parsed as categoricals: the encoder only depends on
+        # their categories and is rebuilt when these change
+        if self.encoder is None or not self.encoder.matches(y):
+            self.encoder = CategoricalEncoder.fit(y)
+            self.encodings = self.encoder.encodings
+            self.logger.debug(self.encodings)
 
-        filename = f"{self.artifact_dir}/encodings.json"
-        with open(filename, "w") as f:
-            json.dump(self.encodings, f)
-        self.logger.debug(f"Saved {filename}.")
+            filename = self.artifacts.write(
+                "encodings.json", self.encoder.write
+            )
+            if filename:
+                self.logger.debug(f"Saved {filename}.")
 
-        return X, y
+        return X, self.encoder.encode(y)
 
     def _encode_test_data(
         self, X: "pd.DataFrame" = None, y: "pd.Series" = None
     ) -> Tuple["pd.DataFrame", "pd.Series"]:
-        y = y.map(self.encodings)
-        return X, y
+        return X, self.encoder.encode(y)
+
+    def _metric_accumulator(self) -> "ClassificationMetrics":
+        return ClassificationMetrics(len(self.encodings))
 
     def _compute_metrics(
         self, y_true: "pd.Series", y_pred: "pd.Series"
     ) -> Dict:
-        self.metrics = {}
-        self.metrics["accuracy"] = accuracy_score(y_true, y_pred)
-        self.metrics["cm"] = confusion_matrix(y_true, y_pred)
+        self.metrics = (
+            self._metric_accumulator().update(y_true, y_pred).result()
+        )
 
     def create_report(self) -> None:
         self.save_metrics()
@@ -76,10 +97,20 @@ class IrisClassifier(TrainingMixin, Model, ReportingMixin):
             yticklabels=self.encodings.keys(),
         )
 
-    def save(self) -> None:
-        filename = f"{self.artifact_dir}/model.joblib"
-        dump(self.model, filename)
-        self.logger.debug(f"Saved {filename}.")
+    def save(
+        self,
+        compression: str = None,
+        preprocessing: Dict = None,
+        feature_plan: "FeaturePlan" = None,
+    ) -> None:
+        filename = self.artifacts.write(
+            "model.joblib", lambda f: dump(self.model, f), compression
+        )
+        if filename:
+            self.logger.debug(f"Saved {filename}.")
+
+        # NumPy-only copy of the model for fast cold starts
+        self.export_predictor(preprocessing, feature_plan)
 
     def predict(self, X: "pd.DataFrame") -> int:
-        return self.model.predict(X)
\ No newline at end of file
+        return self.model.predict(self.design_matrix(X))
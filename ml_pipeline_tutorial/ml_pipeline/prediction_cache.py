@@ -0,0 +1,182 @@
+"""Cache of predictions of repeated inputs.
+
+Scoring traffic often repeats the same rows. A PredictionCache keeps the
+predictions of recently scored rows, keyed by a 64-bit hash of the
+pre-processed feature values (pandas' vectorised row hashing, mixed with the
+model version so that the predictions of different models never mix), and
+only passes the rows it has no prediction for to the model:
+
+- the rows of a batch are hashed at once and looked up once per distinct
+  row, so duplicates within a batch are predicted once;
+- the misses are predicted in one call and scattered back to their rows;
+- entries expire `ttl` seconds after they were predicted, and the least
+  recently used entries are evicted beyond the memory cap.
+
+Usage example:
+    cache = PredictionCache("64M", ttl=3600, model_version=digest)
+    y_pred = cache.predict(df[features], model.predict)
+    print(cache.stats.hit_rate)
+"""
+
+import collections
+import hashlib
+import time
+
+from typing import TYPE_CHECKING, Callable, Dict, Union
+
+import numpy as np
+import pandas as pd
+
+from ml_pipeline import memory
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+# approximate memory of an entry (key, prediction, expiry time and the
+# ordered dictionary's bookkeeping), rounded up
+ENTRY_BYTES = 256
+
+
+class CacheStats:
+    """Mergeable counts of cache lookups.
+
+    Hits are the rows whose prediction was not computed: rows found in the
+    cache and duplicates of other rows of the same batch. Misses are the
+    rows predicted by the model.
+    """
+
+    def __init__(
+        self,
+        hits: int = 0,
+        misses: int = 0,
+        evictions: int = 0,
+        expirations: int = 0,
+    ) -> None:
+        self.hits = hits
+        self.misses = misses
+        self.evictions = evictions
+        self.expirations = expirations
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of the rows looked up that were not predicted."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def merge(self, other: "CacheStats") -> "CacheStats":
+        """Adds the counts of other lookups to these.
+
+        Returns:
+            CacheStats: self.
+        """
+        self.hits += other.hits
+        self.misses += other.misses
+        self.evictions += other.evictions
+        self.expirations += other.expirations
+        return self
+
+    def to_dict(self) -> Dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hit_rate,
+        }
+
+
+class PredictionCache:
+    """LRU cache of the predictions of feature rows, with expiry."""
+
+    def __init__(
+        self,
+        max_size: Union[int, str],
+        ttl: float = None,
+        model_version: str = "",
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Instantiates an empty cache.
+
+        Args:
+            max_size (Union[int, str]): Memory cap, in bytes or as a size
+                such as "64M" (see `memory.parse_size`).
+            ttl (float): Seconds predictions stay valid. Defaults to no
+                expiry.
+            model_version (str): Version of the model, e.g. the digest of
+                its artifact.
+            clock (Callable[[], float]): Time source of the expiry.
+        """
+        self.max_entries = max(memory.parse_size(max_size) // ENTRY_BYTES, 1)
+        self.ttl = ttl
+        self.clock = clock
+        # mixed into the row hashes
+        self.version_hash = np.uint64(
+            int.from_bytes(
+                hashlib.sha256(model_version.encode()).digest()[:8], "little"
+            )
+        )
+        self.stats = CacheStats()
+        # row hash -> (prediction, expiry time), least recently used first
+        self._entries = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def keys(self, X: "pd.DataFrame") -> "np.ndarray":
+        """Hashes of the rows of `X`, which don't depend on its index."""
+        hashes = pd.util.hash_pandas_object(X, index=False).to_numpy()
+        return pd.util.hash_array(hashes ^ self.version_hash)
+
+    def predict(
+        self,
+        X: "pd.DataFrame",
+        predict: Callable[["pd.DataFrame"], "npt.ArrayLike"],
+    ) -> "np.ndarray":
+        """Predicts rows, computing only the predictions not in the cache.
+
+        Args:
+            X (pd.DataFrame): Pre-processed features.
+            predict (Callable[[pd.DataFrame], npt.ArrayLike]): Predicts
+                rows of `X`, e.g. `model.predict`.
+        Returns:
+            np.ndarray: One prediction per row of `X`.
+        """
+        if len(X) == 0:
+            return np.asarray(predict(X))
+
+        unique, first, inverse = np.unique(
+            self.keys(X), return_index=True, return_inverse=True
+        )
+        now = self.clock()
+        values = [None] * len(unique)
+        missing = []
+        for index, key in enumerate(unique.tolist()):
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= now:
+                del self._entries[key]
+                self.stats.expirations += 1
+                entry = None
+            if entry is None:
+                missing.append(index)
+            else:
+                self._entries.move_to_end(key)
+                values[index] = entry[0]
+
+        if missing:
+            predictions = np.asarray(predict(X.iloc[first[missing]]))
+            expiry = now + self.ttl if self.ttl is not None else np.inf
+            for index, value in zip(missing, predictions):
+                values[index] = value
+                self._entries[unique[index].item()] = (value, expiry)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+        self.stats.misses += len(missing)
+        self.stats.hits += len(X) - len(missing)
+        return np.asarray(values)[inverse]
+
+    def reset_stats(self) -> "CacheStats":
+        """Returns the statistics of the lookups since the last reset."""
+        stats, self.stats = self.stats, CacheStats()
+        return stats
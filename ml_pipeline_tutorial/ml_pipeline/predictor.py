@@ -0,0 +1,111 @@
+"""Lightweight predictor for exported linear models.
+
+This module only depends on NumPy. It loads the ``predictor.npz`` artifact
+written by `ExportMixin.export_predictor` (coefficients, intercepts, classes,
+pre-processing parameters and the feature plan) and scores raw rows without
+importing pandas, scikit-learn or joblib, so scoring workers start quickly and
+stay small.
+
+Usage example:
+    predictor = LinearPredictor.load(f"{artifact_dir}/predictor.npz")
+    labels = predictor.predict({"sepal_length": [5.1], ...})
+"""
+
+import json
+
+from typing import Mapping
+
+import numpy as np
+
+from ml_pipeline.feature_plan import FeaturePlan
+
+FORMAT_VERSION = 1
+
+
+class LinearPredictor:
+    """Scores rows with an exported linear classifier or regressor."""
+
+    def __init__(self, items: Mapping[str, "np.ndarray"]) -> None:
+        """Instantiates the predictor from the exported arrays.
+
+        Args:
+            items (Mapping[str, np.ndarray]): Contents of a predictor.npz
+                artifact.
+
+        Raises:
+            ValueError: Unsupported format version.
+        """
+        version = int(items["format_version"])
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported predictor format: {version}")
+
+        self.kind = str(items["kind"])
+        self.features = [str(name) for name in items["features"]]
+        self.coef = np.asarray(items["coef"], dtype=np.float64)
+        self.intercept = np.asarray(items["intercept"], dtype=np.float64)
+        self.classes = items["classes"] if self.kind == "classifier" else None
+
+        self.columns = [str(name) for name in items["preprocessing_columns"]]
+        self.mean = np.asarray(items["preprocessing_mean"], dtype=np.float64)
+        self.std = np.asarray(items["preprocessing_std"], dtype=np.float64)
+
+        self.feature_plan = FeaturePlan(json.loads(str(items["feature_plan"])))
+
+    @classmethod
+    def load(cls, path: str) -> "LinearPredictor":
+        """Loads a predictor.npz artifact.
+
+        Args:
+            path (str): Path to the artifact.
+        Returns:
+            LinearPredictor: The predictor.
+        """
+        with np.load(path, allow_pickle=False) as items:
+            return cls(dict(items))
+
+    def design_matrix(self, rows: Mapping[str, "np.ndarray"]) -> "np.ndarray":
+        """Pre-processes raw columns and derives the model's features.
+
+        Args:
+            rows (Mapping[str, np.ndarray]): Raw columns by name, e.g. a dict
+                of lists or a pandas DataFrame.
+        Returns:
+            np.ndarray: Array of shape (num_rows, len(features)).
+        """
+        columns = {}
+        for name in set(self.features) | set(self.feature_plan.inputs):
+            if name in rows:
+                columns[name] = np.asarray(rows[name], dtype=np.float64)
+
+        # standardise the pre-processed columns
+        for i, name in enumerate(self.columns):
+            columns[name] = (columns[name] - self.mean[i]) / self.std[i]
+
+        derived = self.feature_plan.evaluate(columns)
+        for i, name in enumerate(self.feature_plan.names):
+            columns[name] = derived[i]
+
+        return np.column_stack([columns[name] for name in self.features])
+
+    def decision_function(
+        self, rows: Mapping[str, "np.ndarray"]
+    ) -> "np.ndarray":
+        """Linear scores, X @ coef.T + intercept."""
+        return self.design_matrix(rows) @ self.coef.T + self.intercept
+
+    def predict(self, rows: Mapping[str, "np.ndarray"]) -> "np.ndarray":
+        """Predicts class labels (classifiers) or values (regressors).
+
+        Args:
+            rows (Mapping[str, np.ndarray]): Raw columns by name.
+        Returns:
+            np.ndarray: One prediction per row.
+        """
+        scores = self.decision_function(rows)
+        if self.kind != "classifier":
+            return scores
+
+        if scores.ndim == 1 or scores.shape[1] == 1:
+            # binary classifiers have a single column of scores
+            return self.classes[(scores.reshape(-1) > 0).astype(np.int64)]
+        return self.classes[np.argmax(scores, axis=1)]
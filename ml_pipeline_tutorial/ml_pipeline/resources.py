@@ -0,0 +1,152 @@
+"""Core budget of pipeline runs.
+
+NumPy's BLAS, OpenMP (used by scikit-learn) and numexpr each start one
+thread per core by default. Several pipelines, or one pipeline's pool of
+worker processes, therefore run many times more threads than there are
+cores, and throughput collapses from oversubscription.
+
+A CoreBudget gives a run a total number of cores and divides it:
+
+- worker pools get at most as many processes as there are cores;
+- every worker process gets `cores // workers` BLAS, OpenMP and numexpr
+  threads (see `worker_initializer`), and logs through the loggers of the
+  run's process (see ml_pipeline.utils);
+- code running in the run's own process is limited to the whole budget
+  (see `limit_threads`);
+- models get the budget as their `n_jobs` (see ModelFactory).
+
+Usage example:
+    budget = CoreBudget(8)
+    workers = budget.workers(requested=16)  # 8
+    initializer, initargs = worker_initializer(budget.threads(workers))
+    with ProcessPoolExecutor(
+        workers, initializer=initializer, initargs=initargs
+    ) as executor:
+        ...
+"""
+
+import contextlib
+import os
+
+from typing import Callable, Iterator, List, Tuple
+
+from threadpoolctl import threadpool_limits
+
+from ml_pipeline import utils
+
+try:
+    import numexpr
+except ImportError:  # pragma: no cover - optional dependency
+    numexpr = None
+
+# environment variables read by thread pools when they start, e.g. by BLAS
+# libraries loaded after the limit is set
+THREAD_VARIABLES = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "BLIS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+
+def available_cores() -> int:
+    """Number of cores this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - not on Linux
+        return os.cpu_count() or 1
+
+
+class CoreBudget:
+    """Divides a number of cores between worker processes and threads."""
+
+    def __init__(self, cores: int = None) -> None:
+        """Instantiates the budget.
+
+        Args:
+            cores (int): Total number of cores. Defaults to the cores this
+                process may run on.
+        """
+        self.cores = max(int(cores or available_cores()), 1)
+
+    def workers(self, requested: int = None, tasks: int = None) -> int:
+        """Number of worker processes of a pool.
+
+        Args:
+            requested (int): Configured number of workers; defaults to the
+                budget, and is capped by it.
+            tasks (int): Number of tasks, if known; there are never more
+                workers than tasks.
+        """
+        workers = min(requested or self.cores, self.cores)
+        if tasks is not None:
+            workers = min(workers, tasks)
+        return max(workers, 1)
+
+    def threads(self, workers: int = 1) -> int:
+        """Number of threads of each of `workers` concurrent workers."""
+        return max(self.cores // max(workers, 1), 1)
+
+    def limit_threads(self) -> "contextlib.AbstractContextManager":
+        """Limits the threads of this process to the budget."""
+        return limit_threads(self.cores)
+
+
+@contextlib.contextmanager
+def limit_threads(threads: int) -> Iterator[None]:
+    """Limits the BLAS, OpenMP and numexpr threads of this process."""
+    previous = numexpr.set_num_threads(threads) if numexpr else None
+    try:
+        with threadpool_limits(limits=threads):
+            yield
+    finally:
+        if numexpr:
+            numexpr.set_num_threads(previous)
+
+
+# thread limits of a worker process, kept for the worker's lifetime
+_limits = None
+
+
+def _init_worker(
+    threads: int,
+    initializer: Callable,
+    initargs: Tuple,
+    loggers: List[Tuple],
+) -> None:
+    global _limits
+    for args in loggers:
+        utils.init_worker_logging(*args)
+    for name in THREAD_VARIABLES:
+        os.environ[name] = str(threads)
+    _limits = limit_threads(threads)
+    _limits.__enter__()
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def worker_initializer(
+    threads: int, initializer: Callable = None, initargs: Tuple = ()
+) -> Tuple[Callable, Tuple]:
+    """Initializer of pool workers that limits their threads.
+
+    Records the workers log are also routed to the handlers of the loggers
+    set up in this process (see `utils.worker_loggers`).
+
+    Args:
+        threads (int): Number of BLAS, OpenMP and numexpr threads of each
+            worker, e.g. `CoreBudget.threads(workers)`.
+        initializer (Callable): Initializer to call after limiting the
+            threads, if any.
+        initargs (Tuple): Arguments of `initializer`.
+    Returns:
+        Tuple[Callable, Tuple]: The `initializer` and `initargs` of the pool.
+    """
+    return _init_worker, (
+        threads,
+        initializer,
+        initargs,
+        utils.worker_loggers(),
+    )
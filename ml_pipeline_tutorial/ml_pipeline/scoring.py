@@ -0,0 +1,275 @@
+"""Batch scoring with the artifacts of a training run.
+
+This module applies a run's saved pre-processing, feature plan and model to
+new data. Large inputs are read in chunks which are scored in a process pool;
+predictions are yielded in input order, so memory use is bounded by the
+number of chunks in flight rather than by the size of the input. Repeated
+rows can be served from a prediction cache (see ml_pipeline.prediction_cache)
+of each worker.
+"""
+
+import collections
+import hashlib
+import os
+import pathlib
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Iterable, Iterator, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from ml_pipeline import (
+    block_compression,
+    config,
+    dataset_factory,
+    grouped,
+    model_factory,
+    resources,
+)
+from ml_pipeline.encoding import CategoricalEncoder
+from ml_pipeline.feature_plan import FeaturePlan
+from ml_pipeline.hashing import FeatureHasher
+from ml_pipeline.prediction_cache import CacheStats, PredictionCache
+
+if TYPE_CHECKING:
+    from ml_pipeline.dataset import Dataset
+
+
+class BatchScorer:
+    """Scores data frames with the artifacts of a training run.
+
+    Usage example:
+        scorer = BatchScorer(
+            "config/projects/iris_classification.yaml",
+            "artifacts/iris_classification/1753063141",
+        )
+        predictions = scorer.score(df)
+    """
+
+    def __init__(
+        self,
+        project_config_path: str,
+        artifact_dir: str,
+        cache_size: Union[int, str] = None,
+        cache_ttl: float = None,
+    ) -> None:
+        """Loads the run's artifacts.
+
+        Args:
+            project_config_path (str): Path to the project configuration file
+                the run was trained with.
+            artifact_dir (str): Path to the run's artifact directory.
+            cache_size (Union[int, str]): Memory cap of a cache of the
+                predictions of repeated rows, e.g. "64M". Defaults to no
+                cache.
+            cache_ttl (float): Seconds cached predictions stay valid.
+                Defaults to no expiry.
+        """
+        project_config_path = pathlib.Path(project_config_path)
+        self.config = config.Config(
+            project_config_path.parent.parent, project_config_path.stem
+        )
+        self.config.load()
+        project = self.config.items.project
+        self.artifact_dir = artifact_dir
+
+        self.dataset_class = dataset_factory.DatasetFactory(
+            self.config.items.datasets
+        ).datasets[project.dataset]["class"]
+
+        self.model = model_factory.ModelFactory().get(
+            project.model.name,
+            project.model.params,
+            project.training,
+            artifact_dir,
+            None,
+        )
+        model_path = block_compression.resolve(f"{artifact_dir}/model.joblib")
+        self.model.load(model_path)
+
+        # predictions of repeated rows, keyed by the model's digest
+        self.cache = None
+        if cache_size:
+            digest = hashlib.sha256()
+            with open(model_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+            self.cache = PredictionCache(
+                cache_size, ttl=cache_ttl, model_version=digest.hexdigest()
+            )
+
+        # parameters fitted by the dataset's pre-processing
+        self.preprocessing_params = {}
+        path = f"{artifact_dir}/preprocessing.npz"
+        if os.path.exists(path):
+            with np.load(path, allow_pickle=False) as params:
+                self.preprocessing_params = dict(params)
+
+        # features derived during training
+        self.feature_plan = FeaturePlan({})
+        path = f"{artifact_dir}/feature_plan.json"
+        if os.path.exists(path):
+            self.feature_plan = FeaturePlan.load(path)
+        self.features = list(project.features) + [
+            name
+            for name in self.feature_plan.names
+            if name not in project.features
+        ]
+        # grouped models also take the group columns
+        self.features += [
+            column
+            for column in grouped.group_columns(project.get("group_by"))
+            if column not in self.features
+        ]
+
+        # hasher of high-cardinality feature columns
+        path = f"{artifact_dir}/feature_hasher.json"
+        if os.path.exists(path):
+            self.model.hasher = FeatureHasher.load(path)
+
+        # decoder of the predicted class codes
+        self.encoder = None
+        path = f"{artifact_dir}/encodings.json"
+        if os.path.exists(path):
+            self.encoder = CategoricalEncoder.load(path)
+
+    def dataset(self) -> "Dataset":
+        """Returns an empty dataset of the type the run was trained on."""
+        return self.dataset_class()
+
+    def score(self, df: "pd.DataFrame") -> "pd.DataFrame":
+        """Scores a chunk of data.
+
+        Args:
+            df (pd.DataFrame): Raw data with the dataset's columns.
+        Returns:
+            pd.DataFrame: A "prediction" column, plus a "label" column for
+                classifiers, with the same index as `df`. Rows dropped by the
+                pre-processing get missing predictions.
+        """
+        dataset = self.dataset()
+        dataset.df = df.copy()
+        dataset.preprocess(inference=True, **self.preprocessing_params)
+        dataset.df = self.feature_plan.apply(dataset.df)
+
+        result = pd.DataFrame(index=dataset.df.index)
+        if len(dataset.df) > 0 and self.cache is not None:
+            result["prediction"] = self.cache.predict(
+                dataset.df[self.features], self.model.predict
+            )
+        elif len(dataset.df) > 0:
+            result["prediction"] = self.model.predict(
+                dataset.df[self.features]
+            )
+        else:
+            result["prediction"] = np.empty(0)
+        if self.encoder is not None:
+            result["label"] = self.encoder.decode(result["prediction"])
+
+        return result.reindex(df.index)
+
+
+def read_chunks(
+    path: str, chunksize: int, names: list = None
+) -> Iterator["pd.DataFrame"]:
+    """Reads a CSV or JSON-lines file in chunks.
+
+    Args:
+        path (str): Input path. Files ending in .jsonl or .json are read as
+            JSON lines, everything else as CSV.
+        chunksize (int): Rows per chunk.
+        names (list): Column names for CSV files without a header row.
+    """
+    if path.endswith((".jsonl", ".json")):
+        reader = pd.read_json(path, lines=True, chunksize=chunksize)
+    elif names is not None:
+        reader = pd.read_csv(path, names=names, chunksize=chunksize)
+    else:
+        reader = pd.read_csv(path, chunksize=chunksize)
+
+    with reader:
+        yield from reader
+
+
+# scorer of a worker process, set by _init_worker
+_scorer = None
+
+
+def _init_worker(
+    project_config_path: str,
+    artifact_dir: str,
+    cache_size: Union[int, str],
+    cache_ttl: float,
+) -> None:
+    global _scorer
+    _scorer = BatchScorer(
+        project_config_path, artifact_dir, cache_size, cache_ttl
+    )
+
+
+def _score(df: "pd.DataFrame") -> Tuple["pd.DataFrame", "CacheStats"]:
+    # the predictions, and the cache statistics of the chunk
+    result = _scorer.score(df)
+    if _scorer.cache is None:
+        return result, None
+    return result, _scorer.cache.reset_stats()
+
+
+def score_chunks(
+    project_config_path: str,
+    artifact_dir: str,
+    chunks: Iterable["pd.DataFrame"],
+    max_workers: int = None,
+    cores: int = None,
+    cache_size: Union[int, str] = None,
+    cache_ttl: float = None,
+    cache_stats: "CacheStats" = None,
+) -> Iterator["pd.DataFrame"]:
+    """Scores chunks in a process pool, yielding results in input order.
+
+    At most two chunks per worker are in flight, so memory use stays bounded
+    however long the input is.
+
+    Args:
+        project_config_path (str): Path to the project configuration file.
+        artifact_dir (str): Path to the run's artifact directory.
+        chunks (Iterable[pd.DataFrame]): Raw data chunks.
+        max_workers (int): Number of worker processes. Defaults to the number
+            of CPUs.
+        cores (int): Number of cores divided between the workers' BLAS and
+            OpenMP threads (see ml_pipeline.resources). Defaults to all
+            cores.
+        cache_size (Union[int, str]): Memory cap of each worker's cache of
+            the predictions of repeated rows (see BatchScorer). Defaults to
+            no cache.
+        cache_ttl (float): Seconds cached predictions stay valid.
+        cache_stats (CacheStats): If set, the cache statistics of the scored
+            chunks are merged into it.
+    """
+    budget = resources.CoreBudget(cores)
+    max_workers = max_workers or budget.cores
+    initializer, initargs = resources.worker_initializer(
+        budget.threads(max_workers),
+        _init_worker,
+        (project_config_path, artifact_dir, cache_size, cache_ttl),
+    )
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=initializer,
+        initargs=initargs,
+    ) as executor:
+        pending = collections.deque()
+
+        def result() -> "pd.DataFrame":
+            df, stats = pending.popleft().result()
+            if cache_stats is not None and stats is not None:
+                cache_stats.merge(stats)
+            return df
+
+        for chunk in chunks:
+            pending.append(executor.submit(_score, chunk))
+            if len(pending) >= 2 * max_workers:
+                yield result()
+        while pending:
+            yield result()
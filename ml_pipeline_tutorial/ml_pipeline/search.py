@@ -0,0 +1,216 @@
+"""Successive-halving search over model parameters.
+
+All candidate parameter settings are first trained on a small sample of the
+training rows. Only the best `1 / factor` of them advance to the next rung,
+which trains on `factor` times as many rows, until the last candidates train
+on all rows. Most of the compute therefore goes into the few promising
+candidates rather than into evaluating every candidate on the full data.
+
+Candidates of a rung are trained concurrently in a process pool. Every
+candidate is scored on the same held-out validation rows with the
+estimator's own `score` method (accuracy for classifiers, R^2 for
+regressors), so higher is always better.
+"""
+
+import math
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Mapping, Tuple, Union
+
+import numpy as np
+
+from sklearn.base import clone
+from sklearn.model_selection import ParameterGrid, ParameterSampler
+
+from ml_pipeline import resources, tracing
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from scipy import sparse
+
+
+def candidates(
+    params: Mapping[str, list], n_candidates: int = None, seed: int = None
+) -> List[Dict]:
+    """Expands a parameter grid into a list of candidate settings.
+
+    Args:
+        params (Mapping[str, list]): Values to try for each parameter.
+        n_candidates (int): If set and smaller than the grid, sample this
+            many settings from the grid instead.
+        seed (int): Seed of the sampling.
+    Returns:
+        List[Dict]: Candidate parameter settings.
+    """
+    params = {name: list(values) for name, values in params.items()}
+    grid = ParameterGrid(params)
+    if n_candidates is None or n_candidates >= len(grid):
+        return list(grid)
+    return list(ParameterSampler(params, n_candidates, random_state=seed))
+
+
+def schedule(
+    n_candidates: int, n_rows: int, factor: int = 3, min_rows: int = 20
+) -> List[Tuple[int, int]]:
+    """Number of candidates and of training rows of each rung.
+
+    Args:
+        n_candidates (int): Number of candidates of the first rung.
+        n_rows (int): Number of training rows of the last rung.
+        factor (int): Reduction factor of the candidates, and growth factor
+            of the rows, from one rung to the next.
+        min_rows (int): Minimum number of training rows of a rung.
+    Returns:
+        List[Tuple[int, int]]: (candidates, rows) of each rung.
+    """
+    if factor < 2:
+        raise ValueError("The successive-halving factor must be at least 2")
+
+    # as many rungs as it takes to reduce the candidates to one, but never
+    # starting below `min_rows`
+    n_rungs = 1
+    while (
+        factor**n_rungs <= n_candidates
+        and n_rows / factor**n_rungs >= min_rows
+    ):
+        n_rungs += 1
+
+    rungs = []
+    for rung in range(n_rungs):
+        rows = math.ceil(n_rows / factor ** (n_rungs - 1 - rung))
+        rungs.append((n_candidates, min(rows, n_rows)))
+        n_candidates = max(math.ceil(n_candidates / factor), 1)
+    return rungs
+
+
+# training and validation data of a worker process, set by _init_worker
+_data = None
+
+
+def _init_worker(
+    estimator,
+    X: "pd.DataFrame",
+    y: "np.ndarray",
+    X_val: "pd.DataFrame",
+    y_val: "np.ndarray",
+) -> None:
+    global _data
+    _data = (estimator, X, y, X_val, y_val)
+
+
+def _take(
+    X: "Union[pd.DataFrame, sparse.spmatrix]", rows
+) -> "Union[pd.DataFrame, sparse.spmatrix]":
+    # rows of a data frame, or of a sparse design matrix (see
+    # ml_pipeline.hashing)
+    return X.iloc[rows] if hasattr(X, "iloc") else X[rows]
+
+
+def _evaluate(params: Dict, n_rows: int) -> Dict:
+    estimator, X, y, X_val, y_val = _data
+    try:
+        estimator = clone(estimator).set_params(**params)
+        with tracing.span("fit candidate", cat="fit", rows=n_rows):
+            estimator.fit(_take(X, slice(n_rows)), y[:n_rows])
+        return {
+            "params": params,
+            "score": float(estimator.score(X_val, y_val)),
+        }
+    except Exception as e:
+        # e.g. a class missing from a small sample; the candidate is dropped
+        return {"params": params, "score": None, "error": str(e)}
+
+
+def successive_halving(
+    estimator,
+    params: List[Dict],
+    X: "Union[pd.DataFrame, sparse.spmatrix]",
+    y: "np.ndarray",
+    factor: int = 3,
+    min_rows: int = 20,
+    validation_split: float = 0.2,
+    max_workers: int = None,
+    seed: int = None,
+    threads: int = None,
+) -> Tuple[Dict, List[Dict]]:
+    """Searches for the best parameters of an estimator.
+
+    Args:
+        estimator: Unfitted scikit-learn estimator; candidates are clones
+            with their parameters set.
+        params (List[Dict]): Candidate parameter settings, e.g. from
+            `candidates`.
+        X (Union[pd.DataFrame, sparse.spmatrix]): Training features, or
+            their sparse design matrix.
+        y (np.ndarray): Training targets.
+        factor (int): Only the best `1 / factor` of the candidates of a rung
+            advance to the next, which trains on `factor` times more rows.
+        min_rows (int): Minimum number of training rows of the first rung.
+        validation_split (float): Fraction of the rows held out to score the
+            candidates.
+        max_workers (int): Number of worker processes. Defaults to the number
+            of CPUs.
+        seed (int): Seed of the row shuffling.
+        threads (int): Number of threads of each worker: the candidates'
+            `n_jobs`, if they have one, and the limit of the workers' BLAS,
+            OpenMP and numexpr threads (see ml_pipeline.resources). Not
+            limited by default.
+    Returns:
+        Tuple[Dict, List[Dict]]: The best parameters, and the rungs with the
+            number of rows and the score of every candidate.
+    Raises:
+        ValueError: No candidate could be trained.
+    """
+    if not params:
+        raise ValueError("No candidate parameters to search")
+
+    # growing samples are prefixes of one shuffled order, so that every rung
+    # sees the rows of the previous rungs
+    order = np.random.default_rng(seed).permutation(X.shape[0])
+    n_val = max(int(X.shape[0] * validation_split), 1)
+    idx_val, idx_train = order[:n_val], order[n_val:]
+    y = np.asarray(y)
+    if threads is not None and "n_jobs" in estimator.get_params():
+        estimator = clone(estimator).set_params(n_jobs=threads)
+    data = (
+        estimator,
+        _take(X, idx_train),
+        y[idx_train],
+        _take(X, idx_val),
+        y[idx_val],
+    )
+
+    rungs = []
+    max_workers = max_workers or os.cpu_count() or 1
+    initializer, initargs = _init_worker, data
+    if threads is not None:
+        initializer, initargs = resources.worker_initializer(
+            threads, _init_worker, data
+        )
+    with ProcessPoolExecutor(
+        max_workers=min(max_workers, len(params)),
+        initializer=initializer,
+        initargs=initargs,
+    ) as executor:
+        for rung, (n_candidates, n_rows) in enumerate(
+            schedule(len(params), len(idx_train), factor, min_rows)
+        ):
+            results = list(
+                executor.map(_evaluate, params, [n_rows] * len(params))
+            )
+            rungs.append({"rung": rung, "rows": n_rows, "results": results})
+
+            # advance the best candidates, dropping the failed ones
+            ranked = sorted(
+                (result for result in results if result["score"] is not None),
+                key=lambda result: result["score"],
+                reverse=True,
+            )
+            if not ranked:
+                raise ValueError("No candidate could be trained")
+            n_next = max(math.ceil(n_candidates / factor), 1)
+            params = [result["params"] for result in ranked[:n_next]]
+
+    return ranked[0]["params"], rungs
@@ -0,0 +1,277 @@
+"""Sharded, multi-process pre-processing and feature engineering.
+
+A data frame is split into row shards which are written to a directory
+together with a manifest. Pre-processing then runs as a map-reduce over a
+process pool:
+
+1. map: every worker computes mergeable statistics (RunningStats) of the
+   dataset's numeric columns on its shard;
+2. reduce: the partial statistics are merged into statistics of the whole
+   dataset, exactly equal to the ones computed on a single data frame;
+3. map: every worker pre-processes its shard with the merged statistics and
+   writes the result as a new shard.
+
+Feature engineering is row-wise and maps over the pre-processed shards the
+same way.
+"""
+
+import functools
+import json
+import os
+import pathlib
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Callable, Dict, List, Mapping, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ml_pipeline import resources, tracing
+from ml_pipeline.feature_plan import FeaturePlan
+from ml_pipeline.statistics import RunningStats
+
+if TYPE_CHECKING:
+    from ml_pipeline.dataset import Dataset
+
+
+class Shards:
+    """Row shards of a data frame, described by a manifest.
+
+    Usage example:
+        shards = Shards.split(df, "artifacts/shards/raw", num_shards=8)
+        df = shards.concat()
+    """
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, directory: str) -> None:
+        """Opens existing shards.
+
+        Args:
+            directory (str): Directory with the shards and their manifest.
+        """
+        self.directory = pathlib.Path(directory)
+        with open(self.directory / self.MANIFEST, "r") as f:
+            self.manifest = json.load(f)
+
+    @property
+    def paths(self) -> List[str]:
+        """Paths of the shards, in row order."""
+        return [
+            str(self.directory / shard["path"])
+            for shard in self.manifest["shards"]
+        ]
+
+    @property
+    def rows(self) -> int:
+        """Total number of rows."""
+        return sum(shard["rows"] for shard in self.manifest["shards"])
+
+    @classmethod
+    def write(cls, directory: str, frames: List["pd.DataFrame"]) -> "Shards":
+        """Writes data frames as shards.
+
+        Args:
+            directory (str): Output directory. Created if missing.
+            frames (List[pd.DataFrame]): The shards, in row order.
+        Returns:
+            Shards: The written shards.
+        """
+        pathlib.Path(directory).mkdir(parents=True, exist_ok=True)
+        entries = [
+            _write_shard(frame, directory, f"shard-{i:05d}.pkl")
+            for i, frame in enumerate(frames)
+        ]
+        return cls.from_entries(directory, entries)
+
+    @classmethod
+    def from_entries(cls, directory: str, entries: List[Dict]) -> "Shards":
+        """Writes the manifest of shards written by `_write_shard`."""
+        manifest = {
+            "columns": entries[0]["columns"] if entries else [],
+            "shards": [
+                {"path": entry["path"], "rows": entry["rows"]}
+                for entry in entries
+            ],
+        }
+        with open(pathlib.Path(directory) / cls.MANIFEST, "w") as f:
+            json.dump(manifest, f, indent=2)
+        return cls(directory)
+
+    @classmethod
+    def split(
+        cls, df: "pd.DataFrame", directory: str, num_shards: int
+    ) -> "Shards":
+        """Splits a data frame into shards of (almost) equal row counts."""
+        num_shards = max(min(num_shards, len(df)), 1)
+        bounds = np.linspace(0, len(df), num_shards + 1).astype(int)
+        return cls.write(
+            directory,
+            [df.iloc[start:end] for start, end in zip(bounds, bounds[1:])],
+        )
+
+    def concat(self) -> "pd.DataFrame":
+        """Reads all shards into one data frame."""
+        frames = [pd.read_pickle(path) for path in self.paths]
+        if len(frames) == 1:
+            return frames[0]
+        return pd.concat(frames)
+
+    def map(
+        self, func: Callable, max_workers: int = None, threads: int = None
+    ) -> List:
+        """Calls `func(path)` for every shard in a process pool.
+
+        Args:
+            func (Callable): Picklable function of a shard path.
+            max_workers (int): Number of worker processes. Defaults to the
+                number of CPUs.
+            threads (int): Number of BLAS, OpenMP and numexpr threads of each
+                worker (see ml_pipeline.resources). Not limited by default.
+        Returns:
+            List: The results, in shard order.
+        """
+        paths = self.paths
+        max_workers = min(max_workers or os.cpu_count() or 1, len(paths))
+        if max_workers <= 1:
+            return [func(path) for path in paths]
+        initializer, initargs = None, ()
+        if threads is not None:
+            initializer, initargs = resources.worker_initializer(threads)
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=initializer,
+            initargs=initargs,
+        ) as executor:
+            return list(executor.map(func, paths))
+
+
+def _write_shard(df: "pd.DataFrame", directory: str, path: str) -> Dict:
+    df.to_pickle(os.path.join(directory, path))
+    return {
+        "path": path,
+        "rows": len(df),
+        "columns": [str(column) for column in df.columns],
+    }
+
+
+def _statistics(path: str, columns: List[str]) -> "RunningStats":
+    with tracing.span("statistics", cat="transform", shard=path):
+        df = pd.read_pickle(path)
+        return RunningStats(columns).update(
+            df[columns].to_numpy(dtype=np.float64)
+        )
+
+
+def _preprocess(
+    path: str, dataset_class: type, statistics: "RunningStats", directory: str
+) -> Tuple[Dict, Dict]:
+    with tracing.span("preprocess", cat="transform", shard=path):
+        dataset = dataset_class()
+        dataset.df = pd.read_pickle(path)
+        dataset.statistics = statistics
+        dataset.preprocess()
+        entry = _write_shard(dataset.df, directory, os.path.basename(path))
+    return dataset.preprocessing_params, entry
+
+
+def _feature_engineer(
+    path: str, definitions: Mapping[str, str], directory: str
+) -> Dict:
+    with tracing.span("feature_engineer", cat="transform", shard=path):
+        df = FeaturePlan(definitions).apply(pd.read_pickle(path))
+        return _write_shard(df, directory, os.path.basename(path))
+
+
+def preprocess(
+    dataset: "Dataset",
+    shards: "Shards",
+    directory: str,
+    max_workers: int = None,
+    threads: int = None,
+) -> "Shards":
+    """Pre-processes shards of a dataset in parallel.
+
+    The statistics of the dataset's `numeric_columns` (if any) are reduced
+    from per-shard partial statistics, so the result equals pre-processing
+    the whole data frame at once. The fitted parameters are set as the
+    dataset's `preprocessing_params`.
+
+    Args:
+        dataset (Dataset): Dataset whose `preprocess` is applied. Its class
+            is instantiated without arguments in the workers.
+        shards (Shards): Shards of the dataset's data frame.
+        directory (str): Output directory of the pre-processed shards.
+        max_workers (int): Number of worker processes. Defaults to the
+            number of CPUs.
+        threads (int): Number of BLAS, OpenMP and numexpr threads of each
+            worker. Not limited by default.
+    Returns:
+        Shards: The pre-processed shards.
+    """
+    statistics = None
+    columns = list(getattr(dataset, "numeric_columns", []))
+    if columns:
+        partials = shards.map(
+            functools.partial(_statistics, columns=columns),
+            max_workers,
+            threads,
+        )
+        statistics = functools.reduce(RunningStats.merge, partials)
+    dataset.statistics = statistics
+
+    pathlib.Path(directory).mkdir(parents=True, exist_ok=True)
+    results = shards.map(
+        functools.partial(
+            _preprocess,
+            dataset_class=type(dataset),
+            statistics=statistics,
+            directory=str(directory),
+        ),
+        max_workers,
+        threads,
+    )
+    # every shard was pre-processed with the same parameters
+    dataset.preprocessing_params = results[0][0] if results else {}
+    return Shards.from_entries(directory, [entry for _, entry in results])
+
+
+def feature_engineer(
+    dataset: "Dataset",
+    shards: "Shards",
+    directory: str,
+    features: List[str],
+    definitions: Mapping[str, str] = None,
+    max_workers: int = None,
+    threads: int = None,
+) -> Tuple["Shards", List[str]]:
+    """Feature-engineers shards of a dataset in parallel.
+
+    Args:
+        dataset (Dataset): Dataset whose `feature_plan` is set.
+        shards (Shards): Pre-processed shards.
+        directory (str): Output directory of the feature-engineered shards.
+        features (List[str]): List of features to be used in training.
+        definitions (Mapping[str, str]): Derived feature name to expression.
+        max_workers (int): Number of worker processes. Defaults to the
+            number of CPUs.
+        threads (int): Number of BLAS, OpenMP and numexpr threads of each
+            worker. Not limited by default.
+    Returns:
+        Tuple[Shards, List[str]]: The feature-engineered shards and the
+            updated list of features to be used in training.
+    """
+    dataset.feature_plan = FeaturePlan(definitions or {})
+    pathlib.Path(directory).mkdir(parents=True, exist_ok=True)
+    entries = shards.map(
+        functools.partial(
+            _feature_engineer,
+            definitions=dataset.feature_plan.definitions,
+            directory=str(directory),
+        ),
+        max_workers,
+        threads,
+    )
+    return Shards.from_entries(directory, entries), features + [
+        name for name in dataset.feature_plan.names if name not in features
+    ]
@@ -0,0 +1,109 @@
+"""Mergeable summary statistics.
+
+This module computes per-column counts, means and variances in a form that
+can be updated with new rows and merged across partial results (Chan et al.'s
+parallel variance algorithm), so statistics over appended or sharded data
+never need a second pass over rows that were already seen.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+
+class RunningStats:
+    """Per-column count, mean and sum of squared deviations.
+
+    Usage example:
+        stats = RunningStats(["a", "b"])
+        stats.update(df[["a", "b"]].to_numpy())
+        stats.merge(other_stats)
+        mean, std = stats.mean, stats.std()
+    """
+
+    def __init__(self, columns: List[str]) -> None:
+        """Instantiates empty statistics.
+
+        Args:
+            columns (List[str]): Names of the columns.
+        """
+        self.columns = [str(column) for column in columns]
+        self.count = np.zeros(len(self.columns), dtype=np.int64)
+        self.mean = np.zeros(len(self.columns), dtype=np.float64)
+        self.m2 = np.zeros(len(self.columns), dtype=np.float64)
+
+    def update(self, values: "np.ndarray") -> "RunningStats":
+        """Adds rows.
+
+        Args:
+            values (np.ndarray): Array of shape (num_rows, len(columns)).
+                Missing values (NaN) are skipped, like pandas does.
+        Returns:
+            RunningStats: self.
+        """
+        values = np.asarray(values, dtype=np.float64).reshape(
+            -1, len(self.columns)
+        )
+        valid = ~np.isnan(values)
+        count = valid.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(valid, values, 0.0).sum(axis=0) / count
+            m2 = np.where(valid, values - mean, 0.0)
+        m2 = (m2 * m2).sum(axis=0)
+
+        batch = RunningStats(self.columns)
+        batch.count = count
+        batch.mean = np.nan_to_num(mean)
+        batch.m2 = m2
+        return self.merge(batch)
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """Merges statistics of other rows into these.
+
+        Args:
+            other (RunningStats): Statistics of the same columns.
+        Returns:
+            RunningStats: self.
+        Raises:
+            ValueError: The statistics are of different columns.
+        """
+        if other.columns != self.columns:
+            raise ValueError("Cannot merge statistics of different columns")
+
+        count = self.count + other.count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = other.mean - self.mean
+            weight = np.where(count > 0, other.count / count, 0.0)
+            self.mean = self.mean + delta * weight
+            self.m2 = self.m2 + other.m2 + delta**2 * self.count * weight
+        self.count = count
+        return self
+
+    def var(self, ddof: int = 1) -> "np.ndarray":
+        """Variance of each column (sample variance by default)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(
+                self.count > ddof, self.m2 / (self.count - ddof), np.nan
+            )
+
+    def std(self, ddof: int = 1) -> "np.ndarray":
+        """Standard deviation of each column (sample by default)."""
+        return np.sqrt(self.var(ddof))
+
+    def to_dict(self) -> Dict:
+        """Serialisable representation of the statistics."""
+        return {
+            "columns": self.columns,
+            "count": self.count.tolist(),
+            "mean": self.mean.tolist(),
+            "m2": self.m2.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, items: Dict) -> "RunningStats":
+        """Statistics from their `to_dict` representation."""
+        stats = cls(items["columns"])
+        stats.count = np.array(items["count"], dtype=np.int64)
+        stats.mean = np.array(items["mean"], dtype=np.float64)
+        stats.m2 = np.array(items["m2"], dtype=np.float64)
+        return stats
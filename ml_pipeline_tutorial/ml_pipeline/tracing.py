@@ -0,0 +1,193 @@
+"""Timeline traces of pipeline runs.
+
+Spans are recorded as complete events of the Chrome trace event format, so a
+trace file opens in chrome://tracing and in Perfetto (ui.perfetto.dev). Every
+process and thread gets its own track, which shows how parallel work
+overlaps, where workers sit idle and which ones straggle.
+
+Tracing is off unless started, and `span` then costs a global lookup. Each
+process appends its events to its own file in a temporary directory as soon
+as a span ends; worker processes forked while a trace is started inherit the
+tracer and write to their own files. `stop` merges the files into the trace.
+
+Usage example:
+    tracing.start("artifacts/iris/<run id>/trace.json")
+    with tracing.span("load_data", cat="task"):
+        with tracing.span("parse", path=path):
+            ...
+    tracing.stop()
+"""
+
+import contextlib
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from typing import Any, Dict, Iterator, TextIO
+
+# tracer of the running trace, if any
+_tracer = None
+
+
+def _now() -> float:
+    # microseconds of the system-wide monotonic clock, comparable across
+    # processes
+    return time.monotonic_ns() / 1000
+
+
+class Tracer:
+    """Records spans to per-process event files and merges them."""
+
+    def __init__(self, path: str) -> None:
+        """Instantiates the tracer.
+
+        Args:
+            path (str): Path of the trace file written by `save`.
+        """
+        self.path = path
+        self.directory = tempfile.mkdtemp(prefix="ml_pipeline_trace_")
+        self.lock = threading.Lock()
+        # event file of this process, with the process id it was opened by
+        self._file = None
+        self._pid = None
+        self._threads = set()
+
+    def _events(self) -> TextIO:
+        pid = os.getpid()
+        if self._pid != pid:
+            # first event of this (possibly forked) process
+            self._file = open(
+                os.path.join(self.directory, f"{pid}.jsonl"), "a", buffering=1
+            )
+            self._pid = pid
+            self._threads = set()
+            self._write(
+                {
+                    "name": "process_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "args": {"name": multiprocessing.current_process().name},
+                }
+            )
+        tid = threading.get_native_id()
+        if tid not in self._threads:
+            self._threads.add(tid)
+            self._write(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {"name": threading.current_thread().name},
+                }
+            )
+        return self._file
+
+    def _write(self, event: Dict) -> None:
+        self._file.write(json.dumps(event, default=str) + "\n")
+
+    def record(
+        self, name: str, cat: str, start: float, end: float, args: Dict
+    ) -> None:
+        """Records a span of the calling thread.
+
+        Args:
+            name (str): Name of the span.
+            cat (str): Category of the span, e.g. "task".
+            start (float): Start time in microseconds (see `span`).
+            end (float): End time in microseconds.
+            args (Dict): Additional fields shown with the span.
+        """
+        with self.lock:
+            self._events()
+            self._write(
+                {
+                    "name": name,
+                    "cat": cat,
+                    "ph": "X",
+                    "ts": start,
+                    "dur": end - start,
+                    "pid": os.getpid(),
+                    "tid": threading.get_native_id(),
+                    "args": args,
+                }
+            )
+
+    def save(self) -> None:
+        """Merges the event files of all processes into the trace file."""
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+                self._pid = None
+
+        events = []
+        for name in sorted(os.listdir(self.directory)):
+            with open(os.path.join(self.directory, name), "r") as f:
+                events += [json.loads(line) for line in f if line.strip()]
+
+        # write to a temporary file first so that readers never see a
+        # partially-written trace
+        directory, name = os.path.split(os.path.abspath(self.path))
+        tmp_path = os.path.join(directory, f".tmp-{os.getpid()}-{name}")
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def _after_fork() -> None:
+    # the lock may have been held by another thread of the parent
+    if _tracer is not None:
+        _tracer.lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def start(path: str) -> "Tracer":
+    """Starts tracing spans to a trace file."""
+    global _tracer
+    _tracer = Tracer(path)
+    return _tracer
+
+
+def stop() -> None:
+    """Stops tracing and writes the trace file, if tracing."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.save()
+
+
+@contextlib.contextmanager
+def span(name: str, cat: str = "", **args: Any) -> Iterator[None]:
+    """Traces the enclosed code as a span, if tracing.
+
+    Spans of the same thread nest by their times. Also usable as a function
+    decorator.
+
+    Args:
+        name (str): Name of the span.
+        cat (str): Category: "task", "load", "transform", "fit", "predict"
+            or "artifact".
+        **args: Additional fields shown with the span.
+    """
+    tracer = _tracer
+    if tracer is None:
+        yield
+        return
+
+    start_time = _now()
+    try:
+        yield
+    finally:
+        tracer.record(name, cat, start_time, _now(), args)
@@ -1,54 +1,290 @@
+import atexit
+import contextlib
+import datetime
+import json
 import logging
-import time
+import logging.handlers
+import multiprocessing
+import os
+import queue
+import secrets
+
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from ml_pipeline import tracing
+
+# queue listeners of the configured loggers, by logger name
+_listeners: Dict[str, list] = {}
+
+# loggers set up by Logger, by name
+_loggers: Dict[str, "Logger"] = {}
 
 
 class Logger:
     """Logger class.
 
+    Records are put on a queue by the calling thread and written to the
+    console and the log file, if any, by a background listener thread, so
+    logging never blocks the pipeline on I/O. Log files hold one JSON object
+    per line, including the fields of structured events (see `event`).
+
     Usage example:
         logger = Logger("ml-pipeline", debug=True).get()
     """
 
-    def __init__(self, name: str, debug: bool = False):
+    def __init__(
+        self,
+        name: str,
+        debug: bool = False,
+        log_path: str = None,
+    ):
         """Create and set up the logger.
+
+        Setting up a logger with the same name again replaces its handlers,
+        so records are never duplicated.
+
         Args:
             name (str): Name of logger.
-            debug (bool): Log debug messages in console.
+            debug (bool): Log debug messages. Debug payloads wrapped in `Lazy`
+                are only computed when this is set.
+            log_path (str): Path to a JSON log file shared by all records of
+                the process. Optional; pipeline runs log to a file in their
+                artifact directory (see `add_log_file`).
         Returns:
             logging.Logger: Logger object.
         """
+        self.name = name
         self.logger = logging.getLogger(name)
+        self.logger.propagate = False
 
         # set the minimum logging level
-        self.logger.setLevel(logging.DEBUG)
+        self.level = logging.DEBUG if debug else logging.INFO
+        self.logger.setLevel(self.level)
 
-        # set console logging level
-        if debug:
-            console_level = logging.DEBUG
-        else:
-            console_level = logging.INFO
+        # remove handlers attached by a previous instantiation; listeners
+        # of worker records forward to the others, so stop them first
+        for listener in reversed(_listeners.pop(name, [])):
+            _stop_listener(listener)
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+            handler.close()
 
         # set up console handler
         console_handler = logging.StreamHandler()
-        console_handler.setLevel(console_level)
         # for console logs, just use level name and message
         console_handler.setFormatter(
             logging.Formatter("%(levelname)s: %(message)s")
         )
-        self.logger.addHandler(console_handler)
-
-        # set up file handler
-        file_handler = logging.FileHandler("/tmp/ml_pipeline.log")
-        file_handler.setLevel(logging.DEBUG)
-        # for file logs, provide more details
-        formatter = logging.Formatter(
-            "%(asctime)s:%(name)s:%(levelname)s: %(message)s"
+
+        self.handlers = (console_handler,)
+        if log_path is not None:
+            self.handlers += (_file_handler(log_path),)
+
+        # the pipeline thread only enqueues records
+        record_queue = queue.SimpleQueue()
+        self.logger.addHandler(logging.handlers.QueueHandler(record_queue))
+        self._start_listener(record_queue)
+
+        self._worker_queue = None
+        _loggers[name] = self
+
+    def _start_listener(self, record_queue: "queue.Queue") -> None:
+        listener = logging.handlers.QueueListener(
+            record_queue, *self.handlers, respect_handler_level=True
         )
-        # show time in UTC
-        formatter.converter = time.gmtime
-        file_handler.setFormatter(formatter)
-        self.logger.addHandler(file_handler)
+        listener.start()
+        atexit.register(_stop_listener, listener)
+        _listeners.setdefault(self.name, []).append(listener)
 
     def get(self) -> "logging.Logger":
         """Get a prepared logger object."""
-        return self.logger
\ No newline at end of file
+        return self.logger
+
+    def worker_initializer(self) -> tuple:
+        """Initializer for process pools whose workers should log.
+
+        Records logged in the workers are sent to this logger's handlers
+        through a multiprocessing queue; putting a record on it never waits
+        for the pipeline process. Pools initialised by
+        `resources.worker_initializer` set this up for every logger (see
+        `worker_loggers`).
+
+        Usage example:
+            initializer, initargs = logger.worker_initializer()
+            ProcessPoolExecutor(initializer=initializer, initargs=initargs)
+
+        Returns:
+            tuple: Initializer function and its arguments.
+        """
+        if self._worker_queue is None:
+            self._worker_queue = multiprocessing.Queue()
+            # handled by the logger, so that records also reach the log
+            # files added by `add_log_file`
+            listener = logging.handlers.QueueListener(
+                self._worker_queue, _Forward(self.logger)
+            )
+            listener.start()
+            atexit.register(_stop_listener, listener)
+            _listeners.setdefault(self.name, []).append(listener)
+        return init_worker_logging, (self._worker_queue, self.name, self.level)
+
+
+def worker_loggers() -> List[Tuple["multiprocessing.Queue", str, int]]:
+    """Arguments of `init_worker_logging` of every logger set up by Logger.
+
+    Workers calling `init_worker_logging` with them log to the loggers'
+    handlers in this process.
+    """
+    return [logger.worker_initializer()[1] for logger in _loggers.values()]
+
+
+class _Forward(logging.Handler):
+    # hands the records of worker processes to a logger of this process
+
+    def __init__(self, logger: "logging.Logger") -> None:
+        super().__init__()
+        self.logger = logger
+
+    def emit(self, record: "logging.LogRecord") -> None:
+        self.logger.handle(record)
+
+
+def _file_handler(path: str) -> "logging.FileHandler":
+    file_handler = logging.FileHandler(path)
+    # for file logs, provide more details
+    file_handler.setFormatter(JSONFormatter())
+    return file_handler
+
+
+def add_log_file(
+    logger: "logging.Logger", path: str
+) -> "logging.handlers.QueueHandler":
+    """Also writes a logger's records to a JSON log file.
+
+    Like the other handlers, the file is written by a background listener
+    thread.
+
+    Usage example:
+        handler = add_log_file(logger, f"{artifact_dir}/pipeline.log")
+        ...
+        remove_log_file(logger, handler)
+
+    Args:
+        logger (logging.Logger): Logger set up by `Logger`.
+        path (str): Path to the log file. Records are appended.
+    Returns:
+        logging.handlers.QueueHandler: Handler to pass to `remove_log_file`.
+    """
+    record_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(
+        record_queue, _file_handler(path)
+    )
+    listener.start()
+    atexit.register(_stop_listener, listener)
+    _listeners.setdefault(logger.name, []).append(listener)
+
+    handler = logging.handlers.QueueHandler(record_queue)
+    handler.listener = listener
+    logger.addHandler(handler)
+    return handler
+
+
+def remove_log_file(
+    logger: "logging.Logger", handler: "logging.handlers.QueueHandler"
+) -> None:
+    """Stops writing to a log file added by `add_log_file`."""
+    logger.removeHandler(handler)
+    _stop_listener(handler.listener)
+    listeners = _listeners.get(logger.name, [])
+    if handler.listener in listeners:
+        listeners.remove(handler.listener)
+
+
+@contextlib.contextmanager
+def atomic_path(path: str) -> Iterator[str]:
+    """Temporary path to write a file to, renamed to `path` when done.
+
+    Readers, e.g. concurrent runs, never see a partially written file. The
+    temporary file is in the same directory, so that the rename is atomic,
+    and ends with the same name, so that writers inferring the format from
+    the extension (np.savez, savefig) behave the same.
+
+    Usage example:
+        with atomic_path(f"{artifact_dir}/metrics") as tmp_path:
+            with open(tmp_path, "w") as f:
+                f.write(...)
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    tmp_path = os.path.join(directory, f".tmp-{secrets.token_hex(6)}-{name}")
+    try:
+        with tracing.span(f"write {name}", cat="artifact"):
+            yield tmp_path
+            os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _stop_listener(listener: "logging.handlers.QueueListener") -> None:
+    # flushes the queue; stopping twice is a no-op
+    if listener._thread is not None:
+        listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+def init_worker_logging(
+    record_queue: "multiprocessing.Queue", name: str, level: int
+) -> None:
+    """Routes a worker process' logger to the parent's queue."""
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.setLevel(level)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(logging.handlers.QueueHandler(record_queue))
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats records as JSON objects, one per line."""
+
+    def format(self, record: "logging.LogRecord") -> str:
+        items = {
+            # show time in UTC
+            "time": datetime.datetime.fromtimestamp(
+                record.created, tz=datetime.timezone.utc
+            ).isoformat(),
+            "logger": record.name,
+            "level": record.levelname,
+            "process": record.process,
+            "message": record.getMessage(),
+        }
+        items.update(getattr(record, "event", {}))
+        if record.exc_info:
+            items["exception"] = self.formatException(record.exc_info)
+        return json.dumps(items, default=str)
+
+
+def event(**fields: Any) -> Dict[str, Dict[str, Any]]:
+    """Structured fields to attach to a log record.
+
+    Usage example:
+        logger.info("Task done.", extra=event(task="load_data", rows=150))
+    """
+    return {"event": fields}
+
+
+class Lazy:
+    """Log message argument that is only computed if the record is emitted.
+
+    Usage example:
+        logger.debug("%s", Lazy(df.head))
+    """
+
+    def __init__(self, func: Callable, *args: Any, **kwargs: Any) -> None:
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self) -> str:
+        return str(self.func(*self.args, **self.kwargs))
@@ -0,0 +1,106 @@
+"""Helpers for re-running pipeline tasks when their inputs change.
+
+Files are watched by polling their modification times, which needs no extra
+dependency and is cheap for the handful of configuration, data and source
+files a pipeline depends on. Changed source files are re-imported, and the
+methods whose source changed tell which tasks are invalidated.
+"""
+
+import importlib
+import inspect
+import os
+import sys
+
+from typing import Dict, Iterable, List, Set
+
+
+class FileWatcher:
+    """Polls files for changes.
+
+    Usage example:
+        watcher = FileWatcher(["config/common.yaml"])
+        ...
+        changed = watcher.changed()
+    """
+
+    def __init__(self, paths: Iterable[str] = ()) -> None:
+        """Instantiates the watcher.
+
+        Args:
+            paths (Iterable[str]): Files to watch.
+        """
+        self.mtimes = {}
+        self.watch(paths)
+
+    def watch(self, paths: Iterable[str]) -> None:
+        """Starts watching files, in addition to the watched ones."""
+        for path in paths:
+            path = os.path.abspath(path)
+            if path not in self.mtimes:
+                self.mtimes[path] = _mtime(path)
+
+    def changed(self) -> Set[str]:
+        """Files modified, created or removed since the last call."""
+        changed = set()
+        for path, mtime in self.mtimes.items():
+            current = _mtime(path)
+            if current != mtime:
+                self.mtimes[path] = current
+                changed.add(path)
+        return changed
+
+
+def _mtime(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def source_files(cls: type, package: str = "ml_pipeline") -> List[str]:
+    """Source files of a class and of its bases in a package."""
+    files = []
+    for base in inspect.getmro(cls):
+        if base.__module__.split(".")[0] == package:
+            path = os.path.abspath(inspect.getsourcefile(base))
+            if path not in files:
+                files.append(path)
+    return files
+
+
+def method_sources(cls: type) -> Dict[str, str]:
+    """Source code of the methods of a class, including inherited ones."""
+    sources = {}
+    for name, member in inspect.getmembers(cls, inspect.isfunction):
+        try:
+            sources[name] = inspect.getsource(member)
+        except (OSError, TypeError):
+            pass
+    return sources
+
+
+def reload(paths: Iterable[str], dependents: Iterable[str] = ()) -> None:
+    """Re-imports modules after their source files changed.
+
+    Args:
+        paths (Iterable[str]): Changed source files. Their modules are
+            reloaded first.
+        dependents (Iterable[str]): Names of modules that import from the
+            changed modules and are reloaded after them, in order.
+    """
+    paths = {os.path.abspath(path) for path in paths}
+    for module in list(sys.modules.values()):
+        path = getattr(module, "__file__", None)
+        if path and os.path.abspath(path) in paths:
+            importlib.reload(module)
+    for name in dependents:
+        importlib.reload(sys.modules[name])
+
+
+def changed_methods(old: Dict[str, str], new: Dict[str, str]) -> Set[str]:
+    """Names of the methods added, removed or changed between sources."""
+    return {
+        name
+        for name in set(old) | set(new)
+        if old.get(name) != new.get(name)
+    }
@@ -1,34 +1,205 @@
 import argparse
+import copy
+import inspect
+import logging
 import pathlib
+import secrets
+import shutil
 import sys
 import time
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict, Tuple, Union
 
-if TYPE_CHECKING:
-    import logging
-    import omegaconf
+import numpy as np
+import pandas as pd
 
-from ml_pipeline import config, dataset_factory, model_factory, utils
+from omegaconf import DictConfig, OmegaConf
 
+if TYPE_CHECKING:
+    import omegaconf
 
-def pipeline_task(task_func):
-    task_func.is_task = True
-    return task_func
+    from ml_pipeline.model import Model
+
+from ml_pipeline import (
+    artifact_store,
+    artifacts,
+    config,
+    dataset_daemon,
+    dataset_factory,
+    feature_store,
+    grouped,
+    hashing,
+    memory,
+    model_factory,
+    resources,
+    sharding,
+    tracing,
+    utils,
+    watch,
+)
+
+
+def _copy_on_write() -> bool:
+    # always on from pandas 3, and an opt-in option before
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    return pd.get_option("mode.copy_on_write") is True
+
+
+def pipeline_task(task_func=None, *, uses=()):
+    """Marks a method as a pipeline task.
+
+    Args:
+        uses (tuple): Pipeline state the task reads or writes: "dataset" (the
+            whole data frame), "features" (only the feature and target
+            columns), "split" (train/test indexes) or "model". Used to release
+            state that no downstream task needs.
+    """
+
+    def decorate(task_func):
+        task_func.is_task = True
+        task_func.uses = tuple(uses)
+        return task_func
+
+    if task_func is None:
+        return decorate
+    return decorate(task_func)
+
+
+# project configuration sections and the tasks that read them
+CONFIG_TASKS = {
+    "dataset": "load_data",
+    "group_by": "load_data",
+    "features": "feature_engineer_data",
+    "derived_features": "feature_engineer_data",
+    "hashed_features": "train_model",
+    "target": "train_model",
+    "model": "train_model",
+    "training": "train_model",
+}
+
+# dataset and model methods and the tasks that call them
+METHOD_TASKS = {
+    "load": "load_data",
+    "preprocess": "preprocess_data",
+    "feature_engineer": "feature_engineer_data",
+    "train": "train_model",
+    "evaluate": "evaluate_model",
+    "create_report": "create_report",
+}
 
 
 class MLPipeline:
+    # state that snapshots leave out: the pipeline's structure and config
+    UNSNAPSHOTTED = ("snapshots", "tasks", "config")
+
     def __init__(
-        self: "MLPipeline", project_config_path: str, logger: "logging.Logger"
+        self: "MLPipeline",
+        project_config_path: Union[str, "DictConfig"],
+        logger: "logging.Logger" = None,
+        memory_budget: int = None,
+        trace: bool = False,
+        data: "pd.DataFrame" = None,
+        artifact_sink: Union[str, "artifacts.ArtifactSink"] = "directory",
+        cores: int = None,
     ) -> None:
-        self.logger = logger
+        """Instantiates the pipeline.
+
+        Args:
+            project_config_path (Union[str, DictConfig]): Path to the
+                project configuration file, in a config directory with
+                common.yaml and datasets.yaml, or the merged configuration
+                itself (see `config.Config`).
+            logger (logging.Logger): Logger.
+            memory_budget (int): Memory budget (in bytes) for the data held
+                between tasks.
+            trace (bool): Write a timeline trace of every run to trace.json
+                in the artifact directory.
+            data (pd.DataFrame): Data to run on instead of loading the
+                dataset's files.
+            artifact_sink (Union[str, ArtifactSink]): "directory" to write
+                the artifacts to a new run directory, "memory" to keep them
+                in memory, "none" to drop them, or a sink. Only the
+                directory sink touches the disk: the other sinks also skip
+                the feature store, the artifact store, sharding, the dataset
+                daemon, the run's log file and the trace. Runs on `data`
+                always skip the feature store.
+            cores (int): Number of cores of the run (see
+                ml_pipeline.resources). Defaults to `resources.cores` of the
+                configuration, or to all cores.
+        """
+        self.logger = logger or logging.getLogger("ml-pipeline")
+
+        if isinstance(project_config_path, DictConfig):
+            self.config = config.Config.from_items(project_config_path)
+        else:
+            project_config_path = pathlib.Path(project_config_path)
+            self.config = config.Config(
+                project_config_path.parent.parent, project_config_path.stem
+            )
+            self.config.load()
+
+        self.build_tasks()
+
+        # data given in memory, if any
+        self.data = data
+
+        # identify the run by its Unix timestamp, so that run directories
+        # sort chronologically, and a random suffix, so that runs started
+        # in the same second (e.g. by parallel jobs) never collide
+        self.run_id = f"{int(time.time())}-{secrets.token_hex(4)}"
+
+        # optional block compression of data and model artifacts
+        self.artifact_compression = self.config.items.get(
+            "artifacts", {}
+        ).get("compression")
+
+        self.artifact_dir = None
+        self.artifact_store = None
+        if artifact_sink == "directory":
+            # create a directory to store training artifacts
+            self.artifact_dir = (
+                f"artifacts/{self.config.items.project.name}/{self.run_id}"
+            )
+            pathlib.Path(self.artifact_dir).mkdir(parents=True)
+
+            # artifacts are stored once under their content hash, if
+            # configured
+            if self.config.items.get("artifacts", {}).get("store"):
+                self.artifact_store = artifact_store.ArtifactStore(
+                    self.config.items.artifacts.store, logger=self.logger
+                )
+        self.artifacts = artifacts.open_sink(
+            artifact_sink, self.artifact_dir, self.artifact_store
+        )
 
-        project_config_path = pathlib.Path(project_config_path)
-        self.config = config.Config(
-            project_config_path.parent.parent, project_config_path.stem
+        # connection to the dataset daemon, if configured and running
+        self.dataset_client = None
+
+        # row shards of the data, when the dataset is configured to be
+        # processed in shards
+        self.shards = None
+
+        # optional memory budget (in bytes) for the data held between tasks
+        self.memory_budget = None
+        if memory_budget is not None:
+            self.memory_budget = memory.MemoryBudget(
+                memory_budget, logger=self.logger
+            )
+
+        # state before each task, kept in watch mode to re-run tasks
+        self.snapshots = None
+
+        # write a timeline trace of every run to trace.json
+        self.trace = trace
+
+        # cores of the run, divided between its worker processes and
+        # threads
+        self.resources = resources.CoreBudget(
+            cores or self.config.items.get("resources", {}).get("cores")
         )
-        self.config.load()
 
+    def build_tasks(self) -> None:
         # build the pipeline by topologically sorting the task DAG
         sorted_tasks = self.topological_sort(self.config.items.project.tasks)
         self.tasks = []
@@ -43,27 +214,51 @@ class MLPipeline:
             else:
                 raise Exception(f"'{func}' is not a pipeline task.")
 
-        # create a Unix timestamp for the current run
-        self.timestamp = int(time.time())
-
-        # create a directory to store training artifacts
-        self.artifact_dir = (
-            f"artifacts/{self.config.items.project.name}/{self.timestamp}"
-        )
-        pathlib.Path(self.artifact_dir).mkdir(parents=True)
-
     def get_dataset(self) -> None:
         self.dataset = dataset_factory.DatasetFactory(
             self.config.items.datasets
         ).get(self.config.items.project.dataset)
 
+    def daemon_key(self, stage: str) -> str:
+        # data frames depend on the dataset's configuration and code
+        return dataset_daemon.dataset_key(
+            self.dataset,
+            stage,
+            config=OmegaConf.to_container(
+                self.config.items.datasets[self.config.items.project.dataset]
+            ),
+            source=inspect.getsource(type(self.dataset)),
+        )
+
+    def daemon_get(self, stage: str) -> tuple:
+        """Attaches to the data frame of a stage held by the dataset daemon.
+
+        Returns:
+            tuple: The data frame and its metadata, or None.
+        """
+        if self.dataset_client is None:
+            return None
+        held = self.dataset_client.get(self.daemon_key(stage))
+        self.logger.info(
+            f"Dataset daemon: {'hit' if held else 'miss'} for {stage} data."
+        )
+        return held
+
+    def daemon_put(self, stage: str, metadata: Dict = None) -> None:
+        """Hands the data frame of a stage to the dataset daemon."""
+        if self.dataset_client is not None:
+            self.dataset_client.put(
+                self.daemon_key(stage), self.dataset.df, metadata
+            )
+
     def get_model(self) -> None:
         self.model = model_factory.ModelFactory().get(
             self.config.items.project.model.name,
             self.config.items.project.model.params,
             self.config.items.project.training,
-            self.artifact_dir,
+            self.artifacts,
             self.logger,
+            n_jobs=self.resources.cores,
         )
 
     def topological_sort(self, digraph: "omegaconf.DictConfig"):
@@ -96,76 +291,241 @@ class MLPipeline:
 
         return sorted_nodes
 
-    @pipeline_task
+    def select_features(self) -> None:
+        # features to train on; feature engineering adds the derived ones
+        self.features = list(self.config.items.project.features)
+        # grouped models also take the group columns
+        self.group_by = grouped.group_columns(
+            self.config.items.project.get("group_by")
+        )
+        self.features += [
+            column for column in self.group_by if column not in self.features
+        ]
+
+    @pipeline_task(uses=("dataset",))
     def load_data(self) -> None:
         self.logger.info("Loading data...")
 
         self.get_dataset()
-        self.dataset.load()
-        self.logger.debug(self.dataset.df.head())
+        self.select_features()
+
+        if self.data is not None:
+            self.dataset.df = self.data
+            if self.dataset.dtypes:
+                self.dataset.df = self.dataset.df.astype(self.dataset.dtypes)
+            self.logger.debug("%s", utils.Lazy(self.dataset.df.head))
+            self.logger.info("Loading data done.")
+            return
+
+        if self.config.items.get("dataset_daemon") and self.on_disk:
+            self.dataset_client = dataset_daemon.DatasetClient.connect(
+                self.config.items.dataset_daemon.get("address")
+            )
+
+        held = self.daemon_get("loaded")
+        if held is not None:
+            self.dataset.df, _ = held
+        else:
+            dataset_config = self.config.items.datasets[
+                self.config.items.project.dataset
+            ]
+            cache_dir = None
+            if dataset_config.get("incremental"):
+                cache_dir = self.config.items.incremental_cache.path
+            self.dataset.load(
+                max_workers=self.resources.workers(
+                    dataset_config.get("workers")
+                ),
+                use_processes=dataset_config.get("executor") == "process",
+                cache_dir=cache_dir,
+                cores=self.resources.cores,
+            )
+            self.daemon_put("loaded")
+        self.logger.debug("%s", utils.Lazy(self.dataset.df.head))
 
         self.logger.info("Loading data done.")
 
-    @pipeline_task
+    @pipeline_task(uses=("dataset",))
     def preprocess_data(self) -> None:
         self.logger.info("Pre-processing data...")
 
-        self.dataset.preprocess()
-        self.logger.debug(self.dataset.df.head())
+        dataset_config = self.config.items.datasets[
+            self.config.items.project.dataset
+        ]
+        held = self.daemon_get("preprocessed")
+        if held is not None:
+            self.dataset.df, metadata = held
+            self.dataset.preprocessing_params = metadata["params"]
+        elif dataset_config.get("shards") and self.on_disk:
+            # map-reduce over row shards in a process pool; the pre-processed
+            # shards are the data artifact
+            workers = self.resources.workers(
+                dataset_config.get("workers"), dataset_config.shards
+            )
+            raw_shards = sharding.Shards.split(
+                self.dataset.df,
+                f"{self.artifact_dir}/shards/raw",
+                dataset_config.shards,
+            )
+            self.shards = sharding.preprocess(
+                self.dataset,
+                raw_shards,
+                f"{self.artifact_dir}/shards/preprocessed",
+                max_workers=workers,
+                threads=self.resources.threads(workers),
+            )
+            shutil.rmtree(raw_shards.directory)
+            self.dataset.df = self.shards.concat()
+        else:
+            with tracing.span("preprocess", cat="transform"):
+                self.dataset.preprocess()
+        if held is None:
+            self.daemon_put(
+                "preprocessed", {"params": self.dataset.preprocessing_params}
+            )
+        self.logger.debug("%s", utils.Lazy(self.dataset.df.head))
+
+        # save the fitted pre-processing parameters for inference
+        self.artifacts.write(
+            "preprocessing.npz",
+            lambda f: np.savez(f, **self.dataset.preprocessing_params),
+        )
 
         # save pre-processed data as an artifact
-        self.dataset.save(self.artifact_dir, suffix="preprocessed")
+        if self.shards is None:
+            self.dataset.save(
+                self.artifacts,
+                suffix="preprocessed",
+                compression=self.artifact_compression,
+            )
 
         self.logger.info("Pre-processing data done.")
 
-    @pipeline_task
+    @pipeline_task(uses=("dataset",))
     def feature_engineer_data(self) -> None:
         self.logger.info("Feature-engineering data...")
 
-        self.config.items.project.features = self.dataset.feature_engineer(
-            self.config.items.project.features
+        # select the features again, since re-runs in watch mode restore
+        # the state from before an edit of the configuration
+        self.select_features()
+
+        if self.shards is not None:
+            # derive the features of the pre-processed shards in parallel
+            dataset_config = self.config.items.datasets[
+                self.config.items.project.dataset
+            ]
+            workers = self.resources.workers(
+                dataset_config.get("workers"), len(self.shards.paths)
+            )
+            self.shards, features = sharding.feature_engineer(
+                self.dataset,
+                self.shards,
+                f"{self.artifact_dir}/shards/feature_engineered",
+                self.features,
+                self.config.items.project.get("derived_features"),
+                max_workers=workers,
+                threads=self.resources.threads(workers),
+            )
+            self.features = features
+            self.dataset.df = self.shards.concat()
+        else:
+            self.feature_engineer_frame()
+        self.logger.debug("%s", utils.Lazy(self.dataset.df.head))
+
+        # save the feature plan so inference derives features the same way
+        self.artifacts.write(
+            "feature_plan.json", self.dataset.feature_plan.write
         )
-        self.logger.debug(self.dataset.df.head())
-
-        # save feature-engineered data as an artifact
-        self.dataset.save(self.artifact_dir, suffix="feature_engineered")
 
         self.logger.info("Feature-engineering data done.")
 
-    @pipeline_task
+    def feature_engineer_frame(self) -> None:
+        # reuse feature columns computed by earlier runs, if configured; the
+        # store is keyed by the data files, so it can't serve data given in
+        # memory
+        store = None
+        if (
+            self.config.items.get("feature_store")
+            and self.on_disk
+            and self.data is None
+        ):
+            store = feature_store.FeatureStore(
+                self.config.items.feature_store.path
+            )
+
+        with tracing.span("feature_engineer", cat="transform"):
+            self.features = self.dataset.feature_engineer(
+                self.features,
+                self.config.items.project.get("derived_features"),
+                store=store,
+            )
+        if store is not None:
+            self.logger.info(f"Feature store: {store.stats()}")
+
+        # save feature-engineered data as an artifact
+        self.dataset.save(
+            self.artifacts,
+            suffix="feature_engineered",
+            compression=self.artifact_compression,
+        )
+
+    @pipeline_task(uses=("features", "split", "model"))
     def train_model(self) -> None:
         self.logger.info("Training model...")
 
         # get the model to be trained
         self.get_model()
 
+        # hash high-cardinality columns into sparse features, if configured
+        hasher = None
+        hashed_features = self.config.items.project.get("hashed_features")
+        if hashed_features:
+            hasher = hashing.FeatureHasher(
+                hashed_features.columns,
+                hashed_features.get("n_features", 1024),
+                tokenize=hashed_features.get("tokenize", False),
+            )
+
         # train the model
         self.idx_train, self.idx_test = self.model.train(
-            self.dataset.df[self.config.items.project.features],
+            self.dataset.df[self.features],
             self.dataset.df[self.config.items.project.target],
+            search_params=self.config.items.project.model.get("search"),
+            seed=self.config.items.get("seed"),
+            hasher=hasher,
+            group_by=self.group_by,
         )
 
         # save the trained model
-        self.model.save()
+        self.model.save(
+            compression=self.artifact_compression,
+            preprocessing=self.dataset.preprocessing_params,
+            feature_plan=getattr(self.dataset, "feature_plan", None),
+        )
 
         self.logger.info("Training model done.")
 
-    @pipeline_task
+    @pipeline_task(uses=("features", "split", "model"))
     def evaluate_model(self) -> None:
         self.logger.info("Evaluating model...")
 
         self.model.evaluate(
-            self.dataset.df[self.config.items.project.features].loc[
-                self.idx_test
-            ],
+            self.dataset.df[self.features].loc[self.idx_test],
             self.dataset.df[self.config.items.project.target].loc[
                 self.idx_test
             ],
+            chunk_size=self.config.items.project.training.get(
+                "evaluation_chunk_size"
+            ),
+            bootstrap_params=self.config.items.project.training.get(
+                "bootstrap"
+            ),
+            seed=self.config.items.get("seed"),
         )
 
         self.logger.info("Evaluating model done.")
 
-    @pipeline_task
+    @pipeline_task(uses=("model",))
     def create_report(self) -> None:
         self.logger.info("Creating plots...")
 
@@ -173,14 +533,371 @@ class MLPipeline:
 
         self.logger.info("Creating plots done.")
 
-    def run(self) -> None:
+    def get_data_frame(self) -> "pd.DataFrame":
+        dataset = getattr(self, "dataset", None)
+        return getattr(dataset, "_df", None)
+
+    def manage_memory(self, position: int) -> int:
+        """Releases or spills data after the task at `position` has run.
+
+        Returns:
+            int: Bytes of data held in memory until the next task.
+        """
+        # state used by the tasks still to run
+        needed = {
+            resource
+            for task in self.tasks[position + 1 :]
+            for resource in task.uses
+        }
+
+        df = self.get_data_frame()
+        if df is not None and "dataset" not in needed:
+            if "features" in needed:
+                # downstream tasks only use the feature and target columns
+                columns = list(self.features) + [
+                    self.config.items.project.target
+                ]
+                if len(columns) < len(df.columns):
+                    self.dataset.df = df[columns]
+            else:
+                self.dataset.df = None
+                self.memory_budget.release("dataset")
+
+        if "split" not in needed:
+            self.idx_train = self.idx_test = None
+
+        split_bytes = memory.nbytes(getattr(self, "idx_train", None))
+        split_bytes += memory.nbytes(getattr(self, "idx_test", None))
+
+        df = self.get_data_frame()
+        if df is not None:
+            self.dataset.df = self.memory_budget.fit(
+                "dataset", df, other_bytes=split_bytes
+            )
+        return memory.nbytes(self.get_data_frame()) + split_bytes
+
+    def run(self, start: int = 0) -> None:
+        """Runs the tasks, starting with the task at position `start`.
+
+        The records logged during the run are also written to pipeline.log
+        in the artifact directory, if any.
+        """
+        log_handler = None
+        trace = self.trace and self.on_disk
+        if self.on_disk:
+            log_handler = utils.add_log_file(
+                self.logger, f"{self.artifact_dir}/pipeline.log"
+            )
+        if trace:
+            tracing.start(f"{self.artifact_dir}/trace.json")
         self.logger.info("Commencing pipeline run...")
-        self.logger.info(f"artifact directory: {self.artifact_dir}")
+        if self.on_disk:
+            self.logger.info(f"artifact directory: {self.artifact_dir}")
+
+        try:
+            # limit the threads of BLAS and OpenMP thread pools to the
+            # run's cores
+            with self.resources.limit_threads():
+                for position, task in enumerate(self.tasks):
+                    if position < start:
+                        continue
+                    if self.snapshots is not None:
+                        self.snapshots[position] = self.snapshot()
+
+                    start_time = time.perf_counter()
+                    with tracing.span(task.__name__, cat="task"):
+                        task()
+                    duration = time.perf_counter() - start_time
+
+                    held_bytes = None
+                    if self.memory_budget is not None:
+                        held_bytes = self.manage_memory(position)
+
+                    df = self.get_data_frame()
+                    self.logger.info(
+                        f"Task '{task.__name__}' took {duration:.3f}s.",
+                        extra=utils.event(
+                            task=task.__name__,
+                            run_id=self.run_id,
+                            duration=duration,
+                            rows=len(df) if df is not None else None,
+                            held_bytes=held_bytes,
+                        ),
+                    )
+            if self.artifact_store is not None:
+                self.commit_artifacts()
+
+            self.logger.info("Pipeline run complete.")
+        finally:
+            if self.memory_budget is not None:
+                self.memory_budget.cleanup()
+            if trace:
+                tracing.stop()
+            if log_handler is not None:
+                utils.remove_log_file(self.logger, log_handler)
+
+    @property
+    def on_disk(self) -> bool:
+        """Whether the run writes to a run directory."""
+        return self.artifact_dir is not None
+
+    def commit_artifacts(self) -> None:
+        """Moves the run's artifacts into the artifact store.
+
+        The manifest records the run's scalar metrics for the retention
+        policies of `collect_artifacts.py`.
+        """
+        metrics = getattr(getattr(self, "model", None), "metrics", None) or {}
+        with tracing.span("commit artifacts", cat="artifact"):
+            manifest = self.artifact_store.commit(
+                self.artifact_dir,
+                metrics={
+                    name: float(value)
+                    for name, value in metrics.items()
+                    if isinstance(value, (int, float))
+                },
+                exclude=("pipeline.log", "trace.json"),
+            )
+        self.logger.info(
+            f"Committed {len(manifest['files'])} artifacts to "
+            f"{self.artifact_store.path}."
+        )
 
-        for task in self.tasks:
-            task()
+    def snapshot(self) -> dict:
+        """Shallow copy of the pipeline state.
+
+        The data frame is copied deeply, so that tasks modifying it in place
+        leave the snapshot's data unchanged, unless pandas' copy-on-write is
+        enabled (always from pandas 3), which makes a shallow copy enough.
+        """
+        state = {
+            key: value
+            for key, value in self.__dict__.items()
+            if key not in self.UNSNAPSHOTTED
+        }
+        for key in ("dataset", "model"):
+            if state.get(key) is not None:
+                state[key] = copy.copy(state[key])
+        if (
+            state.get("dataset") is not None
+            and state["dataset"].df is not None
+        ):
+            state["dataset"].df = state["dataset"].df.copy(
+                deep=not _copy_on_write()
+            )
+        return state
+
+    def restore(self, position: int) -> None:
+        """Restores the state from before the task at `position` ran."""
+        state = self.snapshots[position]
+        for key in list(self.__dict__):
+            if key not in state and key not in self.UNSNAPSHOTTED:
+                del self.__dict__[key]
+        self.__dict__.update(state)
+        # keep the snapshot unchanged, and use the classes of reloaded
+        # modules for the objects of the old ones
+        self.__dict__.update(self.snapshot())
+        for key in ("dataset", "model"):
+            obj = getattr(self, key, None)
+            if obj is not None:
+                module = sys.modules[type(obj).__module__]
+                obj.__class__ = getattr(module, type(obj).__name__)
+
+    def watched_files(self) -> list:
+        """Configuration, data and source files the tasks depend on."""
+        config_dir = self.config.config_dir
+        files = [
+            config_dir / "common.yaml",
+            config_dir / "datasets.yaml",
+            config_dir / f"projects/{self.config.project}.yaml",
+        ]
+        for key in ("dataset", "model"):
+            obj = getattr(self, key, None)
+            if obj is not None:
+                files += watch.source_files(type(obj))
+        if getattr(self, "dataset", None) is not None:
+            files += self.dataset.data_files()
+        return [str(path) for path in files]
+
+    def class_sources(self) -> dict:
+        """Source of the methods of the dataset and model classes."""
+        return {
+            "dataset": watch.method_sources(type(self.dataset)),
+            "model": watch.method_sources(
+                model_factory.ModelFactory().models[
+                    self.config.items.project.model.name
+                ]
+            ),
+        }
+
+    def invalidated(self, changed: set, sources: dict) -> set:
+        """Names of the tasks invalidated by changed files.
+
+        Changed configuration files are reloaded, and invalidate the tasks
+        that read the changed project sections. Changed source files are
+        re-imported, and invalidate the tasks calling the changed dataset and
+        model methods. Changes to anything else, like the data files, the
+        common configuration or other methods, invalidate the first task.
+
+        Args:
+            changed (set): Paths of the changed files.
+            sources (dict): `class_sources()` from before the changes. Updated
+                with the sources of the reloaded classes.
+        """
+        names = [task.__name__ for task in self.tasks]
+        first_task = names[0]
+        tasks = set()
+
+        config_dir = self.config.config_dir.resolve()
+        config_files = {
+            path
+            for path in changed
+            if pathlib.Path(path).is_relative_to(config_dir)
+        }
+        source_files = {path for path in changed if path.endswith(".py")}
+        if changed - config_files - source_files:
+            # data files
+            tasks.add(first_task)
+
+        if config_files:
+            previous = self.config.items
+            self.config.load()
+            project, previous_project = (
+                self.config.items.project,
+                previous.project,
+            )
+            if project.tasks != previous_project.tasks:
+                self.build_tasks()
+                return {task.__name__ for task in self.tasks}
+            for section in set(project) | set(previous_project):
+                if project.get(section) != previous_project.get(section):
+                    tasks.add(CONFIG_TASKS.get(section, first_task))
+            for section in set(self.config.items) | set(previous):
+                if section != "project" and self.config.items.get(
+                    section
+                ) != previous.get(section):
+                    tasks.add(first_task)
+
+        if source_files:
+            model_class = model_factory.ModelFactory().models[
+                self.config.items.project.model.name
+            ]
+            dataset_class = type(self.dataset)
+            watch.reload(
+                source_files,
+                dependents=[
+                    dataset_class.__module__,
+                    model_class.__module__,
+                    "ml_pipeline.model_factory",
+                ],
+            )
+            dataset_class = getattr(
+                sys.modules[dataset_class.__module__], dataset_class.__name__
+            )
+            model_class = model_factory.ModelFactory().models[
+                self.config.items.project.model.name
+            ]
+            for key, cls in (
+                ("dataset", dataset_class),
+                ("model", model_class),
+            ):
+                new_sources = watch.method_sources(cls)
+                for method in watch.changed_methods(sources[key], new_sources):
+                    tasks.add(
+                        METHOD_TASKS.get(method)
+                        or (first_task if key == "dataset" else "train_model")
+                    )
+                sources[key] = new_sources
+
+        # tasks that are not part of this pipeline invalidate the first task
+        return {task if task in names else first_task for task in tasks}
+
+    def descendants(self, tasks: set) -> set:
+        """The tasks and all tasks downstream of them in the task DAG."""
+        digraph = self.config.items.project.tasks
+        result, stack = set(), list(tasks)
+        while stack:
+            task = stack.pop()
+            if task not in result:
+                result.add(task)
+                stack.extend(digraph[task].next)
+        return result
+
+    def watch(self, interval: float = 1.0) -> None:
+        """Re-runs the tasks affected by changes, until interrupted.
+
+        Watches the configuration files, the dataset's data files and the
+        source files of the dataset and model classes. On a change, the state
+        from before the first invalidated task is restored and the pipeline
+        re-runs from there: the invalidated tasks and their descendants (and
+        any independent task sorted after them, whose state is restored as
+        well). Loaded data and fitted objects of earlier tasks stay in
+        memory.
+
+        Args:
+            interval (float): Seconds between checks for changes.
+        """
+        watcher = watch.FileWatcher(self.watched_files())
+        sources = self.class_sources()
+        self.logger.info("Watching for changes (Ctrl+C to stop)...")
+        while True:
+            time.sleep(interval)
+            changed = watcher.changed()
+            if not changed:
+                continue
+            self.logger.info(f"Changed: {', '.join(sorted(changed))}")
 
-        self.logger.info("Pipeline run complete.")
+            try:
+                invalidated = self.invalidated(changed, sources)
+                if not invalidated:
+                    self.logger.info("No task is affected.")
+                    continue
+                names = [task.__name__ for task in self.tasks]
+                affected = self.descendants(invalidated)
+                start = min(names.index(task) for task in affected)
+                self.logger.info(
+                    f"Re-running {', '.join(names[start:])} (invalidated: "
+                    f"{', '.join(sorted(invalidated))})."
+                )
+                if start in self.snapshots:
+                    self.restore(start)
+                else:
+                    start = 0
+                self.run(start)
+            except Exception as error:
+                # keep watching, e.g. for a fix of the error
+                self.logger.error(error)
+            watcher.watch(self.watched_files())
+
+
+def train(
+    config_items: "DictConfig",
+    data: "pd.DataFrame",
+    logger: "logging.Logger" = None,
+    artifact_sink: Union[str, "artifacts.ArtifactSink"] = "memory",
+) -> Tuple["Model", Dict]:
+    """Runs the pipeline on a data frame, without touching the disk.
+
+    Usage example:
+        project_config = config.Config("config", "iris_classification")
+        project_config.load()
+        model, metrics = train(project_config.items, df)
+        model.artifacts.artifacts["model.joblib"]
+
+    Args:
+        config_items (DictConfig): Merged configuration (see `config.Config`).
+        data (pd.DataFrame): Data with the dataset's columns.
+        logger (logging.Logger): Logger.
+        artifact_sink (Union[str, ArtifactSink]): "memory" to keep the
+            artifacts in the model's sink, "none" to drop them, or a sink.
+    Returns:
+        Tuple[Model, Dict]: The trained model and its metrics.
+    """
+    pipeline = MLPipeline(
+        config_items, logger, data=data, artifact_sink=artifact_sink
+    )
+    pipeline.run()
+    return pipeline.model, pipeline.model.metrics
 
 
 if __name__ == "__main__":
@@ -197,17 +914,56 @@ if __name__ == "__main__":
     parser.add_argument(
         "-d", "--debug", action="store_true", help="run in debug mode"
     )
+    parser.add_argument(
+        "--memory-budget",
+        type=memory.parse_size,
+        help="memory budget for data held between tasks, e.g. 2G; data no "
+        "longer needed is released and large data frames are spilled to "
+        "memory-mapped files",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep running and re-run the tasks affected by changes to the "
+        "configuration, the data or the dataset and model code",
+    )
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="write a timeline trace of the run to trace.json in the "
+        "artifact directory, for chrome://tracing or ui.perfetto.dev",
+    )
+    parser.add_argument(
+        "--cores",
+        type=int,
+        help="number of cores of the run, divided between its worker "
+        "processes and BLAS/OpenMP threads; set it when running several "
+        "pipelines at once (default: resources.cores of the configuration, "
+        "or all cores)",
+    )
     args = parser.parse_args()
 
     logger = utils.Logger("ml-pipeline", debug=args.debug).get()
 
     try:
-        pipeline = MLPipeline(args.config, logger)
+        pipeline = MLPipeline(
+            args.config,
+            logger,
+            memory_budget=args.memory_budget,
+            trace=args.trace,
+            cores=args.cores,
+        )
+        if args.watch:
+            pipeline.snapshots = {}
         pipeline.run()
+        if args.watch:
+            pipeline.watch()
+    except KeyboardInterrupt:
+        pass
     except Exception as error:
         logger.error(error)
         sys.exit(-1)
 
     print(
         f"Pipeline run complete. See all artifacts in {pipeline.artifact_dir}"
-    )
\ No newline at end of file
+    )
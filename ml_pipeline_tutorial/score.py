@@ -0,0 +1,125 @@
+import argparse
+import sys
+
+from ml_pipeline import scoring, utils
+from ml_pipeline.prediction_cache import CacheStats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Batch scoring script.", allow_abbrev=False
+    )
+    parser.add_argument(
+        "-c",
+        "--config",
+        type=str,
+        help="path to the project configuration file of the training run",
+        required=True,
+    )
+    parser.add_argument(
+        "-a",
+        "--artifact-dir",
+        type=str,
+        help="path to artifact directory",
+        required=True,
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        type=str,
+        help="path to input data (CSV, or JSON lines with .jsonl extension)",
+        required=True,
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        help="path to output predictions (CSV, or JSON lines with .jsonl "
+        "extension)",
+        required=True,
+    )
+    parser.add_argument(
+        "--no-header",
+        action="store_true",
+        help="CSV input has no header row and uses the dataset's columns, "
+        "like the files in the data directory",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=100_000,
+        help="number of rows scored at a time",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        help="number of worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--cores",
+        type=int,
+        help="number of cores divided between the worker processes' "
+        "BLAS/OpenMP threads (default: all cores)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=str,
+        help="memory cap of each worker's cache of the predictions of "
+        "repeated rows, e.g. 64M (default: no cache)",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        help="seconds cached predictions stay valid (default: no expiry)",
+    )
+    parser.add_argument(
+        "-d", "--debug", action="store_true", help="run in debug mode"
+    )
+    args = parser.parse_args()
+
+    logger = utils.Logger("ml-pipeline", debug=args.debug).get()
+
+    try:
+        names = None
+        if args.no_header:
+            names = (
+                scoring.BatchScorer(args.config, args.artifact_dir)
+                .dataset()
+                .columns
+            )
+
+        cache_stats = CacheStats()
+        chunks = scoring.read_chunks(args.input, args.chunksize, names=names)
+        predictions = scoring.score_chunks(
+            args.config,
+            args.artifact_dir,
+            chunks,
+            max_workers=args.workers,
+            cores=args.cores,
+            cache_size=args.cache_size,
+            cache_ttl=args.cache_ttl,
+            cache_stats=cache_stats,
+        )
+
+        # write each chunk as soon as it and all chunks before it are scored
+        num_rows = 0
+        with open(args.output, "w") as f:
+            for result in predictions:
+                if args.output.endswith(".jsonl"):
+                    result.to_json(f, orient="records", lines=True)
+                else:
+                    result.to_csv(f, header=num_rows == 0, index=False)
+                num_rows += len(result)
+                logger.debug(f"Scored {num_rows} rows.")
+    except Exception as error:
+        logger.error(error)
+        sys.exit(-1)
+
+    if args.cache_size:
+        logger.info(
+            f"Prediction cache: {cache_stats.hits} hits, "
+            f"{cache_stats.misses} misses, hit rate "
+            f"{cache_stats.hit_rate:.1%}, {cache_stats.evictions} evictions, "
+            f"{cache_stats.expirations} expirations."
+        )
+    print(f"Scored {num_rows} rows. See predictions in {args.output}")
@@ -28,6 +28,8 @@ setup(
         "omegaconf==2.3.0",
         "pandas==1.5.3",
         "scikit-learn==1.2.1",
+        "scipy==1.10.0",
         "seaborn==0.12.2",
+        "threadpoolctl==3.1.0",
     ],
 )
\ No newline at end of file
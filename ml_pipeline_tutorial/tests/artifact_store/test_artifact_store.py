@@ -0,0 +1,58 @@
+import os
+import pathlib
+
+import pandas as pd
+
+from ml_pipeline.artifact_store import ArtifactStore, frame_key
+
+
+def _run(
+    root: "pathlib.Path", name: str, content: str, accuracy: float, store
+) -> "pathlib.Path":
+    run_dir = root / "project" / name
+    run_dir.mkdir(parents=True)
+    (run_dir / "data.csv").write_text("a,b\n1,2\n")
+    (run_dir / "model").write_text(content)
+    store.commit(str(run_dir), metrics={"accuracy": accuracy})
+    return run_dir
+
+
+def test_deduplicate_and_collect(tmp_path) -> None:
+    store = ArtifactStore(str(tmp_path / "objects"))
+    runs = [
+        _run(tmp_path, "1", "model 1", 0.9, store),
+        _run(tmp_path, "2", "model 2", 0.8, store),
+        _run(tmp_path, "3", "model 3", 0.7, store),
+    ]
+
+    # the identical data is stored once and linked from every run
+    assert os.stat(runs[0] / "data.csv").st_nlink == 4
+    assert len(store._objects()) == 4
+
+    # keep the last run and the best one
+    removed = store.collect(
+        [str(tmp_path / "project")],
+        keep_last=1,
+        keep_best={"accuracy": "max"},
+    )
+    assert removed["runs"] == 1 and removed["objects"] == 1
+    assert sorted(os.listdir(tmp_path / "project")) == ["1", "3"]
+    assert (runs[0] / "model").read_text() == "model 1"
+    assert len(store._objects()) == 3
+
+
+def test_link_by_frame_key(tmp_path) -> None:
+    store = ArtifactStore(str(tmp_path / "objects"))
+    df = pd.DataFrame({"a": [1.0, 2.0], "b": ["x", "y"]})
+    key = frame_key(df, format="csv")
+    assert key == frame_key(df.set_index(pd.Index([5, 6])), format="csv")
+    assert key != frame_key(df, format="parquet")
+
+    path = str(tmp_path / "first.csv")
+    assert not store.link(key, path)
+    df.to_csv(path, index=False)
+    store.add(path, key=key)
+
+    # a later run links the stored file instead of writing it
+    assert store.link(key, str(tmp_path / "second.csv"))
+    assert os.path.samefile(path, tmp_path / "second.csv")
@@ -0,0 +1,55 @@
+import logging
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from omegaconf import OmegaConf
+
+from ml_pipeline.artifacts import MemorySink, NullSink, open_sink
+from ml_pipeline.models.iris_classifier import IrisClassifier
+
+
+def _train(sink) -> "IrisClassifier":
+    rng = np.random.default_rng(47)
+    X = pd.DataFrame(rng.normal(size=(100, 2)), columns=["a", "b"])
+    y = pd.Series(np.where(X["a"] > 0, "up", "down"), dtype="category")
+    model = IrisClassifier(
+        OmegaConf.create({}),
+        OmegaConf.create({"test_split": 0.3}),
+        sink,
+        logger=logging.getLogger("test"),
+    )
+    _, idx_test = model.train(X, y)
+    model.evaluate(X.loc[idx_test], y.loc[idx_test])
+    model.save()
+    model.create_report()
+    return model
+
+
+def test_memory_sink(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    model = _train(open_sink("memory"))
+
+    assert isinstance(model.artifacts, MemorySink)
+    assert {
+        "encodings.json",
+        "model.joblib",
+        "predictor.npz",
+        "metrics",
+        "confusion_matrix.png",
+    } <= set(model.artifacts.artifacts)
+    restored = joblib.load(model.artifacts.open("model.joblib"))
+    np.testing.assert_array_equal(restored.coef_, model.model.coef_)
+    # nothing was written to disk
+    assert os.listdir(tmp_path) == []
+
+
+def test_null_sink(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    model = _train("none")
+
+    assert isinstance(model.artifacts, NullSink)
+    assert "accuracy" in model.metrics
+    assert os.listdir(tmp_path) == []
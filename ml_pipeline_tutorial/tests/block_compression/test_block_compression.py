@@ -0,0 +1,52 @@
+import io
+import os
+
+import pytest
+
+from ml_pipeline import block_compression
+
+
+@pytest.mark.parametrize("codec", ["zlib", "lzma", "bz2"])
+def test_round_trip(tmp_path, codec: str) -> None:
+    data = os.urandom(3000) + b"0.123456,1.234567\n" * 20000
+    path = tmp_path / "data.csv.blk"
+
+    with block_compression.open_writer(path, codec, block_size=4096) as f:
+        f.write(data[:10])
+        f.write(data[10:])
+
+    assert os.path.getsize(path) < len(data)
+    with block_compression.open_reader(path) as f:
+        assert f.read() == data
+
+
+def test_lazy_seek(tmp_path) -> None:
+    data = bytes(range(256)) * 1000
+    path = tmp_path / "data.blk"
+    with block_compression.open_writer(path, "zlib", block_size=1000) as f:
+        f.write(data)
+
+    reader = block_compression.BlockReader(path)
+    reader.seek(123_456)
+    buffer = bytearray(2000)
+
+    # reads stop at block boundaries and only decompress the blocks touched
+    assert reader.readinto(buffer) == 544
+    assert bytes(buffer[:544]) == data[123_456:124_000]
+    assert reader.seek(-10, io.SEEK_END) == len(data) - 10
+    assert reader.read(100) == data[-10:]
+
+
+def test_uncompressed(tmp_path) -> None:
+    path = tmp_path / "data.csv"
+    with block_compression.open_writer(path, "none") as f:
+        f.write(b"a,b\n")
+
+    assert block_compression.resolve(str(path)) == str(path)
+    with block_compression.open_reader(path) as f:
+        assert f.read() == b"a,b\n"
+
+
+def test_unknown_codec(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        block_compression.open_writer(tmp_path / "data.blk", "snappy")
@@ -0,0 +1,95 @@
+import pandas as pd
+import pytest
+
+from ml_pipeline import resources
+from ml_pipeline.datasets.iris import IrisDataset
+from ml_pipeline.mixins import csv_mixin
+
+ROWS = [
+    "5.1,3.5,1.4,0.2,Iris-setosa",
+    "7.0,3.2,4.7,1.4,Iris-versicolor",
+    "6.3,3.3,6.0,2.5,Iris-virginica",
+    "4.9,3.0,1.4,0.2,Iris-setosa",
+    "6.4,3.2,4.5,1.5,Iris-versicolor",
+]
+
+
+def _parts(directory) -> None:
+    # one row per part, so each part has a single species category
+    directory.mkdir()
+    for i, row in enumerate(ROWS):
+        (directory / f"part-{i}.csv").write_text(row + "\n")
+    (directory / ".hidden").write_text("not,a,part\n")
+
+
+def test_data_files(tmp_path) -> None:
+    _parts(tmp_path / "parts")
+    (tmp_path / "parts" / "part-0.txt").write_text(ROWS[0] + "\n")
+    parts = [str(tmp_path / "parts" / f"part-{i}.csv") for i in range(5)]
+
+    assert IrisDataset(
+        str(tmp_path / "parts" / "part-3.csv")
+    ).data_files() == [parts[3]]
+    assert IrisDataset(str(tmp_path / "parts")).data_files() == sorted(
+        parts + [str(tmp_path / "parts" / "part-0.txt")]
+    )
+    assert IrisDataset(str(tmp_path / "parts" / "*.csv")).data_files() == parts
+    with pytest.raises(FileNotFoundError):
+        IrisDataset(str(tmp_path / "missing" / "*.csv")).data_files()
+
+
+def test_iter_parts(tmp_path, monkeypatch) -> None:
+    _parts(tmp_path / "parts")
+    started = []
+
+    def read_part(path, **kwargs):
+        started.append(path)
+        return pd.read_csv(path, **kwargs)
+
+    monkeypatch.setattr(csv_mixin, "_read_part", read_part)
+    dataset = IrisDataset(str(tmp_path / "parts" / "*.csv"))
+
+    parts = []
+    for part in dataset.iter_parts(max_workers=2):
+        parts.append(part)
+        # at most max_workers parts are read ahead of the consumer
+        assert len(started) - len(parts) <= 2
+
+    # parts are yielded in path order
+    assert [part["sepal_length"][0] for part in parts] == [
+        float(row.split(",")[0]) for row in ROWS
+    ]
+
+
+@pytest.mark.parametrize("use_processes", [False, True])
+def test_load(tmp_path, use_processes) -> None:
+    _parts(tmp_path / "parts")
+    dataset = IrisDataset(str(tmp_path / "parts"))
+
+    dataset.load(max_workers=2, use_processes=use_processes)
+
+    assert len(dataset.df) == len(ROWS)
+    assert list(dataset.df.index) == list(range(len(ROWS)))
+    # parts with different categories are recast after the concat
+    assert isinstance(dataset.df["species"].dtype, pd.CategoricalDtype)
+    assert list(dataset.df["species"]) == [row.split(",")[4] for row in ROWS]
+
+
+def test_iter_parts_cores(tmp_path, monkeypatch) -> None:
+    _parts(tmp_path / "parts")
+    threads = []
+    worker_initializer = resources.worker_initializer
+
+    def initializer(worker_threads, *args):
+        threads.append(worker_threads)
+        return worker_initializer(worker_threads, *args)
+
+    monkeypatch.setattr(resources, "available_cores", lambda: 64)
+    monkeypatch.setattr(resources, "worker_initializer", initializer)
+    dataset = IrisDataset(str(tmp_path / "parts"))
+
+    dataset.load(max_workers=2, use_processes=True, cores=4)
+
+    # the workers divide the run's cores, not the machine's
+    assert threads == [2]
+    assert len(dataset.df) == len(ROWS)
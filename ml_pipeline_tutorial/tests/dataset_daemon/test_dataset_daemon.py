@@ -0,0 +1,108 @@
+import multiprocessing
+import os
+import stat
+import threading
+import time
+
+from multiprocessing.connection import Listener
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_pipeline import dataset_daemon
+from ml_pipeline.dataset_daemon import DatasetClient, DatasetDaemon
+from ml_pipeline.datasets.iris import IrisDataset
+
+
+def serve() -> None:
+    DatasetDaemon().serve()
+
+
+def test_get_put(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    process = multiprocessing.Process(target=serve)
+    process.start()
+    try:
+        client = None
+        while client is None:
+            time.sleep(0.05)
+            client = DatasetClient.connect()
+        address = dataset_daemon.default_address()
+        assert stat.S_IMODE(os.stat(address).st_mode) == 0o600
+
+        dataset = IrisDataset()
+        dataset.df = pd.DataFrame(
+            np.random.default_rng(47).normal(size=(100, 4)),
+            columns=dataset.numeric_columns,
+        )
+        dataset.df["species"] = pd.Categorical(
+            ["Iris-setosa", "Iris-virginica"] * 50
+        )
+        assert client.get("iris") is None
+        assert client.put("iris", dataset.df, {"version": 1})
+
+        df, metadata = client.get("iris")
+        assert metadata == {"version": 1}
+        pd.testing.assert_frame_equal(df, dataset.df)
+        assert client.stats()["frames"] == 1
+
+        # attached frames can be pre-processed like loaded ones
+        expected = dataset.df.copy()
+        dataset.df = df
+        dataset.preprocess()
+        pd.testing.assert_frame_equal(client.get("iris")[0], expected)
+
+        client.stop()
+    finally:
+        process.join(timeout=10)
+        if process.is_alive():
+            process.terminate()
+
+
+def test_runtime_dir(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    # no key, no daemon
+    assert dataset_daemon.authkey() is None
+    assert DatasetClient.connect() is None
+
+    key = dataset_daemon.authkey(create=True)
+    assert len(key) == 32
+    assert dataset_daemon.authkey(create=True) == key
+    directory = dataset_daemon.runtime_dir()
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+    path = os.path.join(directory, dataset_daemon.AUTHKEY_NAME)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+    # directories and keys other users can access are refused
+    os.chmod(path, 0o644)
+    with pytest.raises(PermissionError):
+        dataset_daemon.authkey()
+    os.chmod(directory, 0o755)
+    with pytest.raises(PermissionError):
+        dataset_daemon.runtime_dir()
+
+
+def test_foreign_daemon(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    dataset_daemon.authkey(create=True)
+    address = str(tmp_path / "foreign.sock")
+
+    # a daemon without the user's key
+    with Listener(address, "AF_UNIX", authkey=b"guessed") as listener:
+
+        def accept() -> None:
+            try:
+                listener.accept()
+            except multiprocessing.AuthenticationError:
+                pass
+
+        thread = threading.Thread(target=accept)
+        thread.start()
+        with pytest.raises(multiprocessing.AuthenticationError):
+            DatasetClient.connect(address)
+        thread.join()
+
+    # paths that aren't sockets are refused
+    with pytest.raises(PermissionError):
+        DatasetClient.connect(str(tmp_path))
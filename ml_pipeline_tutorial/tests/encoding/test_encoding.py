@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from ml_pipeline.encoding import CategoricalEncoder
+
+
+def test_encode_decode(tmp_path) -> None:
+    y = pd.Series(["b", "a", "c", "a"], dtype="category")
+    encoder = CategoricalEncoder.fit(y)
+
+    np.testing.assert_array_equal(encoder.encode(y), [1, 0, 2, 0])
+    # object labels and labels with other categories get the same codes
+    np.testing.assert_array_equal(
+        encoder.encode(pd.Series(["c", "a", "d"])), [2, 0, -1]
+    )
+    np.testing.assert_array_equal(encoder.decode([2, 0]), ["c", "a"])
+
+    encoder.save(tmp_path / "encodings.json")
+    loaded = CategoricalEncoder.load(tmp_path / "encodings.json")
+    assert loaded.encodings == {"a": 0, "b": 1, "c": 2}
+    assert loaded.matches(y)
+    np.testing.assert_array_equal(
+        loaded.encode(pd.Series(["c", None, "d"], dtype="category")),
+        [2, -1, -1],
+    )
+
+
+def test_reordered_categories() -> None:
+    encoder = CategoricalEncoder(["a", "b", "c"])
+    y = pd.Series(pd.Categorical(["a", "b", "c"], categories=["c", "b", "a"]))
+
+    # equal unordered dtypes, but codes of another order
+    assert y.dtype == encoder.dtype
+    assert not encoder.matches(y)
+    np.testing.assert_array_equal(encoder.encode(y), [0, 1, 2])
+    np.testing.assert_array_equal(
+        encoder.encode(y.cat.reorder_categories(["a", "b", "c"])), [0, 1, 2]
+    )
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_pipeline import feature_plan
+from ml_pipeline.feature_plan import FeaturePlan
+
+
+@pytest.fixture(autouse=True)
+def numpy_only(monkeypatch: "pytest.MonkeyPatch") -> None:
+    # exercise the blocked NumPy program regardless of numexpr
+    monkeypatch.setattr(feature_plan, "numexpr", None)
+
+
+def test_apply() -> None:
+    df = pd.DataFrame({"a": [-1.0, 2.0, 3.0, 4.0], "b": [2.0, -3.0, 4.0, 5.0]})
+    plan = FeaturePlan(
+        {
+            "area": "abs(a) * abs(b)",
+            "ratio": "a / b",
+            "log_area": "log(area)",
+            "bucket_b": "bucket(b, [0, 4.5])",
+        }
+    )
+
+    result = plan.apply(df)
+
+    assert plan.inputs == ["a", "b"]
+    assert list(result.columns) == [
+        "a",
+        "b",
+        "area",
+        "ratio",
+        "log_area",
+        "bucket_b",
+    ]
+    np.testing.assert_allclose(result["area"], [2.0, 6.0, 12.0, 20.0])
+    np.testing.assert_allclose(result["ratio"], df["a"] / df["b"])
+    np.testing.assert_allclose(result["log_area"], np.log(result["area"]))
+    np.testing.assert_array_equal(result["bucket_b"], [1, 0, 1, 2])
+
+
+def test_blocks_and_shared_subexpressions() -> None:
+    rng = np.random.default_rng(47)
+    columns = {"x": rng.normal(size=1001), "y": rng.normal(size=1001)}
+    plan = FeaturePlan({"p": "abs(x) * abs(y)", "q": "abs(x) + 1"})
+
+    values = plan.evaluate(columns, block_size=64)
+
+    # abs(x) is compiled once and shared by both features
+    assert sum(op[1] is np.abs for op in plan._program if op[0] == "call") == 2
+    np.testing.assert_allclose(
+        values[0], np.abs(columns["x"]) * np.abs(columns["y"])
+    )
+    np.testing.assert_allclose(values[1], np.abs(columns["x"]) + 1)
+
+
+@pytest.mark.parametrize(
+    "definitions",
+    [
+        {"a": "b", "b": "a"},
+        {"a": "x.y"},
+        {"a": "eval(x)"},
+        {"a": "x > 1"},
+        {"a": "bucket(x, 1)"},
+        {"a": "'x'"},
+    ],
+)
+def test_invalid_definitions(definitions: dict) -> None:
+    with pytest.raises(ValueError):
+        FeaturePlan(definitions)
+
+
+def test_save_load(tmp_path) -> None:
+    plan = FeaturePlan({"area": "x * y"})
+    plan.save(tmp_path / "feature_plan.json")
+
+    loaded = FeaturePlan.load(tmp_path / "feature_plan.json")
+
+    assert loaded.definitions == plan.definitions
@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from ml_pipeline.feature_plan import FeaturePlan
+from ml_pipeline.feature_store import FeatureStore
+
+
+class _Dataset:
+    def preprocess(self):
+        return self
+
+
+class _EditedDataset(_Dataset):
+    def preprocess(self):
+        return self * 2
+
+
+def test_get_put(tmp_path) -> None:
+    store = FeatureStore(str(tmp_path / "store"))
+    values = np.arange(4, dtype=np.float64)
+
+    assert store.get("ns", "key", 4) is None
+    store.put("ns", "key", values)
+
+    np.testing.assert_array_equal(store.get("ns", "key", 4), values)
+    # columns of a different number of rows are not used
+    assert store.get("ns", "key", 5) is None
+
+
+def test_namespace(tmp_path) -> None:
+    store = FeatureStore(str(tmp_path / "store"))
+    path = tmp_path / "data.csv"
+    path.write_text("1,2\n")
+    os.utime(path, ns=(0, 0))
+    files = [str(path)]
+    namespace = store.namespace(files, _Dataset, dtypes=None)
+
+    assert store.namespace(files, _Dataset, dtypes=None) == namespace
+    # editing the dataset's code invalidates the features
+    assert store.namespace(files, _EditedDataset, dtypes=None) != namespace
+    # so does changing the configuration the data is parsed with
+    dtypes = {"b": "category"}
+    assert store.namespace(files, _Dataset, dtypes=dtypes) != namespace
+    # or the data, even with the same size
+    path.write_text("3,4\n")
+    os.utime(path, ns=(1, 1))
+    assert store.namespace(files, _Dataset, dtypes=None) != namespace
+
+
+def test_apply(tmp_path) -> None:
+    store = FeatureStore(str(tmp_path / "store"))
+    df = pd.DataFrame({"a": [1.0, -2.0], "b": [3.0, 4.0]})
+    plan = FeaturePlan({"ab": "a * b", "abs_a": "abs(a)"})
+
+    first = store.apply(plan, df, "ns")
+    assert store.stats() == {"hits": 0, "misses": 2}
+    second = store.apply(FeaturePlan({"product": "a * b"}), df, "ns")
+
+    # features computed the same way are shared, whatever their name
+    assert store.stats() == {"hits": 1, "misses": 2}
+    np.testing.assert_array_equal(first["ab"], [3.0, -8.0])
+    np.testing.assert_array_equal(second["product"], first["ab"])
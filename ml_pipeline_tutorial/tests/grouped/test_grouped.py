@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from sklearn.linear_model import LinearRegression, Ridge
+
+from ml_pipeline.grouped import GroupedEstimator
+
+
+def _data() -> tuple:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "a": rng.normal(size=300),
+            "b": rng.normal(size=300),
+            "group": rng.integers(0, 3, 300),
+        }
+    )
+    y = df["a"] * df["group"] + 2 * df["b"] + 10 * df["group"]
+    return df, y.to_numpy()
+
+
+def test_batched_linear_regression() -> None:
+    df, y = _data()
+
+    model = GroupedEstimator(LinearRegression(), ["group"]).fit(df, y)
+
+    for group in range(3):
+        rows = df["group"] == group
+        expected = LinearRegression().fit(df.loc[rows, ["a", "b"]], y[rows])
+        index = model.groups_.get_loc(group)
+        np.testing.assert_allclose(
+            model.coefs_[index], expected.coef_, atol=1e-9
+        )
+        np.testing.assert_allclose(
+            model.intercepts_[index], expected.intercept_, atol=1e-9
+        )
+    np.testing.assert_allclose(model.predict(df), y)
+    scores = model.score_groups(df, y)
+    assert scores["rows"].sum() == len(df)
+    np.testing.assert_allclose(scores["score"], 1.0)
+
+    # rows of unknown groups are predicted by the model of all rows
+    fallback = LinearRegression().fit(df[["a", "b"]], y)
+    unknown = df.assign(group=7)
+    np.testing.assert_allclose(
+        model.predict(unknown), fallback.predict(unknown[["a", "b"]])
+    )
+
+
+def test_estimators() -> None:
+    df, y = _data()
+
+    model = GroupedEstimator(Ridge(alpha=1e-9), ["group"], n_jobs=1)
+    model.fit(df, y)
+
+    assert len(model.estimators_) == 4
+    assert model.failed_groups_ == []
+    np.testing.assert_allclose(model.predict(df), y, atol=1e-6)
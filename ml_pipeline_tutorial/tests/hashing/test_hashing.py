@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from ml_pipeline.hashing import FeatureHasher
+
+
+def test_design_matrix() -> None:
+    df = pd.DataFrame(
+        {
+            "weight": [3504.0, 3693.0, 3436.0, 2372.0],
+            "name": ["ford pinto", "ford torino", None, "ford pinto"],
+        }
+    )
+    hasher = FeatureHasher(["name"], n_features=16)
+
+    X = hasher.design_matrix(df)
+
+    assert X.shape == (4, 17)
+    np.testing.assert_array_equal(X[:, 0].toarray().ravel(), df["weight"])
+    hashed = X[:, 1:].toarray()
+    # one signed entry per value, none for missing values
+    np.testing.assert_array_equal(np.abs(hashed).sum(axis=1), [1, 1, 0, 1])
+    np.testing.assert_array_equal(hashed[0], hashed[3])
+    # hashing is deterministic, so inference gets the same columns
+    np.testing.assert_array_equal(
+        hasher.transform(df.iloc[[3]]).toarray(), hashed[[3]]
+    )
+
+
+def test_tokenize(tmp_path) -> None:
+    df = pd.DataFrame({"name": ["ford pinto", "ford torino"]})
+    path = str(tmp_path / "feature_hasher.json")
+    FeatureHasher(["name"], n_features=1024, tokenize=True).save(path)
+    hasher = FeatureHasher.load(path)
+
+    hashed = hasher.transform(df).toarray()
+
+    # the values share the "ford" feature
+    assert np.count_nonzero(hashed[0]) == 2
+    assert np.count_nonzero(hashed[0] * hashed[1]) == 1
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from ml_pipeline import incremental
+from ml_pipeline.datasets.iris import IrisDataset
+
+ROWS = [
+    "5.1,3.5,1.4,0.2,Iris-setosa\n",
+    "7.0,3.2,4.7,1.4,Iris-versicolor\n",
+    "6.3,3.3,6.0,2.5,Iris-virginica\n",
+    "4.9,3.0,1.4,0.2,Iris-setosa\n",
+]
+
+
+def _refresh(tmp_path, monkeypatch) -> tuple:
+    # refreshes the cache, returning the data and the rows parsed
+    parsed = []
+    read_csv = pd.read_csv
+
+    def counting_read_csv(*args, **kwargs):
+        df = read_csv(*args, **kwargs)
+        parsed.append(len(df))
+        return df
+
+    monkeypatch.setattr(incremental.pd, "read_csv", counting_read_csv)
+    dataset = IrisDataset(str(tmp_path / "iris.data"))
+    df, statistics = incremental.IncrementalCache(
+        str(tmp_path / "cache")
+    ).refresh(dataset)
+    monkeypatch.undo()
+    return df, statistics, sum(parsed)
+
+
+def test_append(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "iris.data"
+    path.write_text("".join(ROWS[:2]))
+    df, _, parsed = _refresh(tmp_path, monkeypatch)
+    assert (len(df), parsed) == (2, 2)
+
+    with open(path, "a") as f:
+        f.writelines(ROWS[2:])
+    df, statistics, parsed = _refresh(tmp_path, monkeypatch)
+
+    # only the appended rows are parsed
+    assert parsed == 2
+    expected = pd.read_csv(path, names=IrisDataset().columns)
+    np.testing.assert_array_equal(df["sepal_length"], expected["sepal_length"])
+    np.testing.assert_allclose(
+        statistics.mean, expected[statistics.columns].mean()
+    )
+
+    # nothing new, nothing parsed
+    assert _refresh(tmp_path, monkeypatch)[2] == 0
+
+
+def test_rewrite(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "iris.data"
+    path.write_text("".join(ROWS))
+    _refresh(tmp_path, monkeypatch)
+
+    # a rewritten row of the same size
+    path.write_text("".join(ROWS[:3]) + ROWS[3].replace("4.9", "5.9"))
+    df, statistics, parsed = _refresh(tmp_path, monkeypatch)
+    assert parsed == 4
+    assert df["sepal_length"].iloc[3] == 5.9
+
+    # a truncated file
+    path.write_text("".join(ROWS[:2]))
+    df, statistics, parsed = _refresh(tmp_path, monkeypatch)
+    assert (len(df), parsed) == (2, 2)
+    np.testing.assert_array_equal(statistics.count, [2, 2, 2, 2])
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from sklearn.linear_model import LinearRegression, Ridge
+
+from ml_pipeline.linear import NormalEquations, StreamingLinearRegression
+
+
+def _data() -> tuple:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        rng.normal(loc=100.0, size=(500, 3)), columns=["a", "b", "c"]
+    )
+    y = df @ [1.0, -2.0, 0.5] + 3.0 + rng.normal(size=500)
+    return df, y.to_numpy()
+
+
+def test_streaming_linear_regression() -> None:
+    df, y = _data()
+    rows = np.random.default_rng(1).permutation(500)[:350]
+
+    model = StreamingLinearRegression(chunk_size=64, n_jobs=3)
+    model.fit(df, y[rows], rows=rows)
+
+    expected = LinearRegression().fit(df.iloc[rows], y[rows])
+    np.testing.assert_allclose(model.coef_, expected.coef_)
+    np.testing.assert_allclose(model.intercept_, expected.intercept_)
+    np.testing.assert_array_equal(model.feature_names_in_, ["a", "b", "c"])
+    np.testing.assert_allclose(model.predict(df), expected.predict(df))
+
+
+def test_ridge_and_merge() -> None:
+    df, y = _data()
+
+    model = StreamingLinearRegression(alpha=10.0, fit_intercept=False)
+    model.fit(df.iloc[:200], y[:200]).partial_fit(df.iloc[200:], y[200:])
+
+    expected = Ridge(alpha=10.0, fit_intercept=False).fit(df, y)
+    np.testing.assert_allclose(model.coef_, expected.coef_)
+    assert model.intercept_ == 0.0
+
+    # merged statistics equal those of all rows at once
+    merged = NormalEquations(3).update(df.iloc[:100], y[:100])
+    merged.merge(NormalEquations(3).update(df.iloc[100:], y[100:]))
+    np.testing.assert_allclose(merged.xx, model.statistics_.xx)
+    np.testing.assert_allclose(merged.x_mean, df.mean())
@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_pipeline import memory
+
+
+def test_parse_size() -> None:
+    assert memory.parse_size("512") == 512
+    assert memory.parse_size("2K") == 2048
+    assert memory.parse_size("1.5mb") == 3 << 19
+    assert memory.parse_size(" 2 GiB ") == 2 << 30
+    with pytest.raises(ValueError):
+        memory.parse_size("2 apples")
+
+
+def _frame() -> "pd.DataFrame":
+    return pd.DataFrame(
+        {"a": np.arange(1000, dtype=np.float64), "b": ["x", "y"] * 500}
+    )
+
+
+def test_fit_and_spill(tmp_path) -> None:
+    df = _frame()
+    (tmp_path / "spill").mkdir()
+    budget = memory.MemoryBudget(
+        memory.nbytes(df), spill_dir=str(tmp_path / "spill")
+    )
+    assert memory.nbytes(df["a"]) == 8000
+
+    # within the budget, the frame is kept as it is
+    assert budget.fit("loaded", df) is df
+    spilled = budget.fit("loaded", df, other_bytes=1)
+
+    pd.testing.assert_frame_equal(spilled, df)
+    # only the object column still counts against the budget
+    assert memory.nbytes(spilled) == memory.nbytes(df["b"])
+    (first,) = budget.spilled["loaded"]
+    assert os.listdir(first) == ["0.npy"]
+
+    # spilling again only writes the columns that aren't mapped yet
+    pd.testing.assert_frame_equal(budget.spill("loaded", spilled), df)
+    assert budget.spilled["loaded"] == [first]
+    assert len(os.listdir(tmp_path / "spill")) == 1
+    spilled["c"] = spilled["a"] * 2
+    respilled = budget.spill("loaded", spilled)
+    pd.testing.assert_frame_equal(respilled, spilled)
+    assert budget.spilled["loaded"][0] == first
+    second = budget.spilled["loaded"][1]
+    assert os.listdir(second) == ["2.npy"]
+
+    # the files of dropped columns are deleted
+    respilled = budget.spill("loaded", respilled[["b", "c"]])
+    assert not os.path.exists(first)
+    assert budget.spilled["loaded"] == [second]
+    np.testing.assert_array_equal(respilled["c"], df["a"] * 2)
+
+    budget.release("loaded")
+    assert budget.spilled == {}
+    assert os.listdir(tmp_path / "spill") == []
+    budget.cleanup()
+    # a given spill directory is kept
+    assert os.path.exists(tmp_path / "spill")
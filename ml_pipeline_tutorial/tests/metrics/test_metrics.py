@@ -0,0 +1,69 @@
+import numpy as np
+
+from sklearn.metrics import (
+    accuracy_score,
+    confusion_matrix,
+    mean_squared_error,
+    r2_score,
+)
+
+from ml_pipeline.metrics import (
+    ClassificationMetrics,
+    RegressionMetrics,
+    bootstrap_intervals,
+)
+
+
+def test_classification_metrics() -> None:
+    rng = np.random.default_rng(47)
+    y_true = rng.integers(0, 3, size=1000)
+    y_pred = np.where(rng.random(1000) < 0.8, y_true, rng.integers(0, 3, 1000))
+
+    metrics = ClassificationMetrics(3).update(y_true[:300], y_pred[:300])
+    metrics.merge(ClassificationMetrics(3).update(y_true[300:], y_pred[300:]))
+    result = metrics.result()
+
+    assert result["accuracy"] == accuracy_score(y_true, y_pred)
+    np.testing.assert_array_equal(
+        result["cm"], confusion_matrix(y_true, y_pred)
+    )
+
+
+def test_regression_metrics() -> None:
+    rng = np.random.default_rng(47)
+    y_true = 1e6 + rng.normal(size=1000)
+    y_pred = y_true + rng.normal(scale=0.5, size=1000)
+
+    metrics = RegressionMetrics()
+    for start in range(0, 1000, 128):
+        metrics.merge(
+            RegressionMetrics().update(
+                y_true[start : start + 128], y_pred[start : start + 128]
+            )
+        )
+    result = metrics.result()
+
+    np.testing.assert_allclose(
+        result["mean_squared_error"], mean_squared_error(y_true, y_pred)
+    )
+    np.testing.assert_allclose(result["r2_score"], r2_score(y_true, y_pred))
+
+
+def test_bootstrap_intervals() -> None:
+    rng = np.random.default_rng(47)
+    y_true = rng.integers(0, 3, size=500)
+    y_pred = np.where(rng.random(500) < 0.8, y_true, rng.integers(0, 3, 500))
+    metrics = ClassificationMetrics(3)
+
+    # vectorised resampled metrics equal the metric of each resample
+    idx = rng.integers(0, 500, size=(5, 500))
+    np.testing.assert_allclose(
+        metrics.resampled(y_true[idx], y_pred[idx])["accuracy"],
+        [accuracy_score(y_true[i], y_pred[i]) for i in idx],
+    )
+
+    low, high = bootstrap_intervals(
+        metrics, y_true, y_pred, num_resamples=500, batch_size=64, seed=47
+    )["accuracy"]
+    assert low < accuracy_score(y_true, y_pred) < high
+    assert high - low < 0.1
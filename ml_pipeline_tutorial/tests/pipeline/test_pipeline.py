@@ -0,0 +1,129 @@
+import logging
+import pathlib
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from ml_pipeline import config
+
+import pipeline
+
+ROOT = pathlib.Path(__file__).parents[2]
+
+
+def _project(tmp_path, monkeypatch) -> "config.Config":
+    # the iris project and its data in a temporary working directory
+    (tmp_path / "config" / "projects").mkdir(parents=True)
+    for name in ("common.yaml", "datasets.yaml"):
+        shutil.copy(ROOT / "config" / name, tmp_path / "config" / name)
+    shutil.copy(
+        ROOT / "config" / "projects" / "iris_classification.yaml",
+        tmp_path / "config" / "projects",
+    )
+    (tmp_path / "data").mkdir()
+    shutil.copy(ROOT / "data" / "iris.data", tmp_path / "data")
+    monkeypatch.chdir(tmp_path)
+
+    project_config = config.Config("config", "iris_classification")
+    project_config.load()
+    return project_config
+
+
+def test_data_skips_feature_store(tmp_path, monkeypatch) -> None:
+    project_config = _project(tmp_path, monkeypatch)
+    # fill the feature store from the data files
+    pipeline.MLPipeline(project_config.items).run()
+
+    df = pd.read_csv(
+        "data/iris.data",
+        names=["sepal_length", "sepal_width", "petal_length", "petal_width"]
+        + ["species"],
+    )
+    df["sepal_width"] = df["sepal_width"].sample(frac=1, random_state=0).values
+    run = pipeline.MLPipeline(project_config.items, data=df)
+    run.run()
+
+    # the derived features are those of the data given
+    derived = run.dataset.df
+    np.testing.assert_allclose(
+        derived["sepal_area"],
+        derived["sepal_length"].abs() * derived["sepal_width"].abs(),
+    )
+
+
+def test_snapshot_keeps_data(tmp_path, monkeypatch) -> None:
+    project_config = _project(tmp_path, monkeypatch)
+    run = pipeline.MLPipeline(project_config.items, artifact_sink="none")
+    run.load_data()
+
+    snapshot = run.snapshot()
+    run.dataset.df.iloc[0, 0] = -1.0
+
+    assert snapshot["dataset"].df.iloc[0, 0] != -1.0
+
+
+def _watched(tmp_path, monkeypatch) -> "pipeline.MLPipeline":
+    # a run of the iris project keeping snapshots, as in watch mode
+    _project(tmp_path, monkeypatch)
+    run = pipeline.MLPipeline(
+        "config/projects/iris_classification.yaml", artifact_sink="none"
+    )
+    run.snapshots = {}
+    run.run()
+    return run
+
+
+def test_snapshot_restore(tmp_path, monkeypatch) -> None:
+    run = _watched(tmp_path, monkeypatch)
+    position = [task.__name__ for task in run.tasks].index("preprocess_data")
+    loaded = run.snapshots[position]["dataset"].df.copy()
+
+    run.restore(position)
+    pd.testing.assert_frame_equal(run.dataset.df, loaded)
+    # state set by the later tasks is dropped
+    assert not hasattr(run, "model")
+
+    # the snapshot outlives changes of the restored state
+    run.dataset.df.iloc[0, 0] = -1.0
+    run.restore(position)
+    pd.testing.assert_frame_equal(run.dataset.df, loaded)
+
+
+def test_invalidated(tmp_path, monkeypatch) -> None:
+    run = _watched(tmp_path, monkeypatch)
+    sources = run.class_sources()
+    path = tmp_path / "config" / "projects" / "iris_classification.yaml"
+
+    assert run.invalidated(set(), sources) == set()
+    # data files invalidate the first task
+    assert run.invalidated(
+        {str(tmp_path / "data" / "iris.data")}, sources
+    ) == {"load_data"}
+    # edited project sections invalidate the tasks reading them
+    path.write_text(
+        path.read_text().replace("test_split: 0.3", "test_split: 0.2")
+    )
+    assert run.invalidated({str(path)}, sources) == {"train_model"}
+    path.write_text(path.read_text().replace("    - petal_width\n", ""))
+    assert run.invalidated({str(path)}, sources) == {"feature_engineer_data"}
+
+
+def test_rerun(tmp_path, monkeypatch, caplog) -> None:
+    run = _watched(tmp_path, monkeypatch)
+    path = tmp_path / "config" / "projects" / "iris_classification.yaml"
+    path.write_text(path.read_text().replace("    - petal_width\n", ""))
+    run.invalidated({str(path)}, run.class_sources())
+    start = [task.__name__ for task in run.tasks].index(
+        "feature_engineer_data"
+    )
+
+    caplog.set_level(logging.INFO)
+    run.restore(start)
+    run.run(start)
+
+    # only the tasks from `start` re-ran, with the edited features
+    assert "Loading data..." not in caplog.messages
+    assert "Feature-engineering data..." in caplog.messages
+    assert "petal_width" not in run.features
+    assert run.model.model.n_features_in_ == len(run.features) == 5
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from ml_pipeline.prediction_cache import ENTRY_BYTES, PredictionCache
+
+
+class _Model:
+    def __init__(self) -> None:
+        self.rows = 0
+
+    def predict(self, X: "pd.DataFrame") -> "np.ndarray":
+        self.rows += len(X)
+        return (X["a"] * 10 + X["b"]).to_numpy()
+
+
+def test_predict() -> None:
+    model = _Model()
+    cache = PredictionCache(3 * ENTRY_BYTES)
+    X = pd.DataFrame({"a": [1, 2, 1, 3], "b": [0, 0, 0, 5]})
+
+    np.testing.assert_array_equal(
+        cache.predict(X, model.predict), [10, 20, 10, 35]
+    )
+    # duplicate rows are predicted once
+    assert model.rows == 3
+    assert (cache.stats.hits, cache.stats.misses) == (1, 3)
+
+    # only the misses are predicted, and the least recently used row evicted
+    X = pd.DataFrame({"a": [3, 4], "b": [5, 0]}, index=[7, 8])
+    np.testing.assert_array_equal(cache.predict(X, model.predict), [35, 40])
+    assert model.rows == 4
+    assert len(cache) == 3
+    assert cache.reset_stats().to_dict() == {
+        "hits": 2,
+        "misses": 4,
+        "evictions": 1,
+        "expirations": 0,
+        "hit_rate": 1 / 3,
+    }
+
+
+def test_expiry_and_model_version() -> None:
+    now = [0.0]
+    model = _Model()
+    X = pd.DataFrame({"a": [1], "b": [2]})
+    cache = PredictionCache("1M", ttl=10, clock=lambda: now[0])
+
+    cache.predict(X, model.predict)
+    now[0] = 5.0
+    cache.predict(X, model.predict)
+    assert model.rows == 1
+    now[0] = 10.0
+    cache.predict(X, model.predict)
+    assert model.rows == 2
+    assert cache.stats.expirations == 1
+
+    other = PredictionCache("1M", model_version="other")
+    assert other.keys(X)[0] != cache.keys(X)[0]
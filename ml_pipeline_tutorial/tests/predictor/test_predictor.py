@@ -0,0 +1,72 @@
+import logging
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from omegaconf import OmegaConf
+
+from ml_pipeline.feature_plan import FeaturePlan
+from ml_pipeline.models.autompg_regressor import AutoMPGRegressor
+from ml_pipeline.models.iris_classifier import IrisClassifier
+from ml_pipeline.predictor import LinearPredictor
+
+
+@pytest.mark.parametrize("model_class", [IrisClassifier, AutoMPGRegressor])
+def test_export(tmp_path, model_class) -> None:
+    rng = np.random.default_rng(47)
+    raw = pd.DataFrame(rng.normal(size=(200, 2)), columns=["a", "b"])
+    if model_class is IrisClassifier:
+        y = pd.Series(np.where(raw["a"] + raw["b"] > 0, "up", "down"))
+    else:
+        y = pd.Series(3 * raw["a"] - raw["b"])
+
+    # standardise and derive features like a dataset would
+    mean, std = raw.mean().to_numpy(), raw.std().to_numpy()
+    X = (raw - mean) / std
+    plan = FeaturePlan({"ab": "a * abs(b)"})
+    X = plan.apply(X)
+
+    model = model_class(
+        OmegaConf.create({}),
+        OmegaConf.create({"test_split": 0.3}),
+        str(tmp_path),
+        logger=logging.getLogger("test"),
+    )
+    model.train(X, y)
+    model.save(
+        preprocessing={
+            "columns": np.array(["a", "b"]),
+            "mean": mean,
+            "std": std,
+        },
+        feature_plan=plan,
+    )
+
+    predictor = LinearPredictor.load(tmp_path / "predictor.npz")
+    expected = model.predict(X)
+    if model_class is IrisClassifier:
+        labels = {code: label for label, code in model.encodings.items()}
+        expected = [labels[code] for code in expected]
+        np.testing.assert_array_equal(predictor.predict(raw), expected)
+    else:
+        np.testing.assert_allclose(predictor.predict(raw), expected)
+
+
+def test_imports() -> None:
+    # a fresh interpreter, since the tests import the whole pipeline
+    modules = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, ml_pipeline.predictor; print(*sys.modules)",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout.split()
+
+    for module in ("ml_pipeline.utils", "pandas", "sklearn", "joblib"):
+        assert module not in modules
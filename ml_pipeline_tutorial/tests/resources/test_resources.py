@@ -0,0 +1,35 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from threadpoolctl import threadpool_info
+
+from ml_pipeline import resources
+from ml_pipeline.resources import CoreBudget
+
+
+def _num_threads() -> list:
+    # load NumPy's BLAS, then report the sizes of the thread pools
+    np.ones((2, 2)) @ np.ones((2, 2))
+    return [pool["num_threads"] for pool in threadpool_info()]
+
+
+def test_budget() -> None:
+    budget = CoreBudget(8)
+
+    assert budget.workers() == 8
+    assert budget.workers(requested=16) == 8
+    assert budget.workers(requested=3) == 3
+    assert budget.workers(tasks=2) == 2
+    assert budget.threads(3) == 2
+    assert budget.threads(16) == 1
+
+
+def test_worker_initializer() -> None:
+    initializer, initargs = resources.worker_initializer(1)
+    with ProcessPoolExecutor(
+        1, initializer=initializer, initargs=initargs
+    ) as executor:
+        num_threads = executor.submit(_num_threads).result()
+
+    assert all(threads == 1 for threads in num_threads)
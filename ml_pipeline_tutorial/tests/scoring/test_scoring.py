@@ -0,0 +1,123 @@
+import os
+import pathlib
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_pipeline import config, scoring
+
+import pipeline
+
+ROOT = pathlib.Path(__file__).parents[2]
+
+
+@pytest.fixture(scope="module")
+def runs(tmp_path_factory) -> dict:
+    # runs of both projects trained in a temporary working directory
+    directory = tmp_path_factory.mktemp("runs")
+    shutil.copytree(ROOT / "config", directory / "config")
+    shutil.copytree(ROOT / "data", directory / "data")
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        runs = {}
+        for project in ("iris_classification", "autompg_regression"):
+            project_config = config.Config("config", project)
+            project_config.load()
+            run = pipeline.MLPipeline(project_config.items)
+            run.run()
+            runs[project] = (
+                str(directory / "config" / "projects" / f"{project}.yaml"),
+                str(directory / run.artifact_dir),
+                str(directory / "data"),
+            )
+    finally:
+        os.chdir(cwd)
+    return runs
+
+
+def test_score(runs) -> None:
+    config_path, artifact_dir, data_dir = runs["autompg_regression"]
+    scorer = scoring.BatchScorer(config_path, artifact_dir)
+    df = pd.read_csv(
+        f"{data_dir}/auto-mpg.data", names=scorer.dataset().columns
+    )
+
+    result = scorer.score(df)
+
+    # rows dropped by the pre-processing get missing predictions
+    unknown = df["horsepower"] == "?"
+    assert unknown.any()
+    pd.testing.assert_index_equal(result.index, df.index)
+    assert result["prediction"].isna().equals(unknown)
+    assert list(result.columns) == ["prediction"]
+
+
+def test_score_cached(runs) -> None:
+    config_path, artifact_dir, data_dir = runs["autompg_regression"]
+    scorer = scoring.BatchScorer(config_path, artifact_dir, cache_size="1M")
+    df = pd.read_csv(
+        f"{data_dir}/auto-mpg.data", names=scorer.dataset().columns
+    )
+    expected = scoring.BatchScorer(config_path, artifact_dir).score(df)
+
+    pd.testing.assert_frame_equal(scorer.score(df), expected)
+    pd.testing.assert_frame_equal(scorer.score(df), expected)
+    assert scorer.cache.stats.hits >= len(expected.dropna())
+
+
+def test_score_labels(runs) -> None:
+    config_path, artifact_dir, data_dir = runs["iris_classification"]
+    scorer = scoring.BatchScorer(config_path, artifact_dir)
+    df = pd.read_csv(f"{data_dir}/iris.data", names=scorer.dataset().columns)
+
+    result = scorer.score(df)
+
+    # class codes are decoded to the species
+    assert (result["label"] == df["species"]).mean() > 0.9
+
+
+def test_read_chunks(tmp_path) -> None:
+    df = pd.DataFrame({"a": np.arange(5), "b": list("vwxyz")})
+    df.to_csv(tmp_path / "header.csv", index=False)
+    df.to_csv(tmp_path / "no_header.csv", index=False, header=False)
+    df.to_json(tmp_path / "rows.jsonl", orient="records", lines=True)
+
+    for name, names in [
+        ("header.csv", None),
+        ("no_header.csv", ["a", "b"]),
+        ("rows.jsonl", None),
+    ]:
+        chunks = list(
+            scoring.read_chunks(str(tmp_path / name), 2, names=names)
+        )
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        pd.testing.assert_frame_equal(pd.concat(chunks), df)
+
+
+def test_score_chunks(runs) -> None:
+    config_path, artifact_dir, data_dir = runs["iris_classification"]
+    df = pd.read_csv(
+        f"{data_dir}/iris.data",
+        names=scoring.BatchScorer(config_path, artifact_dir).dataset().columns,
+    )
+    read = []
+
+    def chunks():
+        for start in range(0, len(df), 10):
+            read.append(start)
+            yield df.iloc[start : start + 10]
+
+    results = []
+    for result in scoring.score_chunks(
+        config_path, artifact_dir, chunks(), max_workers=2, cores=2
+    ):
+        # at most two chunks per worker are in flight
+        assert len(read) - len(results) <= 4
+        results.append(result)
+
+    # results are in input order
+    expected = scoring.BatchScorer(config_path, artifact_dir).score(df)
+    pd.testing.assert_frame_equal(pd.concat(results), expected)
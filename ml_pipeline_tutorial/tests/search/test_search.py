@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from sklearn.linear_model import LogisticRegression
+
+from ml_pipeline import search
+
+
+def test_schedule() -> None:
+    assert search.schedule(9, 900, factor=3) == [
+        (9, 100),
+        (3, 300),
+        (1, 900),
+    ]
+    # the first rung never has fewer than min_rows rows
+    assert search.schedule(27, 90, factor=3, min_rows=20) == [
+        (27, 30),
+        (9, 90),
+    ]
+
+
+def test_successive_halving() -> None:
+    rng = np.random.default_rng(47)
+    X = pd.DataFrame(rng.normal(size=(600, 3)), columns=["a", "b", "c"])
+    y = (X["a"] + 0.5 * X["b"] > 0).astype(int).to_numpy()
+
+    params = search.candidates({"C": [1e-4, 1e-3, 1.0, 10.0]})
+    best_params, rungs = search.successive_halving(
+        LogisticRegression(), params, X, y, factor=2, max_workers=2, seed=47
+    )
+
+    assert [len(rung["results"]) for rung in rungs] == [4, 2, 1]
+    assert [rung["rows"] for rung in rungs] == [120, 240, 480]
+    assert best_params["C"] >= 1.0
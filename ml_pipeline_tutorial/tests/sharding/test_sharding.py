@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from ml_pipeline import sharding
+from ml_pipeline.datasets.iris import IrisDataset
+
+
+def test_sharded_preprocess_matches_single_frame(tmp_path) -> None:
+    rng = np.random.default_rng(47)
+    dataset = IrisDataset()
+    dataset.df = pd.DataFrame(
+        rng.normal(size=(1001, 4)), columns=dataset.numeric_columns
+    )
+    dataset.df["species"] = "Iris-setosa"
+    expected = IrisDataset()
+    expected.df = dataset.df.copy()
+    expected.preprocess()
+    expected.feature_engineer([], {"ratio": "sepal_length / sepal_width"})
+
+    shards = sharding.Shards.split(dataset.df, tmp_path / "raw", 4)
+    assert shards.rows == 1001
+    shards = sharding.preprocess(
+        dataset, shards, tmp_path / "preprocessed", max_workers=2
+    )
+    shards, features = sharding.feature_engineer(
+        dataset,
+        shards,
+        tmp_path / "features",
+        [],
+        {"ratio": "sepal_length / sepal_width"},
+        max_workers=2,
+    )
+
+    assert features == ["ratio"]
+    np.testing.assert_allclose(
+        dataset.preprocessing_params["std"],
+        expected.preprocessing_params["std"],
+    )
+    pd.testing.assert_frame_equal(shards.concat(), expected.df)
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from ml_pipeline.statistics import RunningStats
+
+
+def test_update_and_merge() -> None:
+    rng = np.random.default_rng(47)
+    values = rng.normal(loc=5.0, scale=2.0, size=(1000, 3))
+    values[::7, 1] = np.nan
+
+    # statistics of three chunks, two of them merged from partial results
+    stats = RunningStats(["a", "b", "c"]).update(values[:100])
+    partial = RunningStats(["a", "b", "c"]).update(values[100:600])
+    partial.merge(RunningStats(["a", "b", "c"]).update(values[600:]))
+    stats.merge(partial)
+
+    np.testing.assert_array_equal(stats.count, (~np.isnan(values)).sum(axis=0))
+    np.testing.assert_allclose(stats.mean, np.nanmean(values, axis=0))
+    np.testing.assert_allclose(stats.std(), np.nanstd(values, axis=0, ddof=1))
+
+    restored = RunningStats.from_dict(stats.to_dict())
+    np.testing.assert_allclose(restored.var(ddof=0), stats.var(ddof=0))
+
+
+def test_merge_different_columns() -> None:
+    with pytest.raises(ValueError):
+        RunningStats(["a"]).merge(RunningStats(["b"]))
@@ -0,0 +1,40 @@
+import json
+
+from concurrent.futures import ProcessPoolExecutor
+
+from ml_pipeline import tracing
+
+
+def _work(i: int) -> int:
+    with tracing.span("work", cat="transform", item=i):
+        return i * i
+
+
+def test_trace(tmp_path) -> None:
+    path = tmp_path / "trace.json"
+    # no trace is written unless started
+    with tracing.span("untraced"):
+        pass
+
+    tracing.start(str(path))
+    with tracing.span("task", cat="task"):
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            assert list(executor.map(_work, range(4))) == [0, 1, 4, 9]
+    tracing.stop()
+
+    with open(path) as f:
+        events = json.load(f)["traceEvents"]
+    spans = [event for event in events if event["ph"] == "X"]
+    assert sorted(span["name"] for span in spans) == ["task"] + ["work"] * 4
+    # the workers' spans are on their own tracks, within the task's span
+    (task,) = [span for span in spans if span["name"] == "task"]
+    for span in spans:
+        if span["name"] == "work":
+            assert span["pid"] != task["pid"]
+            assert task["ts"] <= span["ts"]
+            assert span["ts"] + span["dur"] <= task["ts"] + task["dur"]
+    assert {
+        event["args"]["name"]
+        for event in events
+        if event["name"] == "process_name"
+    } >= {"MainProcess"}
@@ -0,0 +1,121 @@
+import json
+import logging
+import os
+import sys
+
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from ml_pipeline import resources, utils
+
+
+def test_atomic_path(tmp_path) -> None:
+    path = tmp_path / "metrics.json"
+    with utils.atomic_path(str(path)) as tmp:
+        assert tmp.endswith("metrics.json")
+        with open(tmp, "w") as f:
+            f.write("{}")
+        # nothing is visible under the final name before the rename
+        assert not path.exists()
+    assert path.read_text() == "{}"
+
+    with pytest.raises(RuntimeError):
+        with utils.atomic_path(str(path)) as tmp:
+            with open(tmp, "w") as f:
+                f.write("partial")
+            raise RuntimeError()
+    # a failed write leaves the previous file and no temporary file
+    assert path.read_text() == "{}"
+    assert os.listdir(tmp_path) == ["metrics.json"]
+
+
+def test_add_log_file(tmp_path) -> None:
+    logger = utils.Logger("test-utils").get()
+    handler = utils.add_log_file(logger, str(tmp_path / "run.log"))
+    logger.info("Task done.", extra=utils.event(task="load_data"))
+    utils.remove_log_file(logger, handler)
+    logger.info("After the run.")
+
+    with open(tmp_path / "run.log") as f:
+        records = [json.loads(line) for line in f]
+    assert [record["message"] for record in records] == ["Task done."]
+    assert records[0]["task"] == "load_data"
+    assert handler not in logger.handlers
+    logging.getLogger("test-utils").handlers.clear()
+
+
+def test_logger_replaces_handlers(tmp_path) -> None:
+    path = tmp_path / "pipeline.log"
+    utils.Logger("test-logger", log_path=str(path))
+    logger = utils.Logger("test-logger", log_path=str(path)).get()
+    logger.info("Loaded %d rows.", 150)
+    # stops the listener, which writes the queued records
+    utils.Logger("test-logger")
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["message"] == "Loaded 150 rows."
+    logging.getLogger("test-logger").handlers.clear()
+
+
+def test_json_formatter() -> None:
+    logger = logging.getLogger("test-formatter")
+    try:
+        raise ValueError("bad row")
+    except ValueError:
+        record = logger.makeRecord(
+            "test-formatter",
+            logging.ERROR,
+            __file__,
+            1,
+            "Task %s failed.",
+            ("load_data",),
+            sys.exc_info(),
+            extra=utils.event(task="load_data", rows=150),
+        )
+
+    items = json.loads(utils.JSONFormatter().format(record))
+
+    assert items["message"] == "Task load_data failed."
+    assert items["level"] == "ERROR"
+    assert (items["task"], items["rows"]) == ("load_data", 150)
+    assert "ValueError: bad row" in items["exception"]
+
+
+def test_lazy() -> None:
+    calls = []
+    lazy = utils.Lazy(lambda n: calls.append(n) or n * 2, 21)
+    logger = logging.getLogger("test-lazy")
+    logger.setLevel(logging.INFO)
+    logger.addHandler(logging.NullHandler())
+
+    logger.debug("%s", lazy)
+    assert calls == []
+    assert str(lazy) == "42"
+    assert calls == [21]
+    logger.handlers.clear()
+
+
+def _log_in_worker(message: str) -> int:
+    logging.getLogger("test-workers").info(message)
+    return os.getpid()
+
+
+def test_worker_logging(tmp_path) -> None:
+    logger = utils.Logger("test-workers").get()
+    utils.add_log_file(logger, str(tmp_path / "run.log"))
+    initializer, initargs = resources.worker_initializer(1)
+    with ProcessPoolExecutor(
+        max_workers=1, initializer=initializer, initargs=initargs
+    ) as executor:
+        pid = executor.submit(_log_in_worker, "From a worker.").result()
+    # stops the listeners, which writes the queued records
+    utils.Logger("test-workers")
+
+    with open(tmp_path / "run.log") as f:
+        records = [json.loads(line) for line in f]
+    assert [(r["message"], r["process"]) for r in records] == [
+        ("From a worker.", pid)
+    ]
+    logging.getLogger("test-workers").handlers.clear()
@@ -0,0 +1,38 @@
+import os
+
+from ml_pipeline import watch
+
+
+def test_file_watcher(tmp_path) -> None:
+    path = tmp_path / "project.yaml"
+    path.write_text("a: 1\n")
+    watcher = watch.FileWatcher([str(path)])
+    assert watcher.changed() == set()
+
+    path.write_text("a: 2\n")
+    os.utime(path, ns=(0, 0))
+    assert watcher.changed() == {str(path)}
+    assert watcher.changed() == set()
+
+
+def test_changed_methods() -> None:
+    class Old:
+        def load(self):
+            pass
+
+        def preprocess(self):
+            return 1
+
+    class New:
+        def load(self):
+            pass
+
+        def preprocess(self):
+            return 2
+
+        def feature_engineer(self):
+            pass
+
+    assert watch.changed_methods(
+        watch.method_sources(Old), watch.method_sources(New)
+    ) == {"preprocess", "feature_engineer"}